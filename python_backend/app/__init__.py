@@ -3,6 +3,13 @@ from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
 import os
 from .routes import main as main_blueprint
+from .result_cache import ResultCache
+from .jobs import JobStore, JobRunner
+from .batch import BatchRunner
+from .workspace import WorkspaceJanitor
+from .analytics import configure_analytics_pipeline
+from .metrics import init_metrics
+from src.classes.PartCache import PartCache
 
 
 def create_app():
@@ -22,10 +29,14 @@ def create_app():
     CORS(app,
          origins=allowed_origins,
          supports_credentials=True,
-         allow_headers=['Content-Type', 'Authorization', 'X-Source'])
+         allow_headers=['Content-Type', 'Authorization', 'X-Source'],
+         expose_headers=['X-Cache'])
 
+    # Every request gets its own workspace folder in UPLOAD_FOLDER (upload, unzipped package, output ZIP)
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # Workspaces older than this were left behind (e.g. by a killed worker), keep above the gunicorn timeout
+    app.config['WORKSPACE_MAX_AGE_SECONDS'] = int(os.getenv('WORKSPACE_MAX_AGE_SECONDS', 60 * 60))
 
     # Set maximum file upload size to 300MB (for large template files)
     # Value is in bytes: 300 * 1024 * 1024 = 314572800
@@ -35,9 +46,76 @@ def create_app():
     # If not set, authentication is disabled
     app.config['AUTH_TOKEN'] = os.getenv('AUTH_TOKEN', None)
 
+    # Record the tracemalloc peak of every check stage (GET /metrics, analytics), slows checks down
+    app.config['TRACE_MEMORY'] = os.getenv('TRACE_MEMORY', 'false').lower() in ('1', 'true', 'yes')
+
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    app.extensions['workspace_janitor'] = WorkspaceJanitor(
+        UPLOAD_FOLDER, max_age_seconds=app.config['WORKSPACE_MAX_AGE_SECONDS'])
+    app.extensions['workspace_janitor'].start()
+
+    # Result cache for repeat submissions of the same package.
+    # Kept outside UPLOAD_FOLDER, whose old entries are removed by the workspace janitor.
+    app.config['RESULT_CACHE_FOLDER'] = os.getenv('RESULT_CACHE_FOLDER', 'result_cache')
+    app.config['RESULT_CACHE_MAX_BYTES'] = int(os.getenv('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    app.config['RESULT_CACHE_MAX_AGE_SECONDS'] = int(os.getenv('RESULT_CACHE_MAX_AGE_SECONDS', 7 * 24 * 60 * 60))
+    app.extensions['result_cache'] = ResultCache(
+        app.config['RESULT_CACHE_FOLDER'],
+        max_disk_bytes=app.config['RESULT_CACHE_MAX_BYTES'],
+        max_age_seconds=app.config['RESULT_CACHE_MAX_AGE_SECONDS'])
+
+    # Parsed IDML parts (stories, spreads, styles, fonts) kept in memory per worker,
+    # so a revised template only re-parses the members that changed
+    app.config['PART_CACHE_MAX_BYTES'] = int(os.getenv('PART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.extensions['part_cache'] = PartCache(app.config['PART_CACHE_MAX_BYTES'])
+
+    # Background jobs (POST /jobs), run on a bounded process pool per worker.
+    # Kept outside UPLOAD_FOLDER, whose old entries are removed by the workspace janitor.
+    app.config['JOBS_FOLDER'] = os.getenv('JOBS_FOLDER', 'jobs')
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 1))
+    app.config['JOB_MAX_PENDING'] = int(os.getenv('JOB_MAX_PENDING', 20))
+    app.config['JOB_MAX_AGE_SECONDS'] = int(os.getenv('JOB_MAX_AGE_SECONDS', 24 * 60 * 60))
+    # Jobs left running or queued by a worker that exited are failed after these
+    app.config['JOB_TIMEOUT_SECONDS'] = int(os.getenv('JOB_TIMEOUT_SECONDS', 60 * 60))
+    app.config['JOB_QUEUED_TIMEOUT_SECONDS'] = int(os.getenv('JOB_QUEUED_TIMEOUT_SECONDS', 6 * 60 * 60))
+    app.extensions['job_store'] = JobStore(
+        app.config['JOBS_FOLDER'], max_age_seconds=app.config['JOB_MAX_AGE_SECONDS'],
+        timeout_seconds=app.config['JOB_TIMEOUT_SECONDS'],
+        queued_timeout_seconds=app.config['JOB_QUEUED_TIMEOUT_SECONDS'])
+    app.extensions['job_runner'] = JobRunner(
+        app.extensions['job_store'],
+        max_workers=app.config['JOB_WORKERS'],
+        max_pending=app.config['JOB_MAX_PENDING'],
+        result_cache_settings={
+            'cache_folder': app.config['RESULT_CACHE_FOLDER'],
+            'max_disk_bytes': app.config['RESULT_CACHE_MAX_BYTES'],
+            'max_age_seconds': app.config['RESULT_CACHE_MAX_AGE_SECONDS']},
+        part_cache_max_bytes=app.config['PART_CACHE_MAX_BYTES'])
+
+    # Batch checks (POST /run-batch), on their own bounded process pool per worker
+    app.config['BATCH_WORKERS'] = int(os.getenv('BATCH_WORKERS', 2))
+    # A batch is one request, so it has to end within gunicorn's --timeout (600s in the Dockerfile):
+    # templates not checked after BATCH_TIMEOUT_SECONDS are returned as failed. Larger sets go to POST /jobs.
+    app.config['BATCH_MAX_TEMPLATES'] = int(os.getenv('BATCH_MAX_TEMPLATES', 50))
+    app.config['BATCH_TIMEOUT_SECONDS'] = int(os.getenv('BATCH_TIMEOUT_SECONDS', 540))
+    app.extensions['batch_runner'] = BatchRunner(
+        max_workers=app.config['BATCH_WORKERS'],
+        result_cache_settings=app.extensions['job_runner'].result_cache_settings,
+        part_cache_max_bytes=app.config['PART_CACHE_MAX_BYTES'])
+
+    # Analytics are sent to Supabase in batches by a background thread per process.
+    # Runs that cannot be sent are kept in the spool (shared by the processes on the machine).
+    app.config['ANALYTICS_SPOOL_PATH'] = os.getenv('ANALYTICS_SPOOL_PATH', 'analytics_spool.sqlite3')
+    app.config['ANALYTICS_BATCH_SIZE'] = int(os.getenv('ANALYTICS_BATCH_SIZE', 50))
+    app.config['ANALYTICS_FLUSH_SECONDS'] = float(os.getenv('ANALYTICS_FLUSH_SECONDS', 2))
+    configure_analytics_pipeline(
+        spool_path=app.config['ANALYTICS_SPOOL_PATH'],
+        batch_size=app.config['ANALYTICS_BATCH_SIZE'],
+        flush_interval_seconds=app.config['ANALYTICS_FLUSH_SECONDS'])
 
     app.register_blueprint(main_blueprint)
+    # Request latency and in-progress metrics for GET /metrics
+    init_metrics(app)
 
     # Error handler for file size limit exceeded
     @app.errorhandler(RequestEntityTooLarge)
@@ -1,9 +1,22 @@
 """
 Analytics module for storing validation run data to Supabase.
+
+Runs are not sent while the user waits: queue_analytics puts them on the queue
+of a per-process AnalyticsPipeline, whose background thread sends them in
+batches over one long-lived client. Runs that cannot be sent (Supabase
+unreachable) are kept in a local SQLite spool and sent again later.
 """
 import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import sqlite3
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Callable, Iterator
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -30,6 +43,20 @@ def get_supabase_client():
         return None
 
 
+# One client per process, reused by the analytics pipeline and the analytics endpoints
+_shared_client = None
+_shared_client_pid: Optional[int] = None
+
+
+def get_shared_supabase_client():
+    """The Supabase client of this process, created on first use (None if not configured)."""
+    global _shared_client, _shared_client_pid
+    if _shared_client is None or _shared_client_pid != os.getpid():
+        _shared_client = get_supabase_client()
+        _shared_client_pid = os.getpid()
+    return _shared_client
+
+
 def determine_severity(validation_type: str) -> str:
     """Determine severity from validation type."""
     # Warning types
@@ -135,79 +162,275 @@ def extract_individual_validations(results_json: Dict[str, Any]) -> List[Dict[st
     return validations
 
 
-def log_analytics_to_supabase(
+def build_analytics_record(
     template_name: str,
     source_type: str,
     duration_ms: int,
     file_size_bytes: int,
-    results_json: Dict[str, Any]
-) -> bool:
+    results_json: Dict[str, Any],
+    stage_timings: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
-    Log analytics data to Supabase.
+    Build the rows of one run for the runs and validations tables.
+
+    The run ID is generated here, so runs and their validations can be inserted
+    in batches without waiting for Supabase to return the ID of each run. The
+    validation IDs are generated too, which makes sending a record again (after
+    a failure) an upsert of the same rows instead of a duplicate.
 
     Args:
         template_name: Name of the template
         source_type: Source of the request ('react-frontend', 'extension', or 'api')
         duration_ms: Duration of validation in milliseconds
         file_size_bytes: Size of uploaded file in bytes
-        results_json: Full validation results JSON
+        results_json: Validation results JSON (categories with details)
+        stage_timings: StageTimings.to_json() of the run, None on a result cache hit
 
     Returns:
-        True if successful, False otherwise
+        Dictionary with the 'run' row and the list of 'validations' rows
     """
-    try:
-        supabase = get_supabase_client()
-        if not supabase:
-            return False
-
-        # Extract validation counts
-        counts = extract_validation_counts(results_json)
-
-        # Prepare run data
-        run_data = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'template_name': template_name or 'Unknown',
-            'source_type': source_type,
-            'duration_ms': duration_ms,
-            'file_size_bytes': file_size_bytes,
-            'total_errors': counts['total_errors'],
-            'total_warnings': counts['total_warnings'],
-            'total_infos': counts['total_infos'],
-        }
-
-        # Insert run record
-        run_response = supabase.table('runs').insert(run_data).execute()
-
-        if not run_response.data:
-            logger.error("Failed to insert run record to Supabase")
-            return False
-
-        run_id = run_response.data[0].get('id')
-        if not run_id:
-            logger.error("No run ID returned from Supabase insert")
-            return False
+    counts = extract_validation_counts(results_json)
+    run_id = str(uuid.uuid4())
+    run_data = {
+        'id': run_id,
+        'timestamp': datetime.utcnow().isoformat(),
+        'template_name': template_name or 'Unknown',
+        'source_type': source_type,
+        'duration_ms': duration_ms,
+        'file_size_bytes': file_size_bytes,
+        'total_errors': counts['total_errors'],
+        'total_warnings': counts['total_warnings'],
+        'total_infos': counts['total_infos'],
+        'stage_timings': stage_timings,
+    }
+    validations = extract_individual_validations(results_json)
+    for validation in validations:
+        validation['id'] = str(uuid.uuid4())
+        validation['run_id'] = run_id
+        # Rolled up by the day of their run, also when the batch is sent later from the spool
+        validation['created_at'] = run_data['timestamp']
+    return {'run': run_data, 'validations': validations}
 
-        # Extract and insert individual validations
-        validations = extract_individual_validations(results_json)
 
-        if validations:
-            # Add run_id to each validation
-            for validation in validations:
-                validation['run_id'] = run_id
+def insert_analytics_records(supabase, records: List[Dict[str, Any]]):
+    """
+    Insert the runs of records and then their validations, in as few requests as possible.
 
-            # Insert in batches to avoid hitting size limits (Supabase allows up to 1000 rows per insert)
-            batch_size = 1000
-            for i in range(0, len(validations), batch_size):
-                batch = validations[i:i + batch_size]
-                supabase.table('validations').insert(batch).execute()
+    Supabase allows up to 1000 rows per insert. Rows already inserted (a batch sent
+    again) are skipped, so they are not counted twice in the daily rollups.
+    Raises if a request fails.
+    """
+    batch_size = 1000
+    runs = [record['run'] for record in records]
+    for i in range(0, len(runs), batch_size):
+        supabase.table('runs').upsert(runs[i:i + batch_size], ignore_duplicates=True).execute()
+
+    validations = [validation for record in records for validation in record['validations']]
+    for i in range(0, len(validations), batch_size):
+        supabase.table('validations').upsert(validations[i:i + batch_size], ignore_duplicates=True).execute()
+
+
+class AnalyticsSpool:
+    """Analytics records that could not be sent, in a SQLite file shared by the processes on the machine."""
+
+    def __init__(self, spool_path: str):
+        self.spool_path = spool_path
+        spool_folder = os.path.dirname(spool_path)
+        if spool_folder:
+            os.makedirs(spool_folder, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS spool (id INTEGER PRIMARY KEY AUTOINCREMENT, record TEXT NOT NULL)')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and closes at the end of the with block."""
+        connection = sqlite3.connect(self.spool_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def put(self, records: List[Dict[str, Any]]):
+        with self._connect() as connection:
+            connection.executemany('INSERT INTO spool (record) VALUES (?)',
+                                   [(json.dumps(record),) for record in records])
+
+    def take(self, limit: int) -> List[Dict[str, Any]]:
+        """Remove and return up to limit of the oldest records.
+
+        Taking is one transaction, so two processes never send the same records.
+        A caller that fails to send them puts them back.
+        """
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute('SELECT id, record FROM spool ORDER BY id LIMIT ?', (limit,)).fetchall()
+            if rows:
+                connection.execute('DELETE FROM spool WHERE id <= ?', (rows[-1][0],))
+        return [json.loads(record) for _, record in rows]
+
+    def count(self) -> int:
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM spool').fetchone()[0]
+
+
+class AnalyticsPipeline:
+    """Sends analytics records to Supabase from a background thread.
+
+    submit() only puts the record on a queue. The thread sends up to batch_size
+    queued records at a time, at least every flush_interval_seconds, over one
+    client created on first use. Records it cannot send go to the spool, which is
+    retried every retry_interval_seconds. Without Supabase credentials (or
+    supabase-py) records are dropped, as before.
+    """
 
-            logger.info(f"Successfully logged {len(validations)} validations for run {run_id}")
-        else:
-            logger.info(f"No validations to log for run {run_id}")
+    def __init__(self, spool_path: str, batch_size: int = 50, flush_interval_seconds: float = 2,
+                 retry_interval_seconds: float = 60, max_queued: int = 10000,
+                 client_factory: Callable[[], Any] = None):
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.retry_interval_seconds = retry_interval_seconds
+        self.client_factory = client_factory or get_shared_supabase_client
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._client = None
+        self._client_checked = False
+        self._spool: AnalyticsSpool = None
+        self._retry_at = 0.0
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: Dict[str, Any]):
+        """Queue record for sending, never waits on Supabase."""
+        self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Supabase is too slow to keep up, keep the record for later
+            self._get_spool().put([record])
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='analytics-pipeline', daemon=True)
+            self._thread.start()
+        # Records still queued when the process exits are kept for the next one
+        atexit.register(self.spool_queued)
+
+    def spool_queued(self):
+        """Move the queued records to the spool."""
+        records = self._take_queued(block=False)
+        if records and self._get_client() is not None:
+            self._get_spool().put(records)
+
+    def flush(self):
+        """Send the queued records and a batch of spooled ones now (the thread does this on its own)."""
+        records = self._take_queued(block=False)
+        if records:
+            self._send(records)
+        self._send_spooled()
+
+    def _get_client(self):
+        if not self._client_checked:
+            self._client = self.client_factory()
+            self._client_checked = True
+        return self._client
+
+    def _get_spool(self) -> AnalyticsSpool:
+        # Created on first use, so processes without Supabase credentials never write it
+        if self._spool is None:
+            self._spool = AnalyticsSpool(self.spool_path)
+        return self._spool
+
+    def _take_queued(self, block: bool) -> List[Dict[str, Any]]:
+        """Up to batch_size queued records, waiting up to flush_interval_seconds for them if block."""
+        records = []
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(records) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    records.append(self._queue.get(timeout=timeout))
+                else:
+                    records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _send(self, records: List[Dict[str, Any]]) -> bool:
+        """Send records, or spool them if that fails. Returns True if they were sent (or dropped)."""
+        supabase = self._get_client()
+        if supabase is None:
+            return True
+        try:
+            insert_analytics_records(supabase, records)
+            logger.info(f"Logged analytics for {len(records)} runs")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to log analytics for {len(records)} runs, spooling them: {e}")
+            self._get_spool().put(records)
+            self._retry_at = time.monotonic() + self.retry_interval_seconds
+            return False
 
-        logger.info(f"Successfully logged analytics for run {run_id}")
-        return True
+    def _send_spooled(self):
+        if self._get_client() is None or time.monotonic() < self._retry_at:
+            return
+        records = self._get_spool().take(self.batch_size)
+        if records and self._send(records):
+            logger.info(f"Logged {len(records)} spooled analytics runs")
+
+    def _run(self):
+        while True:
+            try:
+                records = self._take_queued(block=True)
+                if records and not self._send(records):
+                    continue
+                self._send_spooled()
+            except Exception as e:
+                logger.error(f"Analytics pipeline failed: {e}", exc_info=True)
+
+
+# Settings of the pipeline of each process, see configure_analytics_pipeline
+_pipeline_settings: Dict[str, Any] = {'spool_path': os.getenv('ANALYTICS_SPOOL_PATH', 'analytics_spool.sqlite3')}
+_pipeline: Optional[AnalyticsPipeline] = None
+_pipeline_pid: Optional[int] = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_analytics_pipeline(**settings):
+    """Set the AnalyticsPipeline arguments for pipelines created from now on (pool processes inherit them)."""
+    global _pipeline
+    with _pipeline_lock:
+        _pipeline_settings.update(settings)
+        _pipeline = None
+
+
+def get_analytics_pipeline() -> AnalyticsPipeline:
+    """The pipeline of this process. A forked process gets its own, the parent's thread is not running in it."""
+    global _pipeline, _pipeline_pid
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline_pid != os.getpid():
+            _pipeline = AnalyticsPipeline(**_pipeline_settings)
+            _pipeline_pid = os.getpid()
+        return _pipeline
+
+
+def queue_analytics(
+    template_name: str,
+    source_type: str,
+    duration_ms: int,
+    file_size_bytes: int,
+    results_json: Dict[str, Any],
+    stage_timings: Optional[Dict[str, Any]] = None
+):
+    """
+    Queue the analytics of a run for Supabase, see build_analytics_record for the arguments.
 
-    except Exception as e:
-        logger.error(f"Error logging analytics to Supabase: {e}", exc_info=True)
-        return False
+    Returns straight away, the run is sent in the background.
+    """
+    get_analytics_pipeline().submit(
+        build_analytics_record(template_name, source_type, duration_ms, file_size_bytes, results_json,
+                               stage_timings))
@@ -1,238 +1,160 @@
 """
 API functions for fetching analytics data from Supabase.
+
+The summary is aggregated in Postgres (the analytics_summary function in
+SUPABASE_SCHEMA.md), so a dashboard load transfers a few hundred rows whatever
+the number of runs, and is cached per days value for SUMMARY_CACHE_SECONDS.
 """
 import os
+import json
+import time
+import uuid
+import base64
 import logging
-import re
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import threading
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+from .analytics import get_shared_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Summaries by days value, with the time they expire
+SUMMARY_CACHE_SECONDS = int(os.getenv('ANALYTICS_SUMMARY_CACHE_SECONDS', 60))
+_summary_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_summary_cache_lock = threading.Lock()
 
-def parse_timestamp(timestamp_str: str) -> datetime:
-    """
-    Parse ISO timestamp string with variable-length microseconds.
-    Handles formats like:
-    - '2026-01-18T13:41:18.6297+00:00' (4 digits)
-    - '2026-01-18T13:41:18.629700+00:00' (6 digits)
-    - '2026-01-18T13:41:18Z' (no microseconds)
-    """
-    if not timestamp_str:
-        raise ValueError("Empty timestamp string")
-
-    # Normalize Z timezone to +00:00
-    timestamp_str = timestamp_str.replace('Z', '+00:00')
-
-    # Check if there are microseconds (pattern: .[digits] before timezone or end)
-    # Match microseconds and timezone separately
-    match = re.match(r'^(.+?)\.(\d+)([\+\-]\d{2}:\d{2}|$)', timestamp_str)
-    if match:
-        base_part = match.group(1)  # Everything before the microseconds
-        microseconds_str = match.group(2)  # The microseconds digits
-        tz_part = match.group(3) or ''  # Timezone or empty
-
-        # Pad or truncate microseconds to exactly 6 digits
-        if len(microseconds_str) < 6:
-            microseconds_str = microseconds_str.ljust(6, '0')
-        elif len(microseconds_str) > 6:
-            microseconds_str = microseconds_str[:6]
-
-        # Reconstruct the timestamp with normalized microseconds
-        timestamp_str = f"{base_part}.{microseconds_str}{tz_part}"
-
-    try:
-        return datetime.fromisoformat(timestamp_str)
-    except ValueError as e:
-        logger.error(f"Failed to parse timestamp '{timestamp_str}': {e}")
-        raise
-
-
-def get_supabase_client():
-    """Initialize and return Supabase client if credentials are available."""
-    try:
-        from supabase import create_client
-
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_KEY')
-
-        if not supabase_url or not supabase_key:
-            logger.warning("Supabase credentials not found.")
-            return None
-
-        return create_client(supabase_url, supabase_key)
-    except ImportError:
-        logger.warning("supabase-py not installed.")
-        return None
-    except Exception as e:
-        logger.error(f"Failed to initialize Supabase client: {e}")
-        return None
+# Runs listed in the summary
+RECENT_RUNS_LIMIT = 50
+# Largest page of GET /analytics/runs
+MAX_RUNS_LIMIT = 1000
 
 
 def get_analytics_summary(days: int = 30) -> Dict[str, Any]:
     """
-    Get analytics summary for the last N days.
+    Get analytics summary for the last N days: today (UTC) and the N - 1 whole days before it.
 
     Returns:
         Dictionary with summary statistics
     """
+    now = time.monotonic()
+    with _summary_cache_lock:
+        cached = _summary_cache.get(days)
+    if cached and cached[0] > now:
+        return cached[1]
+
     try:
-        supabase = get_supabase_client()
+        supabase = get_shared_supabase_client()
         if not supabase:
             return {'error': 'Supabase not configured'}
 
-        # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-
-        # Get runs summary
-        runs_response = supabase.table('runs')\
-            .select('*')\
-            .gte('timestamp', start_date.isoformat())\
-            .order('timestamp', desc=True)\
-            .execute()
-
-        runs = runs_response.data if runs_response.data else []
-
-        # Calculate summary stats
-        total_runs = len(runs)
-        total_errors = sum(r.get('total_errors', 0) for r in runs)
-        total_warnings = sum(r.get('total_warnings', 0) for r in runs)
-        total_infos = sum(r.get('total_infos', 0) for r in runs)
-
-        avg_duration = sum(r.get('duration_ms', 0) for r in runs) / total_runs if total_runs > 0 else 0
-        avg_file_size = sum(r.get('file_size_bytes', 0) for r in runs) / total_runs if total_runs > 0 else 0
-
-        # Get source type breakdown
-        source_types = {}
-        for run in runs:
-            source = run.get('source_type', 'unknown')
-            if source not in source_types:
-                source_types[source] = {'count': 0, 'total_errors': 0, 'total_warnings': 0, 'total_infos': 0}
-            source_types[source]['count'] += 1
-            source_types[source]['total_errors'] += run.get('total_errors', 0)
-            source_types[source]['total_warnings'] += run.get('total_warnings', 0)
-            source_types[source]['total_infos'] += run.get('total_infos', 0)
-
-        # Get most common validation types
-        validations_response = supabase.table('validations')\
-            .select('validation_type, severity, category')\
-            .gte('created_at', start_date.isoformat())\
-            .execute()
-
-        validations = validations_response.data if validations_response.data else []
-
-        # Group by validation_type and severity using a tuple key
-        # Helper function to determine severity (same logic as in analytics.py)
-        def determine_severity(validation_type: str) -> str:
-            """Determine severity from validation type."""
-            warning_types = [
-                'HYPHENATION', 'OVERRIDE', 'UNUSED_IMAGE', 'IMAGE_TRANSFORMATION',
-                'IMAGE_TRANSFORMATION_IMAGE', 'IMAGE_TRANSFORMATION_CONTAINER',
-                'DOCUMENT_BLEED', 'COMPOSER'
-            ]
-            info_types = ['EMPTY_TEXT_FRAME', 'LARGE_IMAGE']
-
-            if validation_type in warning_types or validation_type.startswith('WARNING'):
-                return 'warning'
-            elif validation_type in info_types or validation_type.startswith('INFO'):
-                return 'info'
-            else:
-                return 'error'
-
-        validation_counts = {}
-        for v in validations:
-            v_type = v.get('validation_type', 'UNKNOWN')
-            severity = v.get('severity', 'error')
-            # Ensure severity is one of the valid values
-            if severity not in ['error', 'warning', 'info']:
-                # If severity is invalid, re-determine it from validation_type
-                severity = determine_severity(v_type)
-
-            # Use tuple as key to avoid issues with underscores in validation_type
-            key = (v_type, severity)
-            validation_counts[key] = validation_counts.get(key, 0) + 1
-
-        # Sort all validation types by count (descending)
-        all_validations = sorted(
-            validation_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-
-        # Prepare time series data for runs over time (group by day)
-        runs_by_day = {}
-        for run in runs:
-            run_date = parse_timestamp(run.get('timestamp', ''))
-            day_key = run_date.strftime('%Y-%m-%d')
-            if day_key not in runs_by_day:
-                runs_by_day[day_key] = {
-                    'date': day_key,
-                    'runs': 0,
-                    'errors': 0,
-                    'warnings': 0,
-                    'infos': 0
-                }
-            runs_by_day[day_key]['runs'] += 1
-            runs_by_day[day_key]['errors'] += run.get('total_errors', 0)
-            runs_by_day[day_key]['warnings'] += run.get('total_warnings', 0)
-            runs_by_day[day_key]['infos'] += run.get('total_infos', 0)
-
-        # Sort by date
-        runs_over_time = sorted(runs_by_day.values(), key=lambda x: x['date'])
-
-        return {
-            'summary': {
-                'total_runs': total_runs,
-                'total_errors': total_errors,
-                'total_warnings': total_warnings,
-                'total_infos': total_infos,
-                'avg_duration_ms': int(avg_duration),
-                'avg_file_size_bytes': int(avg_file_size),
-                'days': days
-            },
-            'source_types': source_types,
-            'all_validations': [{'type': k[0], 'severity': k[1], 'count': v} for k, v in all_validations],
-            'runs_over_time': runs_over_time,
-            'recent_runs': runs[:50]  # Last 50 runs
-        }
-
+        # The last days UTC days, today included
+        summary_response = supabase.rpc('analytics_summary', {
+            'days': days,
+            'recent_limit': RECENT_RUNS_LIMIT
+        }).execute()
+        summary = build_analytics_summary(summary_response.data or {}, days)
     except Exception as e:
         logger.error(f"Error fetching analytics: {e}", exc_info=True)
         return {'error': str(e)}
 
+    with _summary_cache_lock:
+        _summary_cache[days] = (now + SUMMARY_CACHE_SECONDS, summary)
+    return summary
+
+
+def build_analytics_summary(aggregates: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """Summary response from the analytics_summary function result."""
+    totals = aggregates.get('summary') or {}
+    source_types = {}
+    for source_type in aggregates.get('source_types') or []:
+        source_types[source_type['source_type']] = {
+            'count': source_type['count'],
+            'total_errors': source_type['total_errors'],
+            'total_warnings': source_type['total_warnings'],
+            'total_infos': source_type['total_infos']
+        }
+
+    return {
+        'summary': {
+            'total_runs': totals.get('total_runs', 0),
+            'total_errors': totals.get('total_errors', 0),
+            'total_warnings': totals.get('total_warnings', 0),
+            'total_infos': totals.get('total_infos', 0),
+            'avg_duration_ms': int(totals.get('avg_duration_ms') or 0),
+            'avg_file_size_bytes': int(totals.get('avg_file_size_bytes') or 0),
+            'days': days
+        },
+        'source_types': source_types,
+        'all_validations': aggregates.get('validations') or [],
+        'runs_over_time': aggregates.get('runs_over_time') or [],
+        'recent_runs': aggregates.get('recent_runs') or []
+    }
+
+
+def encode_runs_cursor(run: Dict[str, Any]) -> str:
+    """Opaque cursor for the runs after run (by timestamp, then id, newest first)."""
+    return base64.urlsafe_b64encode(json.dumps([run['timestamp'], run['id']]).encode()).decode()
+
+
+def decode_runs_cursor(cursor: str) -> Tuple[str, str]:
+    """(timestamp, id) of an encode_runs_cursor cursor. Raises ValueError if it is not one.
+
+    The cursor comes from the client and ends up in a PostgREST filter, so both values
+    are parsed and returned in their canonical form, never as sent.
+    """
+    try:
+        timestamp, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp).isoformat(), str(uuid.UUID(run_id))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError('Invalid cursor') from e
 
-def get_runs(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+
+def get_runs(limit: int = 100, cursor: Optional[str] = None, include_count: bool = False) -> Dict[str, Any]:
     """
-    Get paginated list of runs.
+    Get a page of runs, newest first.
+
+    Pages by (timestamp, id) instead of an offset, so every page is one index range
+    scan and deep pages cost the same as the first one.
 
     Args:
-        limit: Number of runs to return
-        offset: Offset for pagination
+        limit: Number of runs to return (at most MAX_RUNS_LIMIT)
+        cursor: next_cursor of the previous page, None for the first page
+        include_count: Add the planner's estimate of the number of runs as 'total'
+
+    Raises:
+        ValueError: If cursor is not a cursor returned by this function
     """
+    limit = max(1, min(limit, MAX_RUNS_LIMIT))
+    after = decode_runs_cursor(cursor) if cursor else None
     try:
-        supabase = get_supabase_client()
+        supabase = get_shared_supabase_client()
         if not supabase:
             return {'error': 'Supabase not configured'}
 
-        runs_response = supabase.table('runs')\
-            .select('*')\
+        query = supabase.table('runs')\
+            .select('*', count='estimated' if include_count else None)
+        if after:
+            timestamp, run_id = after
+            query = query.or_(
+                f'timestamp.lt."{timestamp}",and(timestamp.eq."{timestamp}",id.lt."{run_id}")')
+        # One run more than the page, to know if there is a next page
+        runs_response = query\
             .order('timestamp', desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
-
-        count_response = supabase.table('runs')\
-            .select('id', count='exact')\
+            .order('id', desc=True)\
+            .limit(limit + 1)\
             .execute()
 
-        total_count = count_response.count if hasattr(count_response, 'count') else len(runs_response.data)
+        runs = runs_response.data if runs_response.data else []
+        next_cursor = encode_runs_cursor(runs[limit - 1]) if len(runs) > limit else None
 
-        return {
-            'runs': runs_response.data if runs_response.data else [],
-            'total': total_count,
+        runs_page = {
+            'runs': runs[:limit],
             'limit': limit,
-            'offset': offset
+            'next_cursor': next_cursor
         }
+        if include_count:
+            runs_page['total'] = runs_response.count
+        return runs_page
 
     except Exception as e:
         logger.error(f"Error fetching runs: {e}", exc_info=True)
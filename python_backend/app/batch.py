@@ -0,0 +1,181 @@
+"""
+Batch checks: many templates in one request.
+
+POST /run-batch takes several package ZIPs, or one ZIP of package ZIPs, checks
+them on a bounded process pool and streams one combined JSON document: the
+results of each template as soon as it finishes, then a summary of the batch.
+"""
+import io
+import os
+import itertools
+import time
+import shutil
+import zipfile
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from werkzeug.utils import secure_filename
+from .jobs import check_package
+from .metrics import init_pool_process
+from .result_cache import new_package_hasher, HASH_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPackage:
+    """One template of a batch: its file name, where it is saved and its SHA-256."""
+
+    def __init__(self, file_name: str, path: str, sha256: str):
+        self.file_name = file_name
+        self.path = path
+        self.sha256 = sha256
+
+
+def _save_package(stream, path: str) -> str:
+    """Copy stream to path, returns the SHA-256 of the content."""
+    hasher = new_package_hasher()
+    with open(path, 'wb') as out_file:
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            out_file.write(chunk)
+    return hasher.hexdigest()
+
+
+def _nested_package_members(zip_path: str) -> List[str]:
+    """The .zip members of a ZIP of ZIPs, or [] if zip_path is a package (or not a ZIP at all)."""
+    if not zipfile.is_zipfile(zip_path):
+        return []
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        names = [name for name in zip_ref.namelist() if not name.startswith('__MACOSX/')]
+    if any(name.lower().endswith('.idml') for name in names):
+        return []
+    return [name for name in names if name.lower().endswith('.zip')]
+
+
+def collect_batch_packages(uploads, workspace, max_packages: int) -> List[BatchPackage]:
+    """Save the uploaded packages into the workspace, unpacking ZIPs of ZIPs.
+
+    Every package gets a folder of its own, so packages with the same file name do not
+    collide and each keeps its name (the template name is taken from it).
+    Raises ValueError if there are no packages or more than max_packages.
+    """
+    packages: List[BatchPackage] = []
+    package_folder_names = itertools.count()
+
+    def add_package(file_name: str, stream):
+        if len(packages) >= max_packages:
+            raise ValueError(f'A batch can have at most {max_packages} templates')
+        package_folder = workspace.file_path(str(next(package_folder_names)))
+        os.makedirs(package_folder)
+        package_path = os.path.join(package_folder, file_name)
+        packages.append(BatchPackage(file_name, package_path, _save_package(stream, package_path)))
+
+    for upload in uploads:
+        file_name = secure_filename(upload.filename or '')
+        if not file_name:
+            continue
+        add_package(file_name, upload.stream)
+        nested_members = _nested_package_members(packages[-1].path)
+        if not nested_members:
+            continue
+        # A ZIP of ZIPs, replace it by the packages in it
+        outer_package = packages.pop()
+        with zipfile.ZipFile(outer_package.path) as zip_ref:
+            for member in nested_members:
+                member_name = secure_filename(os.path.basename(member)) or 'template.zip'
+                with zip_ref.open(member) as member_stream:
+                    add_package(member_name, member_stream)
+        shutil.rmtree(os.path.dirname(outer_package.path), ignore_errors=True)
+
+    if not packages:
+        raise ValueError('No template ZIP files provided')
+    return packages
+
+
+def check_batch_package(package_path: str, source_type: str, package_sha256: str,
+                        result_cache_settings: Dict[str, Any] = None,
+                        part_cache_max_bytes: int = None) -> Tuple[bytes, Dict[str, int]]:
+    """Run the checker on one package of a batch in a pool process, returns its results JSON and counts."""
+    results_file = io.BytesIO()
+    counts = check_package(package_path, results_file, source_type, package_sha256,
+                           result_cache_settings, part_cache_max_bytes)
+    return results_file.getvalue(), counts
+
+
+class BatchRunner:
+    """Checks batches on a process pool of max_workers, created on first use (after gunicorn forks)."""
+
+    def __init__(self, max_workers: int = 2, result_cache_settings: Dict[str, Any] = None,
+                 part_cache_max_bytes: int = None):
+        self.max_workers = max_workers
+        self.result_cache_settings = result_cache_settings
+        self.part_cache_max_bytes = part_cache_max_bytes
+        self._executor: ProcessPoolExecutor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_pool_process)
+            return self._executor
+
+    def run(self, packages: List[BatchPackage], source_type: str, concurrency: int,
+            time_limit_seconds: float = None) -> Iterator[Tuple[BatchPackage, Optional[bytes], Optional[Dict[str, int]], Optional[str]]]:
+        """Yield (package, results JSON, counts, error) for every package as soon as it finishes.
+
+        At most concurrency packages of this batch are in the pool at a time, so one batch
+        does not hold up the other requests using the pool. Packages not finished after
+        time_limit_seconds are yielded as failed, so the request ends before gunicorn's
+        --timeout kills the worker in the middle of the response.
+        """
+        executor = self._get_executor()
+        remaining = iter(packages)
+        pending = {}
+        deadline = time.monotonic() + time_limit_seconds if time_limit_seconds is not None else None
+
+        def submit_next():
+            package = next(remaining, None)
+            if package is not None:
+                future = executor.submit(
+                    check_batch_package, package.path, source_type, package.sha256,
+                    self.result_cache_settings, self.part_cache_max_bytes)
+                pending[future] = package
+
+        for _ in range(max(1, concurrency)):
+            submit_next()
+        try:
+            while pending:
+                timeout = max(0, deadline - time.monotonic()) if deadline is not None else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    package = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        # Keep the pool busy while this result is sent
+                        submit_next()
+                        results_json, counts = future.result()
+                        yield package, results_json, counts, None
+                        continue
+                    logger.error(f"Batch template {package.file_name} failed: {error}")
+                    if isinstance(error, BrokenProcessPool):
+                        # A pool process was killed, start a new pool for the rest
+                        with self._lock:
+                            if self._executor is executor:
+                                self._executor = None
+                        executor = self._get_executor()
+                    submit_next()
+                    yield package, None, None, str(error) or type(error).__name__
+            # Out of time, the packages still running finish in the pool but are not waited for
+            for package in list(pending.values()) + list(remaining):
+                yield package, None, None, f'Batch time limit of {time_limit_seconds} seconds reached'
+        finally:
+            # Client went away, do not start the rest of the batch
+            for future in pending:
+                future.cancel()
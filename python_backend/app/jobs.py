@@ -0,0 +1,300 @@
+"""
+Background check jobs.
+
+POST /jobs stores the package in the jobs folder, records the job in a SQLite
+database and runs it on a bounded local process pool, so the request returns
+straight away and the HTTP workers stay free. The database and folder are
+shared by all gunicorn workers on the machine, so GET /jobs/<id> can be
+answered by any of them.
+"""
+import os
+import shutil
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+from .metrics import init_pool_process
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Chunk size used when streaming job results back
+RESULTS_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class JobStore:
+    """Job records in SQLite, packages and results JSON as files next to it.
+
+    Jobs running for longer than timeout_seconds, or queued for longer than
+    queued_timeout_seconds, are failed: the worker whose pool had them has most
+    likely exited (restart, crash, --max-requests), so nothing will finish them.
+    Status changes only move a job forward (queued -> running -> done / failed),
+    so a job that finishes after it was failed stays failed.
+    """
+
+    def __init__(self, jobs_folder: str, max_age_seconds: int = 24 * 60 * 60, timeout_seconds: int = 60 * 60,
+                 queued_timeout_seconds: int = 6 * 60 * 60):
+        self.jobs_folder = jobs_folder
+        self.max_age_seconds = max_age_seconds
+        self.timeout_seconds = timeout_seconds
+        self.queued_timeout_seconds = queued_timeout_seconds
+        self.db_path = os.path.join(jobs_folder, 'jobs.sqlite3')
+        os.makedirs(self.jobs_folder, exist_ok=True)
+        with self._connect() as connection:
+            # Readers (GET /jobs/<id>) do not block the job processes writing their status
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, status TEXT NOT NULL, source_type TEXT, package_name TEXT, package_sha256 TEXT, '
+                'created_at REAL NOT NULL, started_at REAL, finished_at REAL, error TEXT)')
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and closes at the end of the with block."""
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _update(self, job_id: str, from_statuses: Tuple[str, ...], **fields) -> bool:
+        """Update the job if its status is one of from_statuses, returns whether it was."""
+        columns = ', '.join(f"{column} = ?" for column in fields)
+        statuses = ', '.join('?' for _ in from_statuses)
+        with self._connect() as connection:
+            return connection.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND status IN ({statuses})",
+                (*fields.values(), job_id, *from_statuses)).rowcount > 0
+
+    def package_folder(self, job_id: str) -> str:
+        return os.path.join(self.jobs_folder, job_id)
+
+    def package_path(self, job_id: str, package_name: str) -> str:
+        # Keeps the uploaded file name, the template name is taken from it
+        return os.path.join(self.package_folder(job_id), package_name)
+
+    def results_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_folder, f"{job_id}.json")
+
+    def create(self, source_type: str, package_name: str, package_sha256: str = None) -> str:
+        """Record a new queued job and return its ID. Its package goes to package_path(job_id, package_name)."""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.package_folder(job_id))
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO jobs (id, status, source_type, package_name, package_sha256, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, JOB_QUEUED, source_type, package_name, package_sha256, time.time()))
+        return job_id
+
+    def mark_running(self, job_id: str) -> bool:
+        """Start a queued job, False if it is not queued (any more)."""
+        return self._update(job_id, (JOB_QUEUED,), status=JOB_RUNNING, started_at=time.time())
+
+    def mark_done(self, job_id: str) -> bool:
+        """Finish a running job, False if it is not running (failed by the timeout meanwhile)."""
+        return self._update(job_id, (JOB_RUNNING,), status=JOB_DONE, finished_at=time.time())
+
+    def mark_failed(self, job_id: str, error: str) -> bool:
+        """Fail a queued or running job, False if it has already finished."""
+        return self._update(job_id, (JOB_QUEUED, JOB_RUNNING), status=JOB_FAILED, finished_at=time.time(), error=error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record, or None if there is no such job."""
+        with self._connect() as connection:
+            row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def count_pending(self) -> int:
+        """Number of queued and running jobs, those past their timeout left out."""
+        now = time.time()
+        with self._connect() as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM jobs WHERE (status = ? AND created_at >= ?) OR (status = ? AND started_at >= ?)',
+                (JOB_QUEUED, now - self.queued_timeout_seconds,
+                 JOB_RUNNING, now - self.timeout_seconds)).fetchone()[0]
+
+    def fail_timed_out(self):
+        """Mark jobs running for over timeout_seconds or queued for over queued_timeout_seconds as failed."""
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE status = ? AND started_at < ?',
+                (JOB_FAILED, now, f"Job did not finish within {self.timeout_seconds} seconds",
+                 JOB_RUNNING, now - self.timeout_seconds))
+            connection.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE status = ? AND created_at < ?',
+                (JOB_FAILED, now, f"Job did not start within {self.queued_timeout_seconds} seconds",
+                 JOB_QUEUED, now - self.queued_timeout_seconds))
+
+    def purge_expired(self):
+        """Fail timed out jobs, then remove finished jobs (and their files) older than max_age_seconds."""
+        self.fail_timed_out()
+        cutoff = time.time() - self.max_age_seconds
+        with self._connect() as connection:
+            expired = [row['id'] for row in connection.execute(
+                'SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?', (JOB_DONE, JOB_FAILED, cutoff))]
+            connection.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in expired])
+        for job_id in expired:
+            shutil.rmtree(self.package_folder(job_id), ignore_errors=True)
+            try:
+                os.remove(self.results_path(job_id))
+            except OSError:
+                pass
+
+
+class JobRunner:
+    """Runs jobs on a process pool of max_workers, created on first use (after gunicorn forks)."""
+
+    def __init__(self, job_store: JobStore, max_workers: int = 1, max_pending: int = 20,
+                 result_cache_settings: Dict[str, Any] = None, part_cache_max_bytes: int = None):
+        self.job_store = job_store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_cache_settings = result_cache_settings
+        self.part_cache_max_bytes = part_cache_max_bytes
+        self._executor: ProcessPoolExecutor = None
+        self._lock = threading.Lock()
+
+    def is_full(self) -> bool:
+        """True if max_pending jobs are already queued or running on this machine."""
+        return self.job_store.count_pending() >= self.max_pending
+
+    def submit(self, job_id: str):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_pool_process)
+            future = self._executor.submit(
+                run_job, self.job_store.jobs_folder, self.job_store.max_age_seconds, job_id,
+                self.result_cache_settings, self.part_cache_max_bytes)
+        future.add_done_callback(lambda done: self._on_done(job_id, done))
+
+    def _on_done(self, job_id: str, future):
+        # run_job records its own failures, this catches a job process that died
+        error = future.exception()
+        if error is None:
+            return
+        logger.error(f"Job {job_id} did not finish: {error}")
+        self.job_store.mark_failed(job_id, str(error) or type(error).__name__)
+        if isinstance(error, BrokenProcessPool):
+            # A pool process was killed, start a new pool for the next job
+            with self._lock:
+                self._executor = None
+
+
+def job_to_json(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job record as returned by the jobs endpoints."""
+    def to_iso(timestamp: Optional[float]) -> Optional[str]:
+        return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'source_type': job['source_type'],
+        'created_at': to_iso(job['created_at']),
+        'started_at': to_iso(job['started_at']),
+        'finished_at': to_iso(job['finished_at']),
+        'error': job['error']
+    }
+
+
+# Parsed IDML parts kept across the packages checked by one pool process
+_part_cache = None
+
+
+def check_package(package_path: str, results_file: BinaryIO, source_type: str, package_sha256: str = None,
+                  result_cache_settings: Dict[str, Any] = None, part_cache_max_bytes: int = None) -> Dict[str, int]:
+    """Run the checker on a package in this (pool) process, like /run does in the request.
+
+    Writes the results JSON, analytics included, to results_file and returns the
+    total_errors / total_warnings / total_infos counts of the results.
+    """
+    global _part_cache
+    from src.classes.FrontifyChecker import FrontifyChecker
+    from src.classes.PartCache import PartCache
+    from .analytics import extract_validation_counts
+    from .result_cache import ResultCache, build_cache_key
+    from .utils import finish_check
+
+    checker = FrontifyChecker()
+    # Results only, so the IDML can be read straight from the package ZIP
+    checker.set_in_archive_mode(True)
+    # The pool is the parallelism, one process per package
+    checker.set_parse_workers(1)
+    try:
+        start_time = time.time()
+        file_size_bytes = os.path.getsize(package_path)
+
+        result_cache = ResultCache(**result_cache_settings) if result_cache_settings and package_sha256 else None
+        cache_key = build_cache_key(package_sha256) if result_cache else None
+        checker_json = result_cache.get(cache_key) if result_cache else None
+
+        # Also names the template of a cache hit
+        checker.set_source_file_path(package_path)
+        if checker_json is None:
+            if part_cache_max_bytes and _part_cache is None:
+                _part_cache = PartCache(part_cache_max_bytes)
+            checker.set_part_cache(_part_cache)
+            checker.run_state_machine()
+            counts = extract_validation_counts(checker.results.get_analytics_results_json())
+        else:
+            counts = extract_validation_counts(checker_json)
+
+        results_chunks, cache_entry = finish_check(
+            checker, checker_json, start_time, source_type, file_size_bytes, result_cache, cache_key)
+        try:
+            for chunk in results_chunks:
+                results_file.write(chunk)
+        except BaseException:
+            if cache_entry:
+                cache_entry.discard()
+            raise
+        if cache_entry:
+            cache_entry.commit()
+        return counts
+    finally:
+        checker.delete_unzipped_root_path()
+
+
+def run_job(jobs_folder: str, max_age_seconds: int, job_id: str,
+            result_cache_settings: Dict[str, Any] = None, part_cache_max_bytes: int = None):
+    """Run a job in a pool process and write its results JSON to the job store."""
+    job_store = JobStore(jobs_folder, max_age_seconds)
+    job = job_store.get(job_id)
+    # Purged, or failed by the timeout while it was queued
+    if job is None or not job_store.mark_running(job_id):
+        return
+
+    results_path = job_store.results_path(job_id)
+    # Write to a temp name first so GET /jobs/<id> never reads partial results
+    temp_path = f"{results_path}.{uuid.uuid4()}.tmp"
+    try:
+        with open(temp_path, 'wb') as results_file:
+            check_package(job_store.package_path(job_id, job['package_name']), results_file, job['source_type'],
+                          job['package_sha256'], result_cache_settings, part_cache_max_bytes)
+        os.replace(temp_path, results_path)
+        if not job_store.mark_done(job_id):
+            # Failed by the timeout meanwhile, it stays failed
+            os.remove(results_path)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        job_store.mark_failed(job_id, str(e))
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    finally:
+        shutil.rmtree(job_store.package_folder(job_id), ignore_errors=True)
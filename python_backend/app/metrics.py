@@ -0,0 +1,192 @@
+"""
+Prometheus metrics, served by GET /metrics.
+
+Request latency per route, requests in progress, check latency by package
+size, the time of every check stage (see StageTimings), upload and
+uncompressed package sizes, result and part cache hits and the memory of
+every worker.
+
+With PROMETHEUS_MULTIPROC_DIR set (see the Dockerfile), every gunicorn worker
+and job / batch pool process writes its metrics to files in that folder and
+/metrics adds them up, so it does not matter which worker is scraped.
+gunicorn.conf.py empties the folder when the server starts and drops the
+gauges of workers that exit, init_pool_process those of pool processes that
+exit. Gauges are only set by the workers themselves (init_metrics), pool
+processes record histograms and counters only. Without prometheus_client
+nothing is recorded.
+"""
+import os
+import time
+import zipfile
+import resource
+import threading
+import multiprocessing.util
+from typing import Optional, Tuple
+from flask import Flask, Response, g, request
+
+try:
+    from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+                                   CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+except ImportError:
+    Histogram = None
+
+# Latency of checks is recorded by package size class, for p95/p99 by template size
+PACKAGE_SIZE_CLASSES: Tuple[Tuple[int, str], ...] = (
+    (1024 * 1024, '0-1MB'),
+    (10 * 1024 * 1024, '1-10MB'),
+    (50 * 1024 * 1024, '10-50MB'),
+    (100 * 1024 * 1024, '50-100MB'),
+)
+LARGEST_PACKAGE_SIZE_CLASS = '100MB+'
+
+MB = 1024 * 1024
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PACKAGE_BYTES_BUCKETS = (100 * 1024, MB, 5 * MB, 10 * MB, 25 * MB, 50 * MB, 100 * MB, 200 * MB, 300 * MB)
+UNCOMPRESSED_BYTES_BUCKETS = (MB, 10 * MB, 50 * MB, 100 * MB, 250 * MB, 500 * MB, 1024 * MB, 2048 * MB)
+MEMORY_BUCKETS = (16 * MB, 32 * MB, 64 * MB, 128 * MB, 256 * MB, 512 * MB, 1024 * MB, 2048 * MB)
+
+if Histogram is not None:
+    REQUEST_DURATION = Histogram(
+        'http_request_duration_seconds', 'Request latency until the response body is sent',
+        ['route', 'method', 'status'], buckets=REQUEST_BUCKETS)
+    REQUESTS_IN_PROGRESS = Gauge(
+        'http_requests_in_progress', 'Requests being handled', ['route'], multiprocess_mode='livesum')
+    CHECK_DURATION = Histogram(
+        'check_duration_seconds', 'Check latency (duration_ms of the results) by package size',
+        ['size_class', 'cache_hit'], buckets=REQUEST_BUCKETS)
+    STAGE_DURATION = Histogram(
+        'check_stage_duration_seconds', 'Wall time of a check stage (state, parser or check)',
+        ['stage'], buckets=STAGE_BUCKETS)
+    STAGE_CPU = Histogram(
+        'check_stage_cpu_seconds', 'CPU time of a check stage (state, parser or check)',
+        ['stage'], buckets=STAGE_BUCKETS)
+    CHECK_PEAK_MEMORY = Histogram(
+        'check_peak_memory_bytes', 'tracemalloc peak of a check (only with TRACE_MEMORY)',
+        buckets=MEMORY_BUCKETS)
+    PACKAGE_BYTES = Histogram(
+        'check_package_bytes', 'Size of the uploaded package', buckets=PACKAGE_BYTES_BUCKETS)
+    UNCOMPRESSED_BYTES = Histogram(
+        'check_package_uncompressed_bytes', 'Size of the package contents (checked packages only)',
+        buckets=UNCOMPRESSED_BYTES_BUCKETS)
+    RESULT_CACHE_REQUESTS = Counter(
+        'result_cache_requests', 'Result cache lookups', ['result'])
+    PART_CACHE_REQUESTS = Counter(
+        'part_cache_requests', 'Parsed IDML part cache lookups', ['result'])
+    WORKER_MEMORY = Gauge(
+        'worker_resident_memory_bytes', 'Resident memory of the worker after its last request',
+        multiprocess_mode='liveall')
+
+# Part cache hits / misses already counted, by part cache (they count since the worker started)
+_part_cache_counted = {}
+_part_cache_lock = threading.Lock()
+
+
+def package_size_class(file_size_bytes: int) -> str:
+    for max_bytes, size_class in PACKAGE_SIZE_CLASSES:
+        if file_size_bytes < max_bytes:
+            return size_class
+    return LARGEST_PACKAGE_SIZE_CLASS
+
+
+def uncompressed_package_bytes(package_path: str) -> Optional[int]:
+    """Total size of the members of the package ZIP (from its directory, nothing is unzipped)."""
+    try:
+        with zipfile.ZipFile(package_path) as zip_ref:
+            return sum(member.file_size for member in zip_ref.infolist())
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+def resident_memory_bytes() -> int:
+    """Current resident memory of this process, or its peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def observe_check(checker, cache_hit: bool, duration_ms: int, file_size_bytes: int, result_cache_used: bool):
+    """Record a finished check (called by finish_check, in workers and pool processes)."""
+    if Histogram is None:
+        return
+    CHECK_DURATION.labels(package_size_class(file_size_bytes), str(cache_hit).lower()).observe(duration_ms / 1000)
+    PACKAGE_BYTES.observe(file_size_bytes)
+    if result_cache_used:
+        RESULT_CACHE_REQUESTS.labels('hit' if cache_hit else 'miss').inc()
+    if cache_hit:
+        return
+
+    stage_timings = checker.stage_timings.to_json()
+    for stage, timings in stage_timings['stages'].items():
+        STAGE_DURATION.labels(stage).observe(timings['wall_ms'] / 1000)
+        STAGE_CPU.labels(stage).observe(timings['cpu_ms'] / 1000)
+    if 'peak_memory_bytes' in stage_timings:
+        CHECK_PEAK_MEMORY.observe(stage_timings['peak_memory_bytes'])
+    uncompressed_bytes = uncompressed_package_bytes(checker.source_file_path) if checker.source_file_path else None
+    if uncompressed_bytes is not None:
+        UNCOMPRESSED_BYTES.observe(uncompressed_bytes)
+
+    part_cache = checker.part_cache
+    if part_cache is not None:
+        with _part_cache_lock:
+            counted_hits, counted_misses = _part_cache_counted.get(id(part_cache), (0, 0))
+            hits, misses = part_cache.hits, part_cache.misses
+            _part_cache_counted[id(part_cache)] = (hits, misses)
+        PART_CACHE_REQUESTS.labels('hit').inc(max(0, hits - counted_hits))
+        PART_CACHE_REQUESTS.labels('miss').inc(max(0, misses - counted_misses))
+
+
+def _mark_pool_process_dead(pid: int):
+    multiprocess.mark_process_dead(pid)
+
+
+def init_pool_process():
+    """ProcessPoolExecutor initializer: drop the live gauges of the pool process when it exits.
+
+    Pool processes end through multiprocessing, which skips atexit, so this is a
+    multiprocessing finalizer. Like gunicorn's child_exit, it cannot run for a killed process.
+    """
+    if Histogram is None or not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    multiprocessing.util.Finalize(None, _mark_pool_process_dead, args=(os.getpid(),), exitpriority=0)
+
+
+def init_metrics(app: Flask):
+    """Record the latency of every request of app, until its (streamed) body has been sent."""
+    if Histogram is None:
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(g.metrics_route).inc()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        if 'metrics_route' not in g:
+            return response
+        route, start, method, status = g.metrics_route, g.metrics_start, request.method, str(response.status_code)
+
+        def on_close():
+            REQUEST_DURATION.labels(route, method, status).observe(time.perf_counter() - start)
+            REQUESTS_IN_PROGRESS.labels(route).dec()
+            WORKER_MEMORY.set(resident_memory_bytes())
+
+        response.call_on_close(on_close)
+        return response
+
+
+def metrics_response() -> Response:
+    """The metrics of all processes in the Prometheus text format."""
+    if Histogram is None:
+        return Response('prometheus_client is not installed\n', status=501, mimetype='text/plain')
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of checker results.
+
+Results are keyed by the SHA-256 of the uploaded package plus the checker
+version, so re-submitting the same ZIP skips the whole state machine. Entries
+are kept in a small in-memory LRU (per worker) and in an on-disk folder that
+is shared by all workers on the machine.
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the checker changes its results, so old entries are not served
+CHECKER_VERSION = '2'
+
+# Chunk size used when hashing/copying uploads
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def new_package_hasher():
+    """Return the hash object used to key packages."""
+    return hashlib.sha256()
+
+
+def build_cache_key(package_sha256: str) -> str:
+    """Build the cache key for a package hash."""
+    return f"{package_sha256}-v{CHECKER_VERSION}"
+
+
+class ResultCache:
+    """Bounded in-memory and on-disk LRU of formatted results JSON."""
+
+    def __init__(self, cache_folder: str,
+                 max_disk_bytes: int = 256 * 1024 * 1024,
+                 max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_age_seconds: int = 7 * 24 * 60 * 60):
+        self.cache_folder = cache_folder
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_age_seconds = max_age_seconds
+        # key -> (serialized results, stored at)
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_folder, f"{key}.json")
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.max_age_seconds
+
+    def _remember(self, key: str, payload: bytes, stored_at: float):
+        """Add an entry to the in-memory LRU and evict the oldest entries past the size limit."""
+        if len(payload) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key)[0])
+        self._memory[key] = (payload, stored_at)
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (evicted_payload, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted_payload)
+
+    def _forget(self, key: str):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key)[0])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached results JSON for key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                payload, stored_at = entry
+                if not self._is_expired(stored_at):
+                    self._memory.move_to_end(key)
+                    return json.loads(payload)
+                self._forget(key)
+
+        entry_path = self._entry_path(key)
+        try:
+            stored_at = os.path.getmtime(entry_path)
+            if self._is_expired(stored_at):
+                os.remove(entry_path)
+                return None
+            with open(entry_path, 'rb') as entry_file:
+                payload = entry_file.read()
+            # Touch the entry so disk eviction is least-recently-used
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read result cache entry {key}: {e}")
+            return None
+
+        with self._lock:
+            self._remember(key, payload, stored_at)
+        return json.loads(payload)
+
+    def set(self, key: str, results_json: Dict[str, Any]):
+        """Store results JSON for key in memory and on disk."""
+        payload = json.dumps(results_json).encode('utf-8')
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, payload, stored_at)
+
+        entry = self.open_entry(key)
+        entry.write(payload)
+        entry.commit()
+
+    def open_entry(self, key: str) -> 'ResultCacheEntry':
+        """Start writing the entry for key chunk by chunk, e.g. while it is streamed to the client."""
+        return ResultCacheEntry(self, key)
+
+    def _commit_entry(self, key: str, temp_path: str, payload: Optional[bytes]):
+        """Publish a written temp file as the entry for key."""
+        try:
+            os.replace(temp_path, self._entry_path(key))
+        except Exception as e:
+            logger.warning(f"Failed to write result cache entry {key}: {e}")
+            self._remove_file(temp_path)
+            return
+        if payload is not None:
+            with self._lock:
+                self._remember(key, payload, time.time())
+        self.evict()
+
+    def evict(self):
+        """Remove expired disk entries, then the least recently used ones past the size limit."""
+        entries = []
+        now = time.time()
+        for file_name in os.listdir(self.cache_folder):
+            if not file_name.endswith('.json'):
+                continue
+            entry_path = os.path.join(self.cache_folder, file_name)
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                self._remove_file(entry_path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            self._remove_file(entry_path)
+            total_bytes -= size
+
+    def _remove_file(self, entry_path: str):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+
+class ResultCacheEntry:
+    """A result cache entry being written in chunks.
+
+    Chunks go to a temp file (created on the first write), so other workers never read
+    a partial entry, and are only kept in memory while they fit in the cache's in-memory
+    limit. Nothing is cached unless commit() is called; discard() drops the entry.
+    """
+
+    def __init__(self, cache: ResultCache, key: str):
+        self.cache = cache
+        self.key = key
+        self.temp_path = f"{cache._entry_path(key)}.{uuid.uuid4()}.tmp"
+        self._chunks: Optional[list] = []
+        self._size = 0
+        self._file = None
+        self._closed = False
+
+    def write(self, chunk: bytes):
+        if self._closed:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.temp_path, 'wb')
+            self._file.write(chunk)
+        except Exception as e:
+            logger.warning(f"Failed to write result cache entry {self.key}: {e}")
+            self.discard()
+            return
+        self._size += len(chunk)
+        if self._chunks is not None:
+            if self._size > self.cache.max_memory_bytes:
+                self._chunks = None
+            else:
+                self._chunks.append(chunk)
+
+    def commit(self):
+        if self._closed or self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self._closed = True
+        payload = b''.join(self._chunks) if self._chunks is not None else None
+        self.cache._commit_entry(self.key, self.temp_path, payload)
+
+    def discard(self):
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.cache._remove_file(self.temp_path)
@@ -1,9 +1,15 @@
 import os
+import time
+import shutil
 from functools import wraps
-from flask import Blueprint, jsonify, send_file, after_this_request, request, current_app, Response
+from flask import Blueprint, jsonify, send_file, after_this_request, request, current_app, Response, stream_with_context
 from src.classes.FrontifyChecker import FrontifyChecker
-from .utils import upload_file, start_check, checker_cleanup, download_file_from_url
+from .utils import new_workspace, upload_file, start_check, stream_check, checker_cleanup, download_file_from_url
 from .analytics_api import get_analytics_summary, get_runs
+from .jobs import JOB_DONE, RESULTS_CHUNK_SIZE, job_to_json
+from .batch import collect_batch_packages
+from .metrics import metrics_response
+from src.error_handling.ErrorHandling import encode_json
 
 main = Blueprint('main', __name__)
 
@@ -55,33 +61,67 @@ def test_cors():
 @require_auth
 def run_checker():
     """Endpoint to run the checker and return results."""
+    workspace = new_workspace()
     checker = FrontifyChecker()
+    checker.set_workspace_folder(workspace.path)
+    # Results only, so the IDML can be read straight from the uploaded ZIP
+    checker.set_in_archive_mode(True)
     try:
         # Get source type from header, default to 'api'
         source_type = request.headers.get('X-Source', 'api')
 
-        upload_result = upload_file()
+        upload_result = upload_file(workspace)
         if upload_result['status'] != 'success':
             return jsonify(upload_result['error']), 400
 
         upload_path = upload_result['path']
-        results, status_code = start_check(checker, upload_path, source_type)
+        results, status_code = start_check(
+            checker, upload_path, source_type, upload_result['sha256'])
         return results, status_code
     finally:
-        checker_cleanup(checker)
+        checker_cleanup(checker, workspace)
+
+
+@main.route('/run-stream', methods=['POST'])
+@require_auth
+def run_checker_stream():
+    """Endpoint to run the checker and stream its progress and results as NDJSON."""
+    workspace = new_workspace()
+    checker = FrontifyChecker()
+    checker.set_workspace_folder(workspace.path)
+    # Results only, so the IDML can be read straight from the uploaded ZIP
+    checker.set_in_archive_mode(True)
+    try:
+        # Get source type from header, default to 'api'
+        source_type = request.headers.get('X-Source', 'api')
+
+        upload_result = upload_file(workspace)
+        if upload_result['status'] != 'success':
+            checker_cleanup(checker, workspace)
+            return jsonify(upload_result['error']), 400
+
+        # The stream cleans up once it is done
+        return stream_check(checker, upload_result['path'], source_type, upload_result['sha256'],
+                            on_close=lambda: checker_cleanup(checker, workspace))
+    except Exception as e:
+        checker_cleanup(checker, workspace)
+        return jsonify({'error': 'An error occurred during the check.', 'details': str(e)}), 500
 
 
 @main.route('/run-and-download-xml', methods=['POST'])
 @require_auth
 def run_checker_and_download():
     """Endpoint to run the checker and download the resulting ZIP file."""
+    workspace = new_workspace()
     checker = FrontifyChecker()
+    # The ZIP is created in the workspace too
+    checker.set_workspace_folder(workspace.path)
     zip_file_path = None
     try:
         # Get source type from header, default to 'api'
         source_type = request.headers.get('X-Source', 'api')
 
-        upload_result = upload_file()
+        upload_result = upload_file(workspace)
         if upload_result['status'] != 'success':
             return jsonify(upload_result['error']), 400
 
@@ -102,21 +142,10 @@ def run_checker_and_download():
 
         print(f"ZIP FILE PATH: {zip_file_path}, EXISTS: {os.path.exists(zip_file_path)}, SIZE: {os.path.getsize(zip_file_path) if os.path.exists(zip_file_path) else 0}")
 
-        # Store zip_file_path in a way that cleanup function can access it
-        # Using closure to capture zip_file_path
-        zip_path_for_cleanup = zip_file_path
-
         @after_this_request
         def cleanup(response):
-            # Cleanup checker resources (unzipped files, uploaded files)
-            checker_cleanup(checker)
-            # Also cleanup the ZIP file from temp directory after response is sent
-            if zip_path_for_cleanup and os.path.exists(zip_path_for_cleanup):
-                try:
-                    os.remove(zip_path_for_cleanup)
-                    print(f"Cleaned up ZIP file: {zip_path_for_cleanup}")
-                except Exception as e:
-                    print(f'Failed to delete ZIP file {zip_path_for_cleanup}. Reason: {e}')
+            # Cleanup the whole workspace (uploaded file, unzipped files, ZIP file) after response is sent
+            checker_cleanup(checker, workspace)
             return response
 
         try:
@@ -128,29 +157,27 @@ def run_checker_and_download():
             )
         except Exception as e:
             print(f"Error sending file: {e}")
-            # Cleanup ZIP file on exception (before @after_this_request runs)
-            if zip_file_path and os.path.exists(zip_file_path):
-                try:
-                    os.remove(zip_file_path)
-                    print(f"Cleaned up ZIP file in exception handler: {zip_file_path}")
-                except Exception as e2:
-                    print(f'Failed to delete ZIP file in exception handler: {e2}')
             return jsonify({'error': 'Failed to send the ZIP file', 'details': str(e)}), 500
     finally:
-        # Always cleanup checker resources (unzipped files, uploaded files)
-        # This handles early returns where @after_this_request never runs
-        checker_cleanup(checker)
-        # Note: We DON'T delete zip_file_path here because:
-        # 1. @after_this_request handles cleanup after successful file send
-        # 2. Exception handler handles cleanup if send_file fails
-        # 3. If we delete here, it happens BEFORE send_file finishes streaming, causing failures
+        if zip_file_path:
+            # Note: We DON'T remove the workspace here because the ZIP is in it:
+            # if we delete here, it happens BEFORE send_file finishes streaming, causing failures.
+            # @after_this_request removes it once the response is sent
+            checker.delete_unzipped_root_path()
+        else:
+            # Early returns, where @after_this_request never runs
+            checker_cleanup(checker, workspace)
 
 
 @main.route('/run-from-url', methods=['POST'])
 @require_auth
 def run_checker_from_url():
     """Endpoint to download a ZIP file from a URL and run the checker on it."""
+    workspace = new_workspace()
     checker = FrontifyChecker()
+    checker.set_workspace_folder(workspace.path)
+    # Results only, so the IDML can be read straight from the downloaded ZIP
+    checker.set_in_archive_mode(True)
     try:
         # Get source type from header, default to 'api'
         source_type = request.headers.get('X-Source', 'api')
@@ -169,17 +196,151 @@ def run_checker_from_url():
         max_size_bytes = 300 * 1024 * 1024  # 300MB
 
         # Download the file from URL
-        download_result = download_file_from_url(download_url, max_size_bytes)
+        download_result = download_file_from_url(download_url, workspace, max_size_bytes)
         if download_result['status'] != 'success':
             return jsonify(download_result['error']), 400
 
         download_path = download_result['path']
 
         # Run the checker on the downloaded file
-        results, status_code = start_check(checker, download_path, source_type)
+        results, status_code = start_check(
+            checker, download_path, source_type, download_result['sha256'])
         return results, status_code
     finally:
-        checker_cleanup(checker)
+        checker_cleanup(checker, workspace)
+
+
+@main.route('/run-batch', methods=['POST'])
+@require_auth
+def run_checker_batch():
+    """Endpoint to check several templates, uploaded as 'files' ZIPs or as one ZIP of ZIPs.
+
+    Streams {"type": "data", "content": {"templates": [...], "summary": {...}}}, with each
+    template's results (same as /run) added as soon as it finishes. The optional
+    'concurrency' form field limits how many templates are checked at a time.
+    At most BATCH_MAX_TEMPLATES templates are accepted, and those not checked within
+    BATCH_TIMEOUT_SECONDS (below gunicorn's --timeout) are returned as failed.
+    """
+    batch_runner = current_app.extensions['batch_runner']
+    max_workers = current_app.config['BATCH_WORKERS']
+    concurrency = min(max(request.form.get('concurrency', max_workers, type=int), 1), max_workers)
+    time_limit_seconds = current_app.config['BATCH_TIMEOUT_SECONDS']
+    # Get source type from header, default to 'api'
+    source_type = request.headers.get('X-Source', 'api')
+
+    workspace = new_workspace()
+    try:
+        packages = collect_batch_packages(
+            request.files.getlist('files') + request.files.getlist('file'), workspace,
+            current_app.config['BATCH_MAX_TEMPLATES'])
+    except ValueError as e:
+        workspace.cleanup()
+        return jsonify({'error': {'message': str(e)}}), 400
+    except Exception as e:
+        workspace.cleanup()
+        return jsonify({'error': {'message': 'An error occurred during processing.', 'details': str(e)}}), 400
+
+    def generate():
+        start_time = time.time()
+        summary = {'templates': len(packages), 'done': 0, 'failed': 0,
+                   'total_errors': 0, 'total_warnings': 0, 'total_infos': 0}
+        try:
+            yield b'{"type":"data","content":{"templates":['
+            separator = b''
+            for package, results_json, counts, error in batch_runner.run(packages, source_type, concurrency, time_limit_seconds):
+                if error is None:
+                    summary['done'] += 1
+                    for count_key, count in counts.items():
+                        summary[count_key] += count
+                    yield separator + b'{"template":' + encode_json(package.file_name) + \
+                        b',"status":"done","results":' + results_json + b'}'
+                else:
+                    summary['failed'] += 1
+                    yield separator + encode_json({'template': package.file_name, 'status': 'failed',
+                                                   'error': error})
+                separator = b','
+            summary['duration_ms'] = int((time.time() - start_time) * 1000)
+            yield b'],"summary":' + encode_json(summary) + b'}}'
+        finally:
+            workspace.cleanup()
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+@main.route('/jobs', methods=['POST'])
+@require_auth
+def create_job():
+    """Endpoint to queue a check job, for an uploaded file or a JSON downloadUrl. Returns the job at once."""
+    job_store = current_app.extensions['job_store']
+    job_runner = current_app.extensions['job_runner']
+    job_store.purge_expired()
+    if job_runner.is_full():
+        response = jsonify({'error': {'message': 'Too many jobs queued, try again later'}})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    # Get source type from header, default to 'api'
+    source_type = request.headers.get('X-Source', 'api')
+
+    workspace = new_workspace()
+    try:
+        if request.is_json:
+            data = request.get_json()
+            if not data or 'downloadUrl' not in data:
+                return jsonify({'error': {'message': 'downloadUrl is required'}}), 400
+            # Fixed max size of 300MB (matching upload limit and preventing abuse)
+            package_result = download_file_from_url(data['downloadUrl'], workspace, 300 * 1024 * 1024)
+        else:
+            package_result = upload_file(workspace)
+        if package_result['status'] != 'success':
+            return jsonify(package_result['error']), 400
+
+        package_name = os.path.basename(package_result['path'])
+        job_id = job_store.create(source_type, package_name, package_result['sha256'])
+        try:
+            # Out of the request's workspace, which is removed when the request is done
+            shutil.move(package_result['path'], job_store.package_path(job_id, package_name))
+            job_runner.submit(job_id)
+        except Exception as e:
+            job_store.mark_failed(job_id, str(e))
+            return jsonify({'error': 'Failed to queue the job.', 'details': str(e)}), 500
+    finally:
+        workspace.cleanup()
+
+    response = jsonify({'type': 'job', 'content': {'job': job_to_json(job_store.get(job_id))}})
+    response.headers['Location'] = f"/jobs/{job_id}"
+    return response, 202
+
+
+@main.route('/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_job(job_id):
+    """Endpoint to get a job's status, and its results (same as /run) once it is done."""
+    job_store = current_app.extensions['job_store']
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': {'message': 'Job not found'}}), 404
+
+    job_json = job_to_json(job)
+    if job['status'] != JOB_DONE:
+        return jsonify({'type': 'job', 'content': {'job': job_json}}), 200
+
+    try:
+        results_file = open(job_store.results_path(job_id), 'rb')
+    except FileNotFoundError:
+        return jsonify({'error': {'message': 'Job results expired'}}), 404
+
+    def generate():
+        with results_file:
+            yield b'{"type":"data","content":{"job":' + encode_json(job_json) + b',"results":'
+            while True:
+                chunk = results_file.read(RESULTS_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            yield b'}}'
+
+    return Response(generate(), mimetype='application/json'), 200
 
 
 @main.route('/analytics/summary', methods=['GET'])
@@ -201,12 +362,20 @@ def analytics_summary():
 @main.route('/analytics/runs', methods=['GET'])
 @require_auth
 def analytics_runs():
-    """Endpoint to get paginated list of runs."""
+    """Endpoint to get a page of runs, newest first.
+
+    Pass the next_cursor of a page as cursor to get the next one. count=estimated
+    adds the approximate number of runs as total.
+    """
     try:
         limit = request.args.get('limit', 100, type=int)
-        offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
+        include_count = request.args.get('count') == 'estimated'
 
-        runs_data = get_runs(limit=limit, offset=offset)
+        try:
+            runs_data = get_runs(limit=limit, cursor=cursor, include_count=include_count)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         if 'error' in runs_data:
             return jsonify(runs_data), 500
@@ -216,6 +385,13 @@ def analytics_runs():
         return jsonify({'error': str(e)}), 500
 
 
+@main.route('/metrics', methods=['GET'])
+@require_auth
+def metrics():
+    """Prometheus metrics of all workers (request and check latency, stage timings, sizes, caches, memory)."""
+    return metrics_response()
+
+
 @main.route('/api/extension-token', methods=['GET'])
 def get_extension_token():
     """Get AUTH_TOKEN for extension use."""
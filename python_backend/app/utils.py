@@ -1,15 +1,25 @@
 import os
-import shutil
+import queue
+import threading
 import time
 import urllib.request
 import urllib.error
-from flask import request, current_app, jsonify
+from flask import request, current_app, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
-from .analytics import log_analytics_to_supabase
+from src.error_handling.ErrorHandling import encode_json
+from .analytics import queue_analytics
+from .metrics import observe_check
+from .workspace import Workspace
+from .result_cache import new_package_hasher, build_cache_key, HASH_CHUNK_SIZE
 
 
-def upload_file():
-    """Handle file upload and return the file path or an error."""
+def new_workspace() -> Workspace:
+    """Create the workspace folder of the current request."""
+    return Workspace(current_app.config['UPLOAD_FOLDER'])
+
+
+def upload_file(workspace: Workspace):
+    """Handle file upload into the request's workspace and return the file path or an error."""
     try:
         if 'file' not in request.files:
             return {'status': 'error', 'error': {'message': 'No file part'}}
@@ -18,16 +28,30 @@ def upload_file():
             return {'status': 'error', 'error': {'message': 'No selected file'}}
 
         filename = secure_filename(file.filename)
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
-
-        return {'status': 'success', 'path': save_path}
+        save_path = workspace.file_path(filename)
+
+        # Hash the upload while it is written so the result cache needs no second read
+        hasher = new_package_hasher()
+        with open(save_path, 'wb') as out_file:
+            while True:
+                chunk = file.stream.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                out_file.write(chunk)
+
+        return {'status': 'success', 'path': save_path, 'sha256': hasher.hexdigest()}
     except Exception as e:
         return {'status': 'error', 'error': {'message': 'An error occurred during processing.', 'details': str(e)}}
 
 
-def start_check(checker, file_path: str, source_type: str = 'api'):
-    """Run the checker on the uploaded file and return the results."""
+def start_check(checker, file_path: str, source_type: str = 'api', package_sha256: str = None):
+    """Run the checker on the uploaded file and return the results.
+
+    The results JSON is streamed to the client (and into the result cache) as it is
+    serialized, instead of being built as one dict and encoded in one go.
+    If package_sha256 is given, results are served from / stored in the result cache.
+    """
     try:
         # Track start time for duration calculation
         start_time = time.time()
@@ -35,53 +59,190 @@ def start_check(checker, file_path: str, source_type: str = 'api'):
         # Get file size
         file_size_bytes = os.path.getsize(file_path) if os.path.exists(file_path) else 0
 
-        checker.set_source_file_path(file_path)
-        checker.run_state_machine()
+        result_cache = current_app.extensions.get('result_cache') if package_sha256 else None
+        cache_key = build_cache_key(package_sha256) if package_sha256 else None
+        checker_json = result_cache.get(cache_key) if result_cache else None
+        cache_hit = checker_json is not None
 
-        # Calculate duration in milliseconds
-        end_time = time.time()
-        duration_ms = int((end_time - start_time) * 1000)
+        # Also names the template of a cache hit
+        checker.set_source_file_path(file_path)
+        if not cache_hit:
+            checker.set_part_cache(current_app.extensions.get('part_cache'))
+            checker.set_trace_memory(current_app.config.get('TRACE_MEMORY', False))
+            checker.run_state_machine()
+
+        results_chunks, cache_entry = finish_check(
+            checker, checker_json, start_time, source_type, file_size_bytes, result_cache, cache_key)
+        response = Response(
+            _wrap_chunks(b'{"type":"data","content":{"results":', results_chunks, b'}}', cache_entry),
+            mimetype='application/json')
+        if result_cache:
+            response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': 'An error occurred during the check.', 'details': str(e)}), 500
 
-        checker_json = checker.results.get_formatted_results_json()
 
-        # Add analytics data to results
-        checker_json['analytics'] = {
-            'duration_ms': duration_ms,
-            'source_type': source_type,
-            'file_size_bytes': file_size_bytes
-        }
+def stream_check(checker, file_path: str, source_type: str = 'api', package_sha256: str = None,
+                 on_close=None):
+    """Run the checker on the uploaded file and stream its progress as NDJSON.
 
-        # Log analytics to Supabase (non-blocking - don't fail validation if this fails)
+    One JSON event per line:
+      {"event": "stage_started", "stage": ...}
+      {"event": "stage_finished", "stage": ..., "duration_ms": ..., "cpu_ms": ...}
+      {"event": "finding", "category": ..., "type": ..., "validationClassifier": ..., ...}
+      {"event": "result", "results": {...}}  same results as /run, last line on success
+      {"event": "error", "message": ..., "details": ...}  last line on failure
+    Checks run on the CheckScheduler report their findings once all checks have finished,
+    in chain order. on_close() is called once the stream is done.
+    """
+    start_time = time.time()
+    file_size_bytes = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    result_cache = current_app.extensions.get('result_cache') if package_sha256 else None
+    cache_key = build_cache_key(package_sha256) if package_sha256 else None
+    part_cache = current_app.extensions.get('part_cache')
+    trace_memory = current_app.config.get('TRACE_MEMORY', False)
+    # Progress events from the checker thread, then None when it is done or the exception it raised
+    events = queue.Queue()
+
+    def run_checker():
         try:
-            template_name = checker_json.get('template_name', 'Unknown')
-            log_analytics_to_supabase(
-                template_name=template_name,
-                source_type=source_type,
-                duration_ms=duration_ms,
-                file_size_bytes=file_size_bytes,
-                results_json=checker_json
-            )
+            checker.set_progress_listener(events.put)
+            checker.set_part_cache(part_cache)
+            checker.set_trace_memory(trace_memory)
+            checker.run_state_machine()
+            events.put(None)
         except Exception as e:
-            # Log error but don't fail the validation
-            print(f"Warning: Failed to log analytics to Supabase: {e}")
+            events.put(e)
 
-        result_json = {
-            "type": "data",
-            "content": {
-                "results": checker_json,
-            }
-        }
-        return jsonify(result_json), 200
+    # Also names the template of a cache hit
+    checker.set_source_file_path(file_path)
+
+    def generate():
+        checker_thread = None
+        try:
+            checker_json = result_cache.get(cache_key) if result_cache else None
+            if checker_json is None:
+                checker_thread = threading.Thread(target=run_checker, daemon=True)
+                checker_thread.start()
+                while True:
+                    event = events.get()
+                    if event is None:
+                        break
+                    if isinstance(event, Exception):
+                        yield encode_json({'event': 'error', 'message': 'An error occurred during the check.',
+                                           'details': str(event)}) + b'\n'
+                        return
+                    yield encode_json(event) + b'\n'
+
+            results_chunks, cache_entry = finish_check(
+                checker, checker_json, start_time, source_type, file_size_bytes, result_cache, cache_key)
+            yield from _wrap_chunks(b'{"event":"result","results":', results_chunks, b'}\n', cache_entry)
+        finally:
+            # The checker must be done with its files before they are cleaned up
+            if checker_thread is not None:
+                checker_thread.join()
+            if on_close:
+                on_close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def finish_check(checker, checker_json, start_time: float, source_type: str, file_size_bytes: int,
+                  result_cache=None, cache_key: str = None):
+    """Log analytics for a finished check and return its results JSON chunks with analytics added.
+
+    checker_json is the cached results JSON on a cache hit, None if checker just ran.
+    On a hit the template is named after checker's source file, like a run would name it:
+    the same package may have been uploaded under another name before.
+    Also returns the result cache entry the chunks are to be written to, if any.
+    """
+    cache_hit = checker_json is not None
+    if cache_hit:
+        if checker.source_file_path:
+            checker_json['template_name'] = os.path.basename(checker.source_file_path)
+        analytics_json = checker_json
+        results_chunks = [encode_json(checker_json)]
+    else:
+        analytics_json = checker.results.get_analytics_results_json()
+        results_chunks = checker.results.iter_formatted_results_json()
+
+    # Calculate duration in milliseconds
+    end_time = time.time()
+    duration_ms = int((end_time - start_time) * 1000)
+
+    # Analytics data added to results
+    analytics = {
+        'duration_ms': duration_ms,
+        'source_type': source_type,
+        'file_size_bytes': file_size_bytes,
+        'cache_hit': cache_hit
+    }
+    # Time (and memory) of every state, parser and check, if the checker ran
+    stage_timings = None
+    if not cache_hit:
+        stage_timings = checker.stage_timings.to_json()
+        analytics['stage_timings'] = stage_timings
+    observe_check(checker, cache_hit, duration_ms, file_size_bytes, result_cache is not None)
+
+    # Queue analytics for Supabase (sent in the background - don't fail validation if this fails)
+    try:
+        template_name = analytics_json.get('template_name', 'Unknown')
+        queue_analytics(
+            template_name=template_name,
+            source_type=source_type,
+            duration_ms=duration_ms,
+            file_size_bytes=file_size_bytes,
+            results_json=analytics_json,
+            stage_timings=stage_timings
+        )
     except Exception as e:
-        return jsonify({'error': 'An error occurred during the check.', 'details': str(e)}), 500
+        # Log error but don't fail the validation
+        print(f"Warning: Failed to queue analytics for Supabase: {e}")
+
+    cache_entry = result_cache.open_entry(cache_key) if result_cache and not cache_hit else None
+    return _add_analytics(results_chunks, analytics, cache_entry), cache_entry
 
 
-def download_file_from_url(download_url: str, max_size_bytes: int = 300 * 1024 * 1024) -> dict:
+def _add_analytics(results_chunks, analytics: dict, cache_entry=None):
+    """Yield the results JSON chunks with the analytics member added.
+
+    The results JSON ends with its closing '}', the analytics member is added right
+    before it. The chunks without analytics are written to cache_entry.
+    """
+    pending = b''
+    for chunk in results_chunks:
+        if pending:
+            if cache_entry:
+                cache_entry.write(pending)
+            yield pending
+        pending = chunk
+    if cache_entry:
+        cache_entry.write(pending)
+    yield pending[:-1] + b',"analytics":' + encode_json(analytics) + b'}'
+
+
+def _wrap_chunks(prefix: bytes, chunks, suffix: bytes, cache_entry=None):
+    """Yield prefix, chunks and suffix. cache_entry is only committed if all chunks were streamed."""
+    yield prefix
+    try:
+        yield from chunks
+    except BaseException:
+        if cache_entry:
+            cache_entry.discard()
+        raise
+    if cache_entry:
+        cache_entry.commit()
+    yield suffix
+
+
+def download_file_from_url(download_url: str, workspace: Workspace, max_size_bytes: int = 300 * 1024 * 1024) -> dict:
     """
     Download a file from a URL with size limit checking.
 
     Args:
         download_url: URL to download from
+        workspace: Request workspace the file is saved to
         max_size_bytes: Maximum file size in bytes (default: 300MB)
 
     Returns:
@@ -131,11 +292,12 @@ def download_file_from_url(download_url: str, max_size_bytes: int = 300 * 1024 *
             if not filename:
                 filename = 'downloaded_file.zip'
 
-            save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            save_path = workspace.file_path(filename)
 
-            # Download with size checking
+            # Download with size checking, hashing for the result cache as we go
             downloaded_size = 0
             chunk_size = 8192  # 8KB chunks
+            hasher = new_package_hasher()
 
             with open(save_path, 'wb') as out_file:
                 while True:
@@ -162,6 +324,7 @@ def download_file_from_url(download_url: str, max_size_bytes: int = 300 * 1024 *
                             }
                         }
 
+                    hasher.update(chunk)
                     out_file.write(chunk)
 
             # Verify downloaded file is a ZIP file by checking file extension and magic bytes
@@ -187,7 +350,7 @@ def download_file_from_url(download_url: str, max_size_bytes: int = 300 * 1024 *
                     pass
                 return {'status': 'error', 'error': {'message': f'Failed to validate ZIP file: {str(e)}'}}
 
-            return {'status': 'success', 'path': save_path}
+            return {'status': 'success', 'path': save_path, 'sha256': hasher.hexdigest()}
 
     except urllib.error.HTTPError as e:
         return {
@@ -220,15 +383,7 @@ def download_file_from_url(download_url: str, max_size_bytes: int = 300 * 1024 *
         }
 
 
-def checker_cleanup(checker):
-    """Cleanup the checker and remove uploaded files."""
+def checker_cleanup(checker, workspace: Workspace):
+    """Cleanup the checker and remove the request's workspace (upload, unzipped files, output ZIP)."""
     checker.delete_unzipped_root_path()
-    for file in os.listdir(current_app.config['UPLOAD_FOLDER']):
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print(f'Failed to delete {file_path}. Reason: {e}')
+    workspace.cleanup()
@@ -0,0 +1,76 @@
+"""
+Per-request workspaces.
+
+Every request gets its own folder under the workspaces root (UPLOAD_FOLDER)
+for its upload, the unzipped package and output ZIPs, and only that folder is
+removed when the request is done. Requests never see or delete each other's
+files, so several workers (or threaded workers) can run on one machine. A
+janitor thread removes the workspaces of requests that never cleaned up, e.g.
+because their worker was killed.
+"""
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Workspace:
+    """A folder of its own for one request."""
+
+    def __init__(self, root_folder: str):
+        self.path = os.path.join(root_folder, uuid.uuid4().hex)
+        os.makedirs(self.path)
+
+    def file_path(self, file_name: str) -> str:
+        return os.path.join(self.path, file_name)
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class WorkspaceJanitor:
+    """Removes workspaces older than max_age_seconds every interval_seconds, on a daemon thread."""
+
+    def __init__(self, root_folder: str, max_age_seconds: int = 60 * 60, interval_seconds: int = 10 * 60):
+        self.root_folder = root_folder
+        self.max_age_seconds = max_age_seconds
+        self.interval_seconds = interval_seconds
+        self._thread: threading.Thread = None
+
+    def sweep(self) -> int:
+        """Remove the orphaned workspaces now, returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - self.max_age_seconds
+        for entry_name in os.listdir(self.root_folder):
+            entry_path = os.path.join(self.root_folder, entry_name)
+            try:
+                if os.path.getmtime(entry_path) > cutoff:
+                    continue
+                if os.path.isdir(entry_path):
+                    shutil.rmtree(entry_path)
+                else:
+                    os.remove(entry_path)
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Failed to remove orphaned workspace {entry_path}: {e}")
+        return removed
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='workspace-janitor', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.info(f"Removed {removed} orphaned workspaces")
+            except Exception as e:
+                logger.warning(f"Workspace janitor failed: {e}")
@@ -0,0 +1,139 @@
+"""
+Check a tree of template packages from the command line, without the web server.
+
+Writes one JSON line per package ({"path", "status", "counts", "results"}, results
+as returned by /run) and exits non-zero for CI gating:
+  0  no package has findings at or above --fail-on
+  1  a package has findings at or above --fail-on
+  2  a package could not be checked (or bad arguments)
+
+Usage:
+  python batch_check.py templates/ --jobs 4 --fail-on error --output audit.jsonl
+  python batch_check.py templates/ --checks PAR_CHECK,KERNING_CHECK
+"""
+import os
+import sys
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.classes.CheckRegistry import CHECK_REGISTRY
+from src.classes.FrontifyChecker import FrontifyChecker
+from src.classes.States import States
+from src.error_handling.ErrorHandling import encode_json
+
+# --fail-on levels, each fails on its own findings and the more severe ones
+FAIL_ON_COUNTS: Dict[str, Tuple[str, ...]] = {
+    'error': ('errors',),
+    'warning': ('errors', 'warnings'),
+    'info': ('errors', 'warnings', 'infos'),
+    'never': (),
+}
+
+EXIT_OK = 0
+EXIT_FINDINGS = 1
+EXIT_FAILED = 2
+
+
+def find_packages(paths: List[str]) -> List[str]:
+    """The .zip packages in paths (files or directory trees), sorted per directory."""
+    packages = []
+    for path in paths:
+        if os.path.isfile(path):
+            packages.append(path)
+            continue
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            packages.extend(os.path.join(dir_path, file_name) for file_name in sorted(file_names)
+                            if file_name.lower().endswith('.zip') and not file_name.startswith('._'))
+    return packages
+
+
+def parse_checks(checks: Optional[str]) -> Optional[List[States]]:
+    """--checks value (comma separated check states, e.g. PAR_CHECK,kerning_check) to States."""
+    if not checks:
+        return None
+    check_names = {spec.state.name for spec in CHECK_REGISTRY}
+    states = []
+    for check_name in checks.split(','):
+        check_name = check_name.strip().upper()
+        if check_name not in check_names:
+            raise argparse.ArgumentTypeError(
+                f"Unknown check '{check_name}', choose from {', '.join(sorted(check_names))}")
+        states.append(States[check_name])
+    return states
+
+
+def check_template(package_path: str, checks: Optional[List[States]]) -> Tuple[bytes, Optional[Dict[str, int]]]:
+    """Check one package (in a worker process), returns its JSON line and counts (None if it failed)."""
+    checker = FrontifyChecker()
+    # Results only, so the IDML can be read straight from the package ZIP
+    checker.set_in_archive_mode(True)
+    # The worker processes are the parallelism, one process per package
+    checker.set_parse_workers(1)
+    try:
+        # The checker prints its progress, keep stdout for the JSON lines
+        with contextlib.redirect_stdout(sys.stderr):
+            checker.set_checks(checks)
+            checker.set_source_file_path(package_path)
+            checker.run_state_machine()
+        counts = {
+            'errors': len(checker.results.get_errors()),
+            'warnings': len(checker.results.get_warnings()),
+            'infos': len(checker.results.get_infos()),
+        }
+        line = b''.join([
+            b'{"path":', encode_json(package_path), b',"status":"done","counts":', encode_json(counts),
+            b',"results":', *checker.results.iter_formatted_results_json(), b'}\n'])
+        return line, counts
+    except Exception as e:
+        return encode_json({'path': package_path, 'status': 'failed', 'error': str(e)}) + b'\n', None
+    finally:
+        checker.delete_unzipped_root_path()
+
+
+def check_templates(packages: List[str], checks: Optional[List[States]],
+                    jobs: int) -> Iterator[Tuple[bytes, Optional[Dict[str, int]]]]:
+    """check_template of every package, in order, run on jobs worker processes."""
+    if jobs <= 1:
+        for package_path in packages:
+            yield check_template(package_path, checks)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(check_template, packages, [checks] * len(packages))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check template packages (.zip) and write one JSON line per package.')
+    parser.add_argument('paths', nargs='+', help='Package ZIPs or directories to search for them')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--checks', type=parse_checks, default=None,
+                        help='Comma separated checks to run, e.g. PAR_CHECK,KERNING_CHECK (default: all)')
+    parser.add_argument('--fail-on', choices=list(FAIL_ON_COUNTS), default='error',
+                        help='Exit with 1 if a package has findings of this level or above (default: error)')
+    parser.add_argument('--output', '-o', default='-', help='JSON Lines file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    packages = find_packages(args.paths)
+    if not packages:
+        parser.error('No .zip packages found')
+
+    exit_code = EXIT_OK
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        for line, counts in check_templates(packages, args.checks, args.jobs):
+            output.write(line)
+            output.flush()
+            if counts is None:
+                exit_code = EXIT_FAILED
+            elif exit_code == EXIT_OK and any(counts[count_key] for count_key in FAIL_ON_COUNTS[args.fail_on]):
+                exit_code = EXIT_FINDINGS
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
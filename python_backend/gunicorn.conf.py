@@ -0,0 +1,19 @@
+# Loaded by gunicorn from the working directory, next to the command line options in the Dockerfile
+import os
+import shutil
+
+
+def on_starting(server):
+    # Metrics of the previous run (and of its dead workers) are not carried over
+    metrics_folder = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_folder:
+        shutil.rmtree(metrics_folder, ignore_errors=True)
+        os.makedirs(metrics_folder)
+
+
+def child_exit(server, worker):
+    # Drop the in-progress and memory gauges of the exited worker
+    # (job and batch pool processes drop theirs themselves, see metrics.init_pool_process)
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
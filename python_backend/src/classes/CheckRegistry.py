@@ -0,0 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Tuple
+from src.classes.States import States
+from src.error_handling.ResultRecorder import ResultRecorder
+
+# Parsed models a check can read, by FrontifyChecker attribute
+CHECK_MODELS: Dict[str, str] = {
+    'stories': 'stories_parser',
+    'spreads': 'spreads_parser',
+    'fonts': 'fonts_parser',
+    'source_folders': 'source_folders_parser',
+    'masterspreads': 'masterspreads_parser',
+    'preferences': 'preferences_parser',
+    'page_ids': '_data_id_to_page_id_cache',
+}
+# Fused passes, by FrontifyChecker method. A pass runs all of its checks in one walk.
+FUSED_PASSES: Dict[str, str] = {
+    'stories': 'story_check_pass',
+    'frames': 'frame_check_pass',
+}
+
+
+# **********************************************************
+# Class: CheckSpec
+# Init Locations: CHECK_REGISTRY
+# Methods calls from: CheckScheduler
+# Method calls to:
+# Description: One registered check: its state, the FrontifyChecker
+# method that runs it and the parsed models it reads and writes.
+# Results are not a model, every check adds to them through a
+# ResultRecorder. Checks with a fused_pass are run by that pass
+# instead of their own method.
+# **********************************************************
+class CheckSpec:
+    def __init__(self, state: States, method_name: str, reads: Tuple[str, ...], writes: Tuple[str, ...] = (), fused_pass: str = None):
+        for model in reads + writes:
+            if model not in CHECK_MODELS:
+                raise ValueError(f"Unknown check model '{model}' for {state}")
+        if fused_pass is not None and fused_pass not in FUSED_PASSES:
+            raise ValueError(f"Unknown fused pass '{fused_pass}' for {state}")
+        self.state: States = state
+        self.method_name: str = method_name
+        self.reads: FrozenSet[str] = frozenset(reads)
+        self.writes: FrozenSet[str] = frozenset(writes)
+        self.fused_pass: str = fused_pass
+
+    # ----------------Getters------------------
+    def conflicts_with(self, other: 'CheckSpec') -> bool:
+        """True if the two checks cannot run at the same time (one writes what the other touches)."""
+        return bool(self.writes & (other.reads | other.writes) or other.writes & self.reads)
+
+
+# Registry in chain order, results are always merged in this order
+CHECK_REGISTRY: List[CheckSpec] = [
+    CheckSpec(States.MASTERPAGE_CHECK, 'masterpage_check', ('masterspreads',)),
+    CheckSpec(States.PAR_CHECK, 'par_style_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.HYPHENATION_CHECK, 'hyphenation_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.OVERRIDES_CHECK, 'overrides_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.KERNING_CHECK, 'kerning_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.FONTS_INCLUDED_CHECK, 'fonts_included_check',
+              ('fonts', 'source_folders')),
+    CheckSpec(States.OTF_TTF_FONT_CHECK, 'otf_ttf_font_check', ('source_folders',)),
+    CheckSpec(States.VARIABLE_FONT_CHECK, 'variable_font_check', ('fonts',)),
+    CheckSpec(States.IMAGES_INCLUDED_CHECK, 'images_included_check',
+              ('spreads', 'masterspreads', 'source_folders', 'page_ids')),
+    CheckSpec(States.LARGE_IMAGE_CHECK, 'large_image_check',
+              ('source_folders', 'page_ids')),
+    CheckSpec(States.EMBEDDED_IMAGE_CHECK, 'embedded_image_check',
+              ('spreads', 'page_ids'), fused_pass='frames'),
+    CheckSpec(States.IMAGE_TRANSFORMATION_CHECK, 'image_transformation_check',
+              ('spreads', 'page_ids'), fused_pass='frames'),
+    CheckSpec(States.TABLE_CHECK, 'table_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.PASTED_GRAPHICS_CHECK, 'pasted_graphics_check', ('spreads',)),
+    CheckSpec(States.DOCUMENT_BLEED_CHECK, 'document_bleed_check', ('preferences',)),
+    CheckSpec(States.AUTO_SIZE_TEXT_BOX_CHECK, 'auto_size_text_box_check',
+              ('spreads', 'stories'), fused_pass='frames'),
+    CheckSpec(States.TEXT_COLUMNS_CHECK, 'text_columns_check',
+              ('spreads', 'stories'), fused_pass='frames'),
+    CheckSpec(States.TEXT_WRAP_CHECK, 'text_wrap_check',
+              ('spreads', 'stories'), fused_pass='frames'),
+    CheckSpec(States.LINKED_TEXT_FRAME_CHECK, 'linked_text_frame_check',
+              ('spreads', 'stories'), fused_pass='frames'),
+    CheckSpec(States.OBJECT_STYLE_CHECK, 'object_style_check',
+              ('spreads', 'stories', 'page_ids'), fused_pass='frames'),
+    CheckSpec(States.GRID_ALIGNMENT_CHECK, 'grid_alignment_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.COMPOSER_CHECK, 'composer_check', ('stories',),
+              fused_pass='stories'),
+    CheckSpec(States.OTHER_CHECKS, 'other_checks', ('stories',),
+              fused_pass='stories'),
+]
+
+
+# **********************************************************
+# Class: CheckScheduler
+# Init Locations: FrontifyChecker
+# Methods calls from: FrontifyChecker
+# Method calls to: CheckSpec, ResultRecorder
+# Description: Runs the registered checks. The checks of a fused pass
+# run as one unit, every other check is a unit of its own. A unit waits
+# for every earlier unit it conflicts with (see CheckSpec.conflicts_with),
+# the others run at the same time on a thread pool. Each check adds its
+# results to its own ResultRecorder; the recorders are replayed in
+# registry order, so the results do not depend on which check finished
+# first.
+# **********************************************************
+class CheckScheduler:
+    def __init__(self, registry: List[CheckSpec] = None):
+        self.registry: List[CheckSpec] = registry if registry is not None else CHECK_REGISTRY
+        self.units: List[List[CheckSpec]] = self._build_units()
+        self.waves: List[List[List[CheckSpec]]] = self._build_waves()
+
+    # ---------------- Private Setters------------------
+    def _build_units(self) -> List[List[CheckSpec]]:
+        """One unit per fused pass (at its first check) and one per other check, in registry order."""
+        units: List[List[CheckSpec]] = []
+        fused_units: Dict[str, List[CheckSpec]] = {}
+        for spec in self.registry:
+            if spec.fused_pass is None:
+                units.append([spec])
+                continue
+            if spec.fused_pass not in fused_units:
+                fused_units[spec.fused_pass] = []
+                units.append(fused_units[spec.fused_pass])
+            for fused_spec in fused_units[spec.fused_pass]:
+                if spec.conflicts_with(fused_spec):
+                    raise ValueError(
+                        f"{spec.state} conflicts with {fused_spec.state} in fused pass '{spec.fused_pass}'")
+            fused_units[spec.fused_pass].append(spec)
+        return units
+
+    def _build_waves(self) -> List[List[List[CheckSpec]]]:
+        """Groups the units so each wave only depends on earlier waves."""
+        levels: List[int] = []
+        waves: List[List[List[CheckSpec]]] = []
+        for index, unit in enumerate(self.units):
+            level = 0
+            for earlier_index in range(index):
+                if any(spec.conflicts_with(earlier_spec) for spec in unit for earlier_spec in self.units[earlier_index]):
+                    level = max(level, levels[earlier_index] + 1)
+            levels.append(level)
+            if level == len(waves):
+                waves.append([])
+            waves[level].append(unit)
+        return waves
+
+    # ---------------- External Setters------------------
+    def run(self, checker: 'FrontifyChecker', workers: int):
+        """Runs every registered check on checker and merges the results into checker.results."""
+        outcomes: Dict[States, Tuple[ResultRecorder, Exception]] = {}
+        if workers <= 1:
+            for unit in self.units:
+                outcomes.update(self._run_unit(checker, unit))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for wave in self.waves:
+                    for unit_outcomes in executor.map(lambda unit: self._run_unit(checker, unit), wave):
+                        outcomes.update(unit_outcomes)
+
+        # Same results and same failure point as the chain
+        for spec in self.registry:
+            recorder, error = outcomes[spec.state]
+            recorder.replay(checker.results)
+            if error:
+                raise error
+
+    def _run_unit(self, checker: 'FrontifyChecker', unit: List[CheckSpec]) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        """Runs one unit, sending a stage_started and a stage_finished event per check in it.
+
+        The checks of a fused pass finish together, they all get the timings of the pass.
+        """
+        for spec in unit:
+            checker.emit_progress('stage_started', spec.state)
+        # Units run next to each other on check threads, count the CPU time of this thread
+        with checker.stage_timings.measure(unit[0].state.name, thread_cpu=True) as timings:
+            outcomes = self._run_unit_checks(checker, unit)
+        for spec in unit:
+            checker.stage_timings.record(spec.state.name, timings)
+            checker.emit_progress('stage_finished', spec.state, duration_ms=timings['wall_ms'],
+                                  cpu_ms=timings['cpu_ms'], failed=outcomes[spec.state][1] is not None)
+        return outcomes
+
+    def _run_unit_checks(self, checker: 'FrontifyChecker', unit: List[CheckSpec]) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        fused_pass = unit[0].fused_pass
+        if fused_pass is not None:
+            try:
+                return getattr(checker, FUSED_PASSES[fused_pass])([spec.state for spec in unit])
+            except Exception as e:
+                return {spec.state: (ResultRecorder(), e) for spec in unit}
+        spec = unit[0]
+        recorder = ResultRecorder()
+        checker.set_thread_results(recorder)
+        try:
+            getattr(checker, spec.method_name)()
+        except Exception as e:
+            return {spec.state: (recorder, e)}
+        finally:
+            checker.set_thread_results(None)
+        return {spec.state: (recorder, None)}
+
+    # ----------------Getters------------------
+    def get_waves(self) -> List[List[States]]:
+        return [[spec.state for unit in wave for spec in unit] for wave in self.waves]
@@ -0,0 +1,81 @@
+from typing import Callable, Dict, List, Tuple
+from src.classes.States import States
+from src.error_handling.ResultRecorder import ResultRecorder
+
+FRAME_CALLBACKS = ('on_text_frame', 'on_link')
+
+
+# **********************************************************
+# Class: FrameRule
+# Init Locations: FrontifyChecker (frame rule factories)
+# Methods calls from: FrameCheckEngine
+# Method calls to:
+# Description: The spread-level part of a check state. Each callback gets
+# the results to add to as its first argument:
+#   on_text_frame(results, spread, text_frame, story)
+#   on_link(results, spread, link, page_id)
+# story is the text frame's parent story, page_id is the link's page
+# (or the spread's first page). needs_stories rules are skipped when the
+# document has no Stories.
+# **********************************************************
+class FrameRule:
+    def __init__(self, state: States, on_text_frame: Callable = None, on_link: Callable = None,
+                 needs_stories: bool = False):
+        self.state: States = state
+        self.on_text_frame: Callable = on_text_frame
+        self.on_link: Callable = on_link
+        self.needs_stories: bool = needs_stories
+
+
+# **********************************************************
+# Class: FrameCheckEngine
+# Init Locations: FrontifyChecker
+# Methods calls from: FrontifyChecker
+# Method calls to: FrameRule, ResultRecorder
+# Description: Visits every TextFrame, then every Link, of every spread
+# once and calls every registered rule on the way. The parent story and
+# the page id are looked up once per object, not once per rule. Each
+# rule adds to its own ResultRecorder; a rule that raises is skipped for
+# the rest of the walk and its exception is returned with its recorder.
+# **********************************************************
+class FrameCheckEngine:
+    def __init__(self, rules: List[FrameRule]):
+        self.rules: List[FrameRule] = rules
+
+    def run(self, spreads: List['SpreadData'], find_page_id: Callable[[str], str]) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        recorders: Dict[States, ResultRecorder] = {
+            rule.state: ResultRecorder() for rule in self.rules}
+        errors: Dict[States, Exception] = {}
+        # callback name -> [(state, callback, recorder)], built once instead of per object
+        callbacks: Dict[str, List[Tuple[States, Callable, ResultRecorder]]] = {
+            callback_name: [(rule.state, getattr(rule, callback_name), recorders[rule.state])
+                            for rule in self.rules if getattr(rule, callback_name) is not None]
+            for callback_name in FRAME_CALLBACKS}
+
+        def dispatch(callback_name: str, *args):
+            for state, callback, recorder in callbacks[callback_name]:
+                if state in errors:
+                    continue
+                try:
+                    callback(recorder, *args)
+                except Exception as e:
+                    errors[state] = e
+
+        # All text frames first, then all links, the order the checks always used
+        if callbacks['on_text_frame']:
+            for spread in spreads:
+                for text_frame in spread.get_text_frame_obj_list():
+                    dispatch('on_text_frame', spread, text_frame,
+                             text_frame.get_parent_story_obj())
+        if callbacks['on_link']:
+            for spread in spreads:
+                # Get first page's Self from spread
+                pages = spread.get_pages()
+                spread_page_id = pages[0].get("self", '') if pages and len(pages) > 0 else ''
+                for link in spread.get_links_obj_list():
+                    rectangle_id = link.get_rectangle_link_id()
+                    # Try to find the specific page_id from data_id, fallback to spread's first page
+                    page_id = find_page_id(rectangle_id) if rectangle_id else spread_page_id
+                    dispatch('on_link', spread, link, page_id)
+
+        return {rule.state: (recorders[rule.state], errors.get(rule.state)) for rule in self.rules}
@@ -4,7 +4,11 @@ import uuid
 import shutil  # to delete the __MACOSX folder after unzipping
 import math
 import sys
-from typing import Dict, List, Union
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple, Union
 from src.error_handling.ErrorHandling import ValidationResult, ValidationCategory
 from src.error_handling.ValidationClassifier import ValidationError, ValidationWarning, ValidationInfo
 from src.parsers.SourceFoldersParser import SourceFoldersParser
@@ -15,6 +19,18 @@ from src.parsers.StylesParser import StylesParser
 from src.parsers.StoriesParser import StoriesParser
 from src.parsers.PreferencesParser import PreferencesParser
 from src.classes.States import States
+from src.classes.CheckRegistry import CheckScheduler, CHECK_REGISTRY
+from src.classes.StoryCheckEngine import StoryCheckEngine, StoryRule
+from src.classes.FrameCheckEngine import FrameCheckEngine, FrameRule
+from src.classes.IdmlArchive import IdmlArchive
+from src.classes.PartCache import PartCache
+from src.classes.StageTimings import StageTimings
+from src.error_handling.ResultRecorder import ResultRecorder
+
+# Inner .idml files up to this size are spooled in memory, larger ones roll over to a temp file
+IDML_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+# Stories/Spreads XML below this total size is parsed serially, a process pool costs more than it saves
+PARALLEL_PARSE_MIN_BYTES = 4 * 1024 * 1024
 
 
 # *****************************************************************************************
@@ -30,11 +46,33 @@ class FrontifyChecker:
         self.template_name: str = ''
         # Data
         self.data_folder: str = ''
+        # Folder for the unzipped package and output ZIP (optional), else src/data and the temp folder
+        self.workspace_folder: str = None
         self.unzipped_folder_path: str = ''
         self.unzipped_root_path: str = ''
         # Unarchived IDML
         self.idml_output_folder: str = ''
         self.spreads_dir: str = ''
+        # In-archive mode: read the IDML straight from the package ZIP instead of extracting it
+        self.in_archive_mode: bool = False
+        self.package_archive: zipfile.ZipFile = None
+        self.package_folder: str = ''
+        self.idml_archive: IdmlArchive = IdmlArchive()
+        self._idml_spool = None
+        # Parsed IDML parts shared between runs (optional)
+        self.part_cache: PartCache = None
+        # Process pool size for parsing Stories/Spreads, None = one per CPU, 1 = serial
+        self.parse_workers: int = None
+        self.parse_executor: ProcessPoolExecutor = None
+        # Check threads, None = one per CPU, 1 = one after another
+        self.check_workers: int = None
+        # Compatibility mode: run the checks through the fixed States chain
+        self.check_chain_mode: bool = False
+        self.check_scheduler: CheckScheduler = CheckScheduler()
+        # Called with stage_started / stage_finished events (optional), also from check threads
+        self.progress_listener: Callable[[dict], None] = None
+        # Wall / CPU time (and optionally memory peak) of every state, parser and check
+        self.stage_timings: StageTimings = StageTimings()
         # XML Data
         self.stories_parser: StoriesParser = None
         self.masterspreads_parser: MasterPageParser = None
@@ -84,19 +122,137 @@ class FrontifyChecker:
             States.RESULTS: self.results_analytics,
             States.EXIT: None,
         }
-        # Validation Class
-        self.results: ValidationResult = ValidationResult()
+        # Story rules, run together in one walk of the story model by story_check_pass
+        self.story_rules: Dict[States] = {
+            States.PAR_CHECK: self.par_style_rule,
+            States.HYPHENATION_CHECK: self.hyphenation_rule,
+            States.OVERRIDES_CHECK: self.overrides_rule,
+            States.KERNING_CHECK: self.kerning_rule,
+            States.TABLE_CHECK: self.table_rule,
+            States.GRID_ALIGNMENT_CHECK: self.grid_alignment_rule,
+            States.COMPOSER_CHECK: self.composer_rule,
+            States.OTHER_CHECKS: self.other_rule,
+        }
+        # Frame and link rules, run together in one walk of the spreads by frame_check_pass
+        self.frame_rules: Dict[States] = {
+            States.EMBEDDED_IMAGE_CHECK: self.embedded_image_rule,
+            States.IMAGE_TRANSFORMATION_CHECK: self.image_transformation_rule,
+            States.AUTO_SIZE_TEXT_BOX_CHECK: self.auto_size_text_box_rule,
+            States.TEXT_COLUMNS_CHECK: self.text_columns_rule,
+            States.TEXT_WRAP_CHECK: self.text_wrap_rule,
+            States.LINKED_TEXT_FRAME_CHECK: self.linked_text_frame_rule,
+            States.OBJECT_STYLE_CHECK: self.object_style_rule,
+        }
+        # Validation Class, checks on scheduler threads add to a ResultRecorder instead
+        self._results: ValidationResult = ValidationResult()
+        self._thread_results = threading.local()
         # Cache for data_id to page_id lookups
         self._data_id_to_page_id_cache: Dict[str, str] = {}
 
+    @property
+    def results(self) -> ValidationResult:
+        recorder = getattr(self._thread_results, 'recorder', None)
+        return recorder if recorder is not None else self._results
+
+    @results.setter
+    def results(self, results: ValidationResult):
+        self._results = results
+
     def run_state_machine(self):
-        while self.current_state:
-            print(self.current_state)
-            self.current_state = self.states[self.current_state]()
-            if (self.current_state == States.EXIT):
-                return
+        self.stage_timings.start()
+        try:
+            while self.current_state:
+                if self.current_state == States.MASTERPAGE_CHECK and not self.check_chain_mode:
+                    # The check registry runs every check state, then the chain picks up at RESULTS
+                    with self.stage_timings.measure('CHECKS', memory=True):
+                        self.current_state = self.run_checks()
+                    continue
+                state = self.current_state
+                self.emit_progress('stage_started', state)
+                with self.stage_timings.measure(state.name, memory=True) as timings:
+                    self.current_state = self.states[state]()
+                self.emit_progress('stage_finished', state,
+                                   duration_ms=timings['wall_ms'], cpu_ms=timings['cpu_ms'])
+                if (self.current_state == States.EXIT):
+                    return
+        finally:
+            self.stage_timings.stop()
+
+    # ---------------------------------------------------
+    # Function: emit_progress
+    # Description: Sends a stage event for state to the progress listener,
+    # if one is set.
+    # ---------------------------------------------------
+    def emit_progress(self, event: str, state: States, **fields):
+        if self.progress_listener is not None:
+            self.progress_listener({'event': event, 'stage': state.name, **fields})
+
+    # ---------------------------------------------------
+    # Function: run_checks
+    # Description: Runs MASTERPAGE_CHECK through OTHER_CHECKS with the
+    # CheckScheduler. Checks that share no written model run at the same
+    # time; results are merged in chain order.
+    # ---------------------------------------------------
+    def run_checks(self) -> States:
+        workers = self.check_workers if self.check_workers is not None else (
+            os.cpu_count() or 1)
+        widest_wave = max(len(wave) for wave in self.check_scheduler.waves)
+        self.check_scheduler.run(self, min(workers, widest_wave))
+        return States.RESULTS
+
+    # ---------------------------------------------------
+    # Function: story_check_pass
+    # Description: Fused pass for the CheckScheduler. Runs the story rules
+    # of the given states in a single walk of the story model.
+    # Returns: state -> (ResultRecorder, exception or None)
+    # ---------------------------------------------------
+    def story_check_pass(self, states: List[States]) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        if not self.stories_exist:
+            return {state: (ResultRecorder(), None) for state in states}
+        engine = StoryCheckEngine([self.story_rules[state]() for state in states])
+        return engine.run(self.stories_parser.get_stories_data())
+
+    # ---------------------------------------------------
+    # Function: run_story_rules
+    # Description: Chain version of story_check_pass, adds the results
+    # straight to self.results.
+    # ---------------------------------------------------
+    def run_story_rules(self, rules: List[StoryRule]):
+        outcomes = StoryCheckEngine(rules).run(
+            self.stories_parser.get_stories_data())
+        for recorder, error in outcomes.values():
+            recorder.replay(self.results)
+            if error:
+                raise error
+
+    # ---------------------------------------------------
+    # Function: frame_check_pass
+    # Description: Fused pass for the CheckScheduler. Runs the frame and
+    # link rules of the given states in a single walk of the spreads.
+    # Returns: state -> (ResultRecorder, exception or None)
+    # ---------------------------------------------------
+    def frame_check_pass(self, states: List[States]) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        rules = [self.frame_rules[state]() for state in states]
+        # Same as the stories_exist guard of the single checks
+        skipped_states = [rule.state for rule in rules
+                          if rule.needs_stories and not self.stories_exist]
+        outcomes = {state: (ResultRecorder(), None) for state in skipped_states}
+        outcomes.update(FrameCheckEngine([rule for rule in rules if rule.state not in skipped_states]).run(
+            self.spreads_parser.get_spreads_obj_list(), self.find_page_id_from_data_id))
+        return outcomes
 
-        print(self.current_state)
+    # ---------------------------------------------------
+    # Function: run_frame_rules
+    # Description: Chain version of frame_check_pass, adds the results
+    # straight to self.results.
+    # ---------------------------------------------------
+    def run_frame_rules(self, rules: List[FrameRule]):
+        outcomes = FrameCheckEngine(rules).run(
+            self.spreads_parser.get_spreads_obj_list(), self.find_page_id_from_data_id)
+        for recorder, error in outcomes.values():
+            recorder.replay(self.results)
+            if error:
+                raise error
 
     # ========================================================================================
     # State: GET_ZIP
@@ -133,7 +289,7 @@ class FrontifyChecker:
             script_dir = os.path.dirname(__file__)
             current_dir = os.path.join(script_dir, '..')
 
-        self.data_folder = os.path.join(current_dir, 'data')
+        self.data_folder = self.workspace_folder if self.workspace_folder else os.path.join(current_dir, 'data')
         if not self.get_zip_state():
             return States.EXIT
 
@@ -193,6 +349,8 @@ class FrontifyChecker:
     # __MACOSC folder from ZIP. Check only 1 folder in unique folder.
     # ---------------------------------------------------
     def extract_zip_to_data_folder(self) -> bool:
+        if self.in_archive_mode:
+            return self.open_package_archive()
         try:
             with zipfile.ZipFile(self.source_file_path, 'r') as zip_ref:
                 zip_ref.extractall(self.unzipped_root_path)
@@ -228,6 +386,45 @@ class FrontifyChecker:
         #     return False
         return True
 
+    # ---------------------------------------------------
+    # Function: open_package_archive
+    # Description: In-archive mode version of extract_zip_to_data_folder.
+    # Keeps the package ZIP open instead of extracting it. The .idml,
+    # Links and Document Fonts are all read from the ZIP.
+    # ---------------------------------------------------
+    def open_package_archive(self) -> bool:
+        try:
+            self.close_archives()
+            self.package_archive = zipfile.ZipFile(self.source_file_path, 'r')
+            member_names = [name for name in self.package_archive.namelist()
+                            if not name.startswith('__MACOSX/')]
+
+            # We need to check if the package has a root folder or not
+            if any('/' not in name and name.endswith('.idml') for name in member_names):
+                self.package_folder = ''
+            else:
+                root_folders = sorted({name.split('/')[0]
+                                      for name in member_names if '/' in name})
+                self.package_folder = root_folders[0] + '/'
+        except Exception as e:
+            self.results.add_custom_error(
+                f"Failed to unzip the file. Error: {e}", ValidationError.ERROR)
+            return False
+        return True
+
+    # ---------------------------------------------------
+    # Function: find_idml_members
+    # Description: In-archive mode version of find_idml_files.
+    # Returns the .idml members directly inside the package folder.
+    # ---------------------------------------------------
+    def find_idml_members(self) -> List[str]:
+        idml_members = []
+        for name in self.package_archive.namelist():
+            relative_name = name[len(self.package_folder):]
+            if name.startswith(self.package_folder) and '/' not in relative_name and name.endswith('.idml'):
+                idml_members.append(name)
+        return idml_members
+
     # ========================================================================================
     # State: UNZIP_IDML
     # PASS Next State Transition: PARSE_XML
@@ -253,7 +450,10 @@ class FrontifyChecker:
     # Returns: Path of the .idml file if one is found, False otherwise.
     # ---------------------------------------------------
     def validate_idml_files(self) -> bool:
-        idml_files = self.find_idml_files(self.unzipped_folder_path)
+        if self.in_archive_mode:
+            idml_files = self.find_idml_members()
+        else:
+            idml_files = self.find_idml_files(self.unzipped_folder_path)
 
         if len(idml_files) == 0:
             self.results.add_error(
@@ -275,12 +475,15 @@ class FrontifyChecker:
     # Returns: True if unarchiving is successful, False otherwise.
     # ---------------------------------------------------
     def unarchive_idml_files(self, idml_path: str):
+        if self.in_archive_mode:
+            return self.open_idml_archive(idml_path)
         self.idml_output_folder = os.path.join(
             self.unzipped_root_path, 'Source XML')
         os.makedirs(self.idml_output_folder, exist_ok=True)
         try:
             with zipfile.ZipFile(idml_path, 'r') as zip_ref:
                 zip_ref.extractall(self.idml_output_folder)
+            self.idml_archive = IdmlArchive(root=self.idml_output_folder)
             self.results.add_idml_output_folder(self.idml_output_folder)
             return True
         except Exception as e:
@@ -288,41 +491,104 @@ class FrontifyChecker:
                 f"Failed to unzip the .idml file. Error: {e}", ValidationError.ERROR)
             return False
 
+    # ---------------------------------------------------
+    # Function: open_idml_archive
+    # Description: In-archive mode version of unarchive_idml_files.
+    # Opens the .idml member of the package ZIP as a ZipFile so the
+    # parsers read its XML members directly. The member is copied once
+    # into a spooled temp file because ZipFile seeks backwards a lot and
+    # a compressed member stream re-inflates from the start on every
+    # backwards seek.
+    # Args:
+    #       idml_member: Name of the .idml member in the package ZIP.
+    # Returns: True if the .idml could be opened, False otherwise.
+    # ---------------------------------------------------
+    def open_idml_archive(self, idml_member: str):
+        try:
+            self._idml_spool = tempfile.SpooledTemporaryFile(
+                max_size=IDML_SPOOL_MAX_SIZE)
+            with self.package_archive.open(idml_member) as idml_stream:
+                shutil.copyfileobj(idml_stream, self._idml_spool)
+            self._idml_spool.seek(0)
+            self.idml_archive = IdmlArchive(
+                zip_ref=zipfile.ZipFile(self._idml_spool, 'r'))
+            return True
+        except Exception as e:
+            self.results.add_custom_error(
+                f"Failed to unzip the .idml file. Error: {e}", ValidationError.ERROR)
+            return False
+
     # ========================================================================================
     # State: PARSE_XML
     # PASS Next State Transition:
     # FAIL States Transition: RESULTS
     # Description: Parses the XML to extract story data and paragraph styles.
+    # Large documents parse their Stories and Spreads files in a process pool.
     # ========================================================================================
     def parse_xml(self) -> States:
+        self.parse_executor = self.create_parse_executor()
+        try:
+            return self.parse_xml_parts()
+        finally:
+            if self.parse_executor:
+                self.parse_executor.shutdown()
+                self.parse_executor = None
+
+    # ---------------------------------------------------
+    # Function: create_parse_executor
+    # Description: Returns a process pool for parsing the Stories and
+    # Spreads files, or None when they should be parsed serially
+    # (single CPU, or too little XML to be worth the pool).
+    # ---------------------------------------------------
+    def create_parse_executor(self) -> ProcessPoolExecutor:
+        workers = self.parse_workers if self.parse_workers is not None else (
+            os.cpu_count() or 1)
+        if workers <= 1:
+            return None
+        part_paths = [file_path for folder in ['Spreads', 'Stories'] if self.idml_archive.is_dir(folder)
+                      for file_path in self.idml_archive.list_files(folder, '.xml')]
+        if len(part_paths) < 2:
+            return None
+        if sum(self.idml_archive.get_size(file_path) for file_path in part_paths) < PARALLEL_PARSE_MIN_BYTES:
+            return None
+        return ProcessPoolExecutor(max_workers=min(workers, len(part_paths)))
+
+    def parse_xml_parts(self) -> States:
         # -----------------------------
         # Source Folders (Links, Document Fonts)
         # Init: SourceFoldersParser
         # -----------------------------
-        # Check if 'Links' exists, if not create it to continue code flow
-        document_links_folder_path = self.ensure_folder_exists(
-            self.unzipped_folder_path, 'Links')
+        if self.in_archive_mode:
+            # Folders are read from the package ZIP, a missing folder is just empty
+            with self.stage_timings.measure('PARSE_XML.source_folders'):
+                self.source_folders_parser = SourceFoldersParser(
+                    self.find_package_folder('Links'), self.find_package_folder('Document Fonts'), self.package_archive)
+        else:
+            # Check if 'Links' exists, if not create it to continue code flow
+            document_links_folder_path = self.ensure_folder_exists(
+                self.unzipped_folder_path, 'Links')
 
-        # Check if 'Document Fonts' exists, if not create it to continue code flow
-        document_fonts_folder_path = self.ensure_folder_exists(
-            self.unzipped_folder_path, 'Document Fonts')
-        self.source_folders_parser = SourceFoldersParser(
-            document_links_folder_path, document_fonts_folder_path)
+            # Check if 'Document Fonts' exists, if not create it to continue code flow
+            document_fonts_folder_path = self.ensure_folder_exists(
+                self.unzipped_folder_path, 'Document Fonts')
+            with self.stage_timings.measure('PARSE_XML.source_folders'):
+                self.source_folders_parser = SourceFoldersParser(
+                    document_links_folder_path, document_fonts_folder_path)
 
         # -----------------------------
         # Spreads XML
         # Init: SpreadsParser
         # -----------------------------
         # Check if Spreads directory exists
-        spreads_dir = os.path.join(
-            self.idml_output_folder, 'Spreads')
-        if not os.path.exists(spreads_dir):
+        spreads_dir = 'Spreads'
+        if not self.idml_archive.is_dir(spreads_dir):
             self.results.add_custom_error(
                 "Spreads directory does not exist", ValidationError.ERROR)
             return States.EXIT
 
-        self.spreads_parser = SpreadsParser(
-            spreads_dir)
+        with self.stage_timings.measure('PARSE_XML.spreads'):
+            self.spreads_parser = SpreadsParser(
+                spreads_dir, self.idml_archive, self.part_cache, self.parse_executor)
         # Set spreads_parser in results to build spread-to-page mapping
         self.results.set_spreads_parser(self.spreads_parser)
         # -----------------------------
@@ -330,42 +596,46 @@ class FrontifyChecker:
         # Init: FontsParser
         # -----------------------------
         # Check if Fonts.XML exists
-        fonts_xml_path = os.path.join(
-            self.idml_output_folder, 'Resources', 'Fonts.xml')
-        if not os.path.exists(fonts_xml_path):
+        fonts_xml_path = self.idml_archive.join('Resources', 'Fonts.xml')
+        if not self.idml_archive.exists(fonts_xml_path):
             self.results.add_custom_error(
                 "Fonts.XML does not exist", ValidationError.ERROR)
             return States.EXIT
-        self.fonts_parser = FontsParser(
-            fonts_xml_path)
+        with self.stage_timings.measure('PARSE_XML.fonts'):
+            self.fonts_parser = self.load_part(
+                'fonts', fonts_xml_path, lambda: FontsParser(fonts_xml_path, self.idml_archive))
         # -----------------------------
         # Styles.XML
         # Init: StylesParser
         # -----------------------------
         # Check if Styles.xml exists
-        styles_xml_path = os.path.join(
-            self.idml_output_folder, 'Resources', 'Styles.xml')
-        if not os.path.exists(styles_xml_path):
+        styles_xml_path = self.idml_archive.join('Resources', 'Styles.xml')
+        if not self.idml_archive.exists(styles_xml_path):
             self.results.add_custom_error(
                 "Styles.xml file does not exist", ValidationError.ERROR)
             return States.EXIT
         # Initialize the StylesParser
-        styles_parser = StylesParser(styles_xml_path)
+        with self.stage_timings.measure('PARSE_XML.styles'):
+            styles_parser = self.load_part(
+                'styles', styles_xml_path, lambda: StylesParser(styles_xml_path, self.idml_archive))
+        styles_key = self.idml_archive.member_key(
+            styles_xml_path) if self.part_cache else ()
 
         # -----------------------------
         # Stories XML
         # Init: StoriesParser
         # -----------------------------
         # Check if Stories directory exists
-        stories_dir = os.path.join(self.idml_output_folder, 'Stories')
-        if not os.path.exists(stories_dir):
+        stories_dir = 'Stories'
+        if not self.idml_archive.is_dir(stories_dir):
             self.stories_exist = False
             # Set stories_parser to None in ValidationResult
             self.results.set_stories_parser(None)
         else:
             # Initialize the StoriesParser and extract story data
-            self.stories_parser = StoriesParser(
-                stories_dir, styles_parser, self.fonts_parser, self.spreads_parser)
+            with self.stage_timings.measure('PARSE_XML.stories'):
+                self.stories_parser = StoriesParser(
+                    stories_dir, styles_parser, self.fonts_parser, self.spreads_parser, self.idml_archive, self.part_cache, styles_key, self.parse_executor)
             # Set stories_parser in ValidationResult so it's available when adding validations
             self.results.set_stories_parser(self.stories_parser)
 
@@ -397,28 +667,28 @@ class FrontifyChecker:
         # Init: MasterPageParser
         # -----------------------------
         # Check if MasterSpreads directory exists
-        masterspreads_dir = os.path.join(
-            self.idml_output_folder, 'MasterSpreads')
-        if not os.path.exists(masterspreads_dir):
+        masterspreads_dir = 'MasterSpreads'
+        if not self.idml_archive.is_dir(masterspreads_dir):
             self.results.add_warning(
                 "MasterSpreads directory does not exist", ValidationWarning.WARNING, page_id='', identifier='null', data_id='null')
         else:
             # Initialize the StoriesParser and extract story data
-            self.masterspreads_parser = MasterPageParser(masterspreads_dir)
+            with self.stage_timings.measure('PARSE_XML.masterspreads'):
+                self.masterspreads_parser = MasterPageParser(
+                    masterspreads_dir, self.idml_archive)
 
         # -----------------------------
         # META-INF XML
         # Init: NA
         # -----------------------------
         # Store Folder location
-        meta_inf_folder = os.path.join(
-            self.idml_output_folder, 'META-INF')
-        if not os.path.exists(meta_inf_folder):
+        meta_inf_folder = 'META-INF'
+        if not self.idml_archive.is_dir(meta_inf_folder):
             self.metadata_xml_path = False
         else:
-            potential_metadata_path = os.path.join(
+            potential_metadata_path = self.idml_archive.join(
                 meta_inf_folder, 'metadata.xml')
-            if os.path.exists(potential_metadata_path):
+            if self.idml_archive.exists(potential_metadata_path):
                 self.metadata_xml_path = potential_metadata_path
 
         # -----------------------------
@@ -426,20 +696,34 @@ class FrontifyChecker:
         # Init: Preferences Parser
         # -----------------------------
         # Check if Styles.xml exists
-        preferences_xml_path = os.path.join(
-            self.idml_output_folder, 'Resources', 'Preferences.xml')
-        if not os.path.exists(preferences_xml_path):
+        preferences_xml_path = self.idml_archive.join(
+            'Resources', 'Preferences.xml')
+        if not self.idml_archive.exists(preferences_xml_path):
             self.results.add_custom_error(
                 "Preferences.xml file does not exist", ValidationError.ERROR)
             return States.EXIT
         # Initialize the StylesParser
-        self.preferences_parser = PreferencesParser(preferences_xml_path)
+        with self.stage_timings.measure('PARSE_XML.preferences'):
+            self.preferences_parser = PreferencesParser(
+                preferences_xml_path, self.idml_archive)
 
         # Build data_id to page_id mapping cache for O(1) lookups
         self._build_data_id_to_page_id_mapping()
 
         return States.MASTERPAGE_CHECK
 
+    # ---------------------------------------------------
+    # Function: load_part
+    # Description: Builds a parser for a single IDML member, or reuses
+    # the one parsed from an identical member (same CRC and size) in a
+    # previous run when a part cache is set.
+    # ---------------------------------------------------
+    def load_part(self, kind: str, xml_path: str, build):
+        if not self.part_cache:
+            return build()
+        return self.part_cache.get_or_build(
+            (kind,) + self.idml_archive.member_key(xml_path), build)
+
     def ensure_folder_exists(self, path, folder_name):
         # Convert all folder names in the unzipped folder path to lowercase and check if the lowercase version of the target folder exists
         folder_paths = [os.path.join(path, f) for f in os.listdir(path)
@@ -463,6 +747,22 @@ class FrontifyChecker:
             #     f"Folder '{folder_name}' already exists at {actual_folder_path}")
             return actual_folder_path
 
+    # ---------------------------------------------------
+    # Function: find_package_folder
+    # Description: In-archive mode version of ensure_folder_exists.
+    # Case-insensitive lookup of a folder in the package folder.
+    # Returns the member prefix (original case) or '' if not found.
+    # ---------------------------------------------------
+    def find_package_folder(self, folder_name: str) -> str:
+        target_folder_name_lowercase = folder_name.lower()
+        for name in self.package_archive.namelist():
+            if not name.startswith(self.package_folder):
+                continue
+            relative_parts = name[len(self.package_folder):].split('/')
+            if len(relative_parts) > 1 and relative_parts[0].lower() == target_folder_name_lowercase:
+                return self.package_folder + relative_parts[0] + '/'
+        return ''
+
     # ========================================================================================
     # State: MASTERPAGE_CHECK
     # PASS Next State Transition: PAR_CHECK
@@ -502,37 +802,37 @@ class FrontifyChecker:
         # Currently master page par styles are checked too, as text frames are a story. Might want to change in a phase 2.
         if not self.stories_exist:
             return States.HYPHENATION_CHECK
+        self.run_story_rules([self.par_style_rule()])
+        return States.HYPHENATION_CHECK
 
-        for story in self.stories_parser.get_stories_data():
+    def par_style_rule(self) -> StoryRule:
+        def on_story(results, story):
             page_id = story.get_page()  # page Self
             story_content = story.get_story_text_content()
             story_id = story.get_story_id()
             data_id = story.get_parent_text_frame_id()
             if not story_content or story_content == '' or story_content == ' ':
-                self.results.add_info(
+                results.add_info(
                     context=None,
                     info_type=ValidationInfo.EMPTY_TEXT_FRAME,
                     page_id=page_id,
                     identifier=story_id,
                     data_id=data_id
                 )
-                continue
+                return
             grouped_paragraph_styles = story.get_grouped_paragraph_styles()
 
             if len(grouped_paragraph_styles) == 1 and grouped_paragraph_styles[0][0].get_style_id() in self.default_par_styles:
                 # Process single default paragraph style differently
                 # Only one style in a text box
-                content = grouped_paragraph_styles[0][0].get_content()
-                context_message = self.generate_context_message(
-                    content, grouped_paragraph_styles, 0)
-                self.results.add_error(
+                results.add_error(
                     context=None,
                     error_type=ValidationError.PARAGRAPH_STYLE_TEXT_BOX,
                     page_id=page_id,
                     identifier=story_id,
                     data_id=data_id
                 )
-                continue
+                return
 
             # Need index for content context
             for i, grouped_styles in enumerate(grouped_paragraph_styles):
@@ -552,7 +852,7 @@ class FrontifyChecker:
                     # Add text content so multiple occurrences are merged with text_content arrays combined
                     text_content = [content] if content else None
 
-                    self.results.add_error(
+                    results.add_error(
                         context=message,
                         error_type=ValidationError.PARAGRAPH_STYLE,
                         page_id=page_id,
@@ -561,7 +861,7 @@ class FrontifyChecker:
                         text_content=text_content
                     )
 
-        return States.HYPHENATION_CHECK
+        return StoryRule(States.PAR_CHECK, on_story=on_story)
 
     def generate_context_message(self, content: str, items: Union[List[List['StoryParagraphData']], List[List['StoryCharacterData']]], index: int):
         def get_content_from_item(item):
@@ -596,40 +896,40 @@ class FrontifyChecker:
     # ========================================================================================
 
     def hyphenation_check(self) -> States:
-        hyphenated_default_styles = set()
-
         if not self.stories_exist:
             return States.OVERRIDES_CHECK
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            data_id = story.get_parent_text_frame_id()
-            for par_style in story.get_paragraph_styles():
+        self.run_story_rules([self.hyphenation_rule()])
+        return States.OVERRIDES_CHECK
 
-                style_id = par_style.get_style_id()
-                normalized_style_id = par_style.get_normalized_style_id()
-                has_hyphenation = par_style.has_hyphenation()
+    def hyphenation_rule(self) -> StoryRule:
+        hyphenated_default_styles = set()
 
-                # Collect hyphenated default styles
-                if (style_id in self.default_par_styles) and has_hyphenation:
-                    hyphenated_default_styles.add(style_id)
-                    continue
+        def on_paragraph(results, story, par_index, par_style):
+            style_id = par_style.get_style_id()
+            normalized_style_id = par_style.get_normalized_style_id()
+            has_hyphenation = par_style.has_hyphenation()
 
-                if has_hyphenation:
-                    # Format message with inheritance
-                    par_style_hyph_obj = par_style.get_hyphenation_obj()
-                    inherited_from = par_style_hyph_obj.get_inherited_from_value()
-                    inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
-                    # Add text content so multiple occurrences are merged with text_content arrays combined
-                    text_content = [par_style.get_content()] if par_style.get_content() else None
+            # Collect hyphenated default styles
+            if (style_id in self.default_par_styles) and has_hyphenation:
+                hyphenated_default_styles.add(style_id)
+                return
 
-                    self.results.add_warning(
-                        context=inherited_message,
-                        warning_type=ValidationWarning.HYPHENATION,
-                        page_id=page_id,
-                        identifier=normalized_style_id,
-                        data_id=data_id,
-                        text_content=text_content
-                    )
+            if has_hyphenation:
+                # Format message with inheritance
+                par_style_hyph_obj = par_style.get_hyphenation_obj()
+                inherited_from = par_style_hyph_obj.get_inherited_from_value()
+                inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
+                # Add text content so multiple occurrences are merged with text_content arrays combined
+                text_content = [par_style.get_content()] if par_style.get_content() else None
+
+                results.add_warning(
+                    context=inherited_message,
+                    warning_type=ValidationWarning.HYPHENATION,
+                    page_id=story.get_page(),  # page Self
+                    identifier=normalized_style_id,
+                    data_id=story.get_parent_text_frame_id(),
+                    text_content=text_content
+                )
 
         # if hyphenated_default_styles:
         #     self.results.add_warning(
@@ -637,7 +937,7 @@ class FrontifyChecker:
         #         warning_type=ValidationWarning.HYPHENATION,
         #         page=None,
         #         identifier=normalized_style_id)
-        return States.OVERRIDES_CHECK
+        return StoryRule(States.HYPHENATION_CHECK, on_paragraph=on_paragraph)
 
     # ========================================================================================
     # State: OVERRIDES_CHECK
@@ -648,97 +948,77 @@ class FrontifyChecker:
     # are any, if so, it is an override.
     # ========================================================================================
     def overrides_check(self) -> States:
-        # Many overrides occur from the last or first char having an override, so showing the content isnt helpful.
-        # Would be great to figure out a way to have better context in these situations
-        overrides_default_par = False
         if not self.stories_exist:
             return States.KERNING_CHECK
+        self.run_story_rules([self.overrides_rule()])
+        return States.KERNING_CHECK
 
-        # Need index for content context
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            story_id = story.get_story_id()
-            # Normalize story_id to ensure it's not None (convert to 'null' if None)
-            story_id = story_id if story_id is not None else 'null'
-            paragraph_styles = story.get_paragraph_styles()
+    def overrides_rule(self) -> StoryRule:
+        # Many overrides occur from the last or first char having an override, so showing the content isnt helpful.
+        # Would be great to figure out a way to have better context in these situations
+        # has_char_overrides is per paragraph, reset in on_paragraph
+        paragraph_state = {'has_char_overrides': False}
+
+        def on_paragraph(results, story, par_index, par_style):
+            paragraph_state['has_char_overrides'] = False
+
+        def on_character(results, story, par_style, char_index, char_style):
+            # Check character overrides first to see if there are individual occurrences
+            if not char_style.has_overrides():
+                return
+            paragraph_state['has_char_overrides'] = True
             data_id = story.get_parent_text_frame_id()
-            for par_idx, par_style in enumerate(paragraph_styles):
-
-                has_overrides = par_style.has_overrides()
-                style_id = par_style.get_style_id()
-                if (style_id in self.default_par_styles) and has_overrides:
-                    overrides_default_par = True
-
-                # Check character overrides first to see if there are individual occurrences
-                char_styles = par_style.get_child_char_styles()
-                has_char_overrides = False
-                for char_idx, char_style in enumerate(char_styles):
-                    if char_style.has_overrides():
-                        has_char_overrides = True
-                        content = char_style.get_content()
-
-                        context_message = self.generate_context_message(
-                            content, char_styles, char_idx)
-                        message = f"1. Text where issue is: {content} {context_message} 2. Overrides: {char_style.get_overrides()}"
-                        text_content = [content] if content else None
-                        # Use data_id (text frame ID) as identifier to group overrides by text frame
-                        # Also ensure text_box_data is populated with data_id for frontend to find story content
-                        if data_id and data_id != 'null' and data_id not in self.results.text_box_data:
-                            # Extract story content keyed by data_id so frontend can find it
-                            story_content = story.get_content()
-                            story_page_id = story.get_page_id()
-                            self.results.text_box_data[data_id] = {
-                                "identifier": data_id,
-                                "content": story_content,
-                                "page_id": story_page_id if story_page_id is not None else ""
-                            }
-
-                        self.results.add_warning(
-                            context=message,
-                            warning_type=ValidationWarning.OVERRIDE,
-                            page_id=page_id,
-                            identifier=data_id if data_id and data_id != 'null' else 'null',
-                            data_id=data_id,
-                            text_content=text_content
-                        )
+            content = char_style.get_content()
 
-                # Only report paragraph-level overrides if there are no character-level overrides
-                # This prevents duplicate warnings (one for full item, then individual areas)
-                if has_overrides and not has_char_overrides:
-                    content = par_style.get_content()
-                    context_message = self.generate_context_message(
-                        content, paragraph_styles, par_idx)
-                    message = f"1. Text where issue is:  {content} {context_message} 2. Overrides: {par_style.get_overrides()}"
-                    # Check if content is empty or just space, we need more context as to where the issue is for end user
-                    text_content = [content] if content else None
-                    # Use data_id (text frame ID) as identifier to group overrides by text frame
-                    # Also ensure text_box_data is populated with data_id for frontend to find story content
-                    if data_id and data_id != 'null' and data_id not in self.results.text_box_data:
-                        # Extract story content keyed by data_id so frontend can find it
-                        story_content = story.get_content()
-                        story_page_id = story.get_page_id()
-                        self.results.text_box_data[data_id] = {
-                            "identifier": data_id,
-                            "content": story_content,
-                            "page_id": story_page_id if story_page_id is not None else ""
-                        }
+            context_message = self.generate_context_message(
+                content, par_style.get_child_char_styles(), char_index)
+            message = f"1. Text where issue is: {content} {context_message} 2. Overrides: {char_style.get_overrides()}"
+            text_content = [content] if content else None
+            # Use data_id (text frame ID) as identifier to group overrides by text frame
+            # Also ensure text_box_data is populated with data_id for frontend to find story content
+            results.add_text_box_data(data_id, story)
 
-                    self.results.add_warning(
-                        context=message,
-                        warning_type=ValidationWarning.OVERRIDE,
-                        page_id=page_id,
-                        identifier=data_id if data_id and data_id != 'null' else 'null',
-                        data_id=data_id,
-                        text_content=text_content
-                    )
+            results.add_warning(
+                context=message,
+                warning_type=ValidationWarning.OVERRIDE,
+                page_id=story.get_page(),  # page Self
+                identifier=data_id if data_id and data_id != 'null' else 'null',
+                data_id=data_id,
+                text_content=text_content
+            )
+
+        def on_paragraph_end(results, story, par_index, par_style):
+            # Only report paragraph-level overrides if there are no character-level overrides
+            # This prevents duplicate warnings (one for full item, then individual areas)
+            if not par_style.has_overrides() or paragraph_state['has_char_overrides']:
+                return
+            data_id = story.get_parent_text_frame_id()
+            content = par_style.get_content()
+            context_message = self.generate_context_message(
+                content, story.get_paragraph_styles(), par_index)
+            message = f"1. Text where issue is:  {content} {context_message} 2. Overrides: {par_style.get_overrides()}"
+            # Check if content is empty or just space, we need more context as to where the issue is for end user
+            text_content = [content] if content else None
+            # Use data_id (text frame ID) as identifier to group overrides by text frame
+            # Also ensure text_box_data is populated with data_id for frontend to find story content
+            results.add_text_box_data(data_id, story)
+
+            results.add_warning(
+                context=message,
+                warning_type=ValidationWarning.OVERRIDE,
+                page_id=story.get_page(),  # page Self
+                identifier=data_id if data_id and data_id != 'null' else 'null',
+                data_id=data_id,
+                text_content=text_content
+            )
 
         # if overrides_default_par:
         #     self.results.add_warning(
         #         "Many overrides due to no paragraph style applied to text.",
         #         ValidationWarning.OVERRIDE
         #     )
-
-        return States.KERNING_CHECK
+        return StoryRule(States.OVERRIDES_CHECK, on_paragraph=on_paragraph,
+                         on_character=on_character, on_paragraph_end=on_paragraph_end)
 
     # ========================================================================================
     # State: KERNING_CHECK
@@ -751,53 +1031,48 @@ class FrontifyChecker:
     def kerning_check(self) -> States:
         if not self.stories_exist:
             return States.FONTS_INCLUDED_CHECK
+        self.run_story_rules([self.kerning_rule()])
+        return States.FONTS_INCLUDED_CHECK
 
-        # Need index for content context
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            paragraph_styles = story.get_paragraph_styles()
-            data_id = story.get_parent_text_frame_id()
-            for i, par_style in enumerate(paragraph_styles):
-
-                par_kerning_obj = par_style.get_kerning()
-                par_kerning_val = par_kerning_obj.get_property_value()
-                if par_kerning_val and (par_kerning_val != "Metrics"):
-                    normalized_style_id = par_style.get_normalized_style_id()
-                    inherited_from = par_kerning_obj.get_inherited_from_value()
-                    inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
-                    text_content = [par_style.get_content()] if par_style.get_content() else None
-
-                    self.results.add_error(
-                        context=inherited_message,
-                        error_type=ValidationError.KERNING,
-                        page_id=page_id,
-                        identifier=normalized_style_id,
-                        data_id=data_id,
-                        text_content=text_content
-                    )
+    def kerning_rule(self) -> StoryRule:
+        def on_paragraph(results, story, par_index, par_style):
+            par_kerning_obj = par_style.get_kerning()
+            par_kerning_val = par_kerning_obj.get_property_value()
+            if par_kerning_val and (par_kerning_val != "Metrics"):
+                normalized_style_id = par_style.get_normalized_style_id()
+                inherited_from = par_kerning_obj.get_inherited_from_value()
+                inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
+                text_content = [par_style.get_content()] if par_style.get_content() else None
+
+                results.add_error(
+                    context=inherited_message,
+                    error_type=ValidationError.KERNING,
+                    page_id=story.get_page(),  # page Self
+                    identifier=normalized_style_id,
+                    data_id=story.get_parent_text_frame_id(),
+                    text_content=text_content
+                )
 
-                # Now check character overrides
-                char_styles = par_style.get_child_char_styles()
-
-                for i, char_style in enumerate(char_styles):
-                    char_kerning_obj = char_style.get_kerning()
-                    char_kerning_val = char_kerning_obj.get_property_value()
-                    if char_kerning_val and (char_kerning_val != "Metrics"):
-                        char_normalized_style_id = char_style.get_normalized_style_id()
-                        inherited_from = char_kerning_obj.get_inherited_from_value()
-                        inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
-                        text_content = [char_style.get_content()] if char_style.get_content() else None
-
-                        self.results.add_error(
-                            context=inherited_message,
-                            error_type=ValidationError.KERNING_CHAR,
-                            page_id=page_id,
-                            identifier=char_normalized_style_id,
-                            data_id=data_id,
-                            text_content=text_content
-                        )
+        # Now check character overrides
+        def on_character(results, story, par_style, char_index, char_style):
+            char_kerning_obj = char_style.get_kerning()
+            char_kerning_val = char_kerning_obj.get_property_value()
+            if char_kerning_val and (char_kerning_val != "Metrics"):
+                char_normalized_style_id = char_style.get_normalized_style_id()
+                inherited_from = char_kerning_obj.get_inherited_from_value()
+                inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
+                text_content = [char_style.get_content()] if char_style.get_content() else None
+
+                results.add_error(
+                    context=inherited_message,
+                    error_type=ValidationError.KERNING_CHAR,
+                    page_id=story.get_page(),  # page Self
+                    identifier=char_normalized_style_id,
+                    data_id=story.get_parent_text_frame_id(),
+                    text_content=text_content
+                )
 
-        return States.FONTS_INCLUDED_CHECK
+        return StoryRule(States.KERNING_CHECK, on_paragraph=on_paragraph, on_character=on_character)
 
     # ========================================================================================
     # State: FONTS_INCLUDED_CHECK
@@ -815,8 +1090,8 @@ class FrontifyChecker:
         used_font_families_names = [
             font_obj.get_font_family() for font_obj in used_font_families_objects if not font_obj.is_variable_font()]
 
-        document_font_families = [font_obj.get_font_family(
-        ) for font_obj in self.source_folders_parser.get_document_fonts()]
+        document_font_families = {font_obj.get_font_family(
+        ) for font_obj in self.source_folders_parser.get_document_fonts()}
 
         for used_font in used_font_families_names:
             if used_font not in document_font_families:
@@ -987,26 +1262,22 @@ class FrontifyChecker:
     # If an image is embedded, an error is raised.
     # ========================================================================================
     def embedded_image_check(self) -> States:
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            # Get first page's Self from spread
-            pages = spread.get_pages()
-            spread_page_id = pages[0].get("self", '') if pages and len(pages) > 0 else ''
-            for link in spread.get_links_obj_list():
-                if link.get_stored_state() == 'Embedded':
-                    link_id = link.get_rectangle_link_id()
-                    image_name = link.get_image_name()
-                    # Try to find the specific page_id from data_id, fallback to spread's first page
-                    page_id = self.find_page_id_from_data_id(link_id) if link_id else spread_page_id
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.EMBEDDED_IMAGE,
-                        page_id=page_id,
-                        identifier=image_name,
-                        data_id=link_id
-                    )
-
+        self.run_frame_rules([self.embedded_image_rule()])
         return States.IMAGE_TRANSFORMATION_CHECK
 
+    def embedded_image_rule(self) -> FrameRule:
+        def on_link(results, spread, link, page_id):
+            if link.get_stored_state() == 'Embedded':
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.EMBEDDED_IMAGE,
+                    page_id=page_id,
+                    identifier=link.get_image_name(),
+                    data_id=link.get_rectangle_link_id()
+                )
+
+        return FrameRule(States.EMBEDDED_IMAGE_CHECK, on_link=on_link)
+
     # ========================================================================================
     # State: IMAGE_TRANSFORMATION_CHECK
     # PASS Next State Transition: RESULTS
@@ -1020,72 +1291,70 @@ class FrontifyChecker:
     # transformation, the image affected, and the page where the image is located.
     # ========================================================================================
     def image_transformation_check(self) -> States:
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            # Get first page's Self from spread
-            pages = spread.get_pages()
-            spread_page_id = pages[0].get("self", '') if pages and len(pages) > 0 else ''
-            for link in spread.get_links_obj_list():
-                item_transform = link.get_item_transform()
-                container_transform = link.get_container_item_transform()
-                file_name = link.get_image_name()
-                rectangle_id = link.get_rectangle_link_id()
-                # Try to find the specific page_id from data_id, fallback to spread's first page
-                page_id = self.find_page_id_from_data_id(rectangle_id) if rectangle_id else spread_page_id
-                for idx, asset in enumerate([item_transform, container_transform]):
-                    if asset:
-                        a, b, c, d, e, f = map(float, asset.split())
-                        context = "Image inside Container" if idx == 0 else "Image Container"
-                        # Determine error and warning types based on whether it's the image or container
-                        is_image = (idx == 0)
-                        error_type = ValidationError.IMAGE_TRANSFORMATION_IMAGE if is_image else ValidationError.IMAGE_TRANSFORMATION_CONTAINER
-                        warning_type = ValidationWarning.IMAGE_TRANSFORMATION_IMAGE if is_image else ValidationWarning.IMAGE_TRANSFORMATION_CONTAINER
-                        # Check for rotation
-                        rotation_angle = math.atan2(b, a)
-                        rotation_angle_degrees = math.degrees(rotation_angle)
-                        # Check for horizontal flip
-                        if a < 0 and d > 0 and abs(rotation_angle_degrees) != 180:
-                            message = f"{context} has a horizontal flip transformation."
-                            self.results.add_error(
-                                context=message,
-                                error_type=error_type,
-                                page_id=page_id,
-                                identifier=file_name,
-                                data_id=rectangle_id
-                            )
-                        # Check for vertical flip
-                        elif a > 0 and d < 0 and abs(rotation_angle_degrees) != 180:
-                            message = f"{context} has a vertical flip transformation."
-                            self.results.add_error(
-                                context=message,
-                                error_type=error_type,
-                                page_id=page_id,
-                                identifier=file_name,
-                                data_id=rectangle_id
-                            )
-                        # Warning for only rotation and only flip
-                        elif abs(rotation_angle_degrees) > 0.01:
-                            message = f"{context} has been rotated by {rotation_angle_degrees:.2f} degrees."
-                            self.results.add_warning(
-                                context=message,
-                                warning_type=warning_type,
-                                page_id=page_id,
-                                identifier=file_name,
-                                data_id=rectangle_id
-                            )
-                        # Check for skews
-                            # or not is_rectangle
-                        elif abs(b) > .01 or abs(c) > .01:
-                            message = f"{context} has skew transformations. Skew factors: b={b}, c={c}"
-                            self.results.add_error(
-                                context=message,
-                                error_type=error_type,
-                                page_id=page_id,
-                                identifier=file_name,
-                                data_id=rectangle_id
-                            )
-
+        self.run_frame_rules([self.image_transformation_rule()])
         return States.TABLE_CHECK
 
+    def image_transformation_rule(self) -> FrameRule:
+        def on_link(results, spread, link, page_id):
+            item_transform = link.get_item_transform()
+            container_transform = link.get_container_item_transform()
+            file_name = link.get_image_name()
+            rectangle_id = link.get_rectangle_link_id()
+            for idx, asset in enumerate([item_transform, container_transform]):
+                if asset:
+                    a, b, c, d, e, f = map(float, asset.split())
+                    context = "Image inside Container" if idx == 0 else "Image Container"
+                    # Determine error and warning types based on whether it's the image or container
+                    is_image = (idx == 0)
+                    error_type = ValidationError.IMAGE_TRANSFORMATION_IMAGE if is_image else ValidationError.IMAGE_TRANSFORMATION_CONTAINER
+                    warning_type = ValidationWarning.IMAGE_TRANSFORMATION_IMAGE if is_image else ValidationWarning.IMAGE_TRANSFORMATION_CONTAINER
+                    # Check for rotation
+                    rotation_angle = math.atan2(b, a)
+                    rotation_angle_degrees = math.degrees(rotation_angle)
+                    # Check for horizontal flip
+                    if a < 0 and d > 0 and abs(rotation_angle_degrees) != 180:
+                        message = f"{context} has a horizontal flip transformation."
+                        results.add_error(
+                            context=message,
+                            error_type=error_type,
+                            page_id=page_id,
+                            identifier=file_name,
+                            data_id=rectangle_id
+                        )
+                    # Check for vertical flip
+                    elif a > 0 and d < 0 and abs(rotation_angle_degrees) != 180:
+                        message = f"{context} has a vertical flip transformation."
+                        results.add_error(
+                            context=message,
+                            error_type=error_type,
+                            page_id=page_id,
+                            identifier=file_name,
+                            data_id=rectangle_id
+                        )
+                    # Warning for only rotation and only flip
+                    elif abs(rotation_angle_degrees) > 0.01:
+                        message = f"{context} has been rotated by {rotation_angle_degrees:.2f} degrees."
+                        results.add_warning(
+                            context=message,
+                            warning_type=warning_type,
+                            page_id=page_id,
+                            identifier=file_name,
+                            data_id=rectangle_id
+                        )
+                    # Check for skews
+                        # or not is_rectangle
+                    elif abs(b) > .01 or abs(c) > .01:
+                        message = f"{context} has skew transformations. Skew factors: b={b}, c={c}"
+                        results.add_error(
+                            context=message,
+                            error_type=error_type,
+                            page_id=page_id,
+                            identifier=file_name,
+                            data_id=rectangle_id
+                        )
+
+        return FrameRule(States.IMAGE_TRANSFORMATION_CHECK, on_link=on_link)
+
     # ========================================================================================
     # State: TABLE_CHECK
     # PASS Next State Transition: PASTED_GRAPHICS_CHECK
@@ -1095,22 +1364,22 @@ class FrontifyChecker:
     def table_check(self) -> States:
         if not self.stories_exist:
             return States.PASTED_GRAPHICS_CHECK
-        for story in self.stories_parser.get_stories_data():
-            for char_style in story.get_character_styles():
-                if char_style.has_table():
-                    data_id = story.get_parent_text_frame_id()
-                    story_id = story.get_story_id()
-                    page_id = story.get_page()  # page Self
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.TABLE,
-                        page_id=page_id,
-                        identifier=story_id,
-                        data_id=data_id
-                    )
-
+        self.run_story_rules([self.table_rule()])
         return States.PASTED_GRAPHICS_CHECK
 
+    def table_rule(self) -> StoryRule:
+        def on_character(results, story, par_style, char_index, char_style):
+            if char_style.has_table():
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.TABLE,
+                    page_id=story.get_page(),  # page Self
+                    identifier=story.get_story_id(),
+                    data_id=story.get_parent_text_frame_id()
+                )
+
+        return StoryRule(States.TABLE_CHECK, on_character=on_character)
+
     # ========================================================================================
     # State: PASTED_GRAPHICS_CHECK
     # PASS Next State Transition: BLEED_CHECK
@@ -1181,77 +1450,80 @@ class FrontifyChecker:
     def auto_size_text_box_check(self) -> States:
         if not self.stories_exist:
             return States.TEXT_COLUMNS_CHECK
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.get_text_frame_obj_list():
-                if text_frame.get_is_auto_size():
-                    # Verify not auto sizing from center
-                    story = text_frame.get_parent_story_obj()
-                    story_page_id = story.get_page()  # page Self
-                    story_id = story.get_story_id()
-                    data_id = text_frame.get_frame_id()
-                    use_line_breaks = text_frame.get_use_no_line_breaks()
-                    if text_frame.get_auto_sizing_type() == 'HeightOnly':
-                        if text_frame.get_auto_sizing_reference_point() not in ['TopCenterPoint', 'BottomCenterPoint']:
-                            message = "HeightOnly cannot autosize from center."
-                            self.results.add_error(
-                                context=message,
-                                error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                                page_id=story_page_id,
-                                identifier=story_id,
-                                data_id=data_id
-                            )
-                    elif text_frame.get_auto_sizing_type() == 'WidthOnly':
-                        if not use_line_breaks or use_line_breaks == 'false':
-                            message = "'No Line Breaks' must be checked."
-                            self.results.add_error(
-                                context=message,
-                                error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                                page_id=story_page_id,
-                                identifier=story_id,
-                                data_id=data_id)
-                            # InDesign has weird behavior, and changes the reference point if 'No Line Breaks' is not checked. So we will just break here.
-                            continue
-                        if text_frame.get_auto_sizing_reference_point() not in ['LeftCenterPoint', 'RightCenterPoint']:
-                            message = "WidthOnly cannot autosize from center."
-                            self.results.add_error(
-                                context=message,
-                                error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                                page_id=story_page_id,
-                                identifier=story_id,
-                                data_id=data_id
-                            )
-                    elif text_frame.get_auto_sizing_type() == 'HeightAndWidth':
-                        if not use_line_breaks or use_line_breaks == 'false':
-                            message = "'No Line Breaks' must be checked."
-                            self.results.add_error(
-                                context=message,
-                                error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                                page_id=story_page_id,
-                                identifier=story_id,
-                                data_id=data_id
-                            )
-                            # InDesign has weird behavior, and changes the reference point if 'No Line Breaks' is not checked. So we will just break here.
-                            continue
-                        if text_frame.get_auto_sizing_reference_point() not in ['TopLeftPoint', 'BottomLeftPoint', 'BottomRightPoint', 'TopRightPoint']:
-                            message = "HeightAndWidth must auto size from corners."
-                            self.results.add_error(
-                                context=message,
-                                error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                                page_id=story_page_id,
-                                identifier=story_id,
-                                data_id=data_id)
-                    else:
-                        message = "Only width, height, and WidthAndHeight are supported."
-                        self.results.add_error(
-                            context=message,
-                            error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
-                            page_id=story_page_id,
-                            identifier=story_id,
-                            data_id=data_id
-                        )
-
+        self.run_frame_rules([self.auto_size_text_box_rule()])
         return States.TEXT_COLUMNS_CHECK
 
+    def auto_size_text_box_rule(self) -> FrameRule:
+        def on_text_frame(results, spread, text_frame, story):
+            if not text_frame.get_is_auto_size():
+                return
+            # Verify not auto sizing from center
+            story_page_id = story.get_page()  # page Self
+            story_id = story.get_story_id()
+            data_id = text_frame.get_frame_id()
+            use_line_breaks = text_frame.get_use_no_line_breaks()
+            if text_frame.get_auto_sizing_type() == 'HeightOnly':
+                if text_frame.get_auto_sizing_reference_point() not in ['TopCenterPoint', 'BottomCenterPoint']:
+                    message = "HeightOnly cannot autosize from center."
+                    results.add_error(
+                        context=message,
+                        error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                        page_id=story_page_id,
+                        identifier=story_id,
+                        data_id=data_id
+                    )
+            elif text_frame.get_auto_sizing_type() == 'WidthOnly':
+                if not use_line_breaks or use_line_breaks == 'false':
+                    message = "'No Line Breaks' must be checked."
+                    results.add_error(
+                        context=message,
+                        error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                        page_id=story_page_id,
+                        identifier=story_id,
+                        data_id=data_id)
+                    # InDesign has weird behavior, and changes the reference point if 'No Line Breaks' is not checked. So we will just break here.
+                    return
+                if text_frame.get_auto_sizing_reference_point() not in ['LeftCenterPoint', 'RightCenterPoint']:
+                    message = "WidthOnly cannot autosize from center."
+                    results.add_error(
+                        context=message,
+                        error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                        page_id=story_page_id,
+                        identifier=story_id,
+                        data_id=data_id
+                    )
+            elif text_frame.get_auto_sizing_type() == 'HeightAndWidth':
+                if not use_line_breaks or use_line_breaks == 'false':
+                    message = "'No Line Breaks' must be checked."
+                    results.add_error(
+                        context=message,
+                        error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                        page_id=story_page_id,
+                        identifier=story_id,
+                        data_id=data_id
+                    )
+                    # InDesign has weird behavior, and changes the reference point if 'No Line Breaks' is not checked. So we will just break here.
+                    return
+                if text_frame.get_auto_sizing_reference_point() not in ['TopLeftPoint', 'BottomLeftPoint', 'BottomRightPoint', 'TopRightPoint']:
+                    message = "HeightAndWidth must auto size from corners."
+                    results.add_error(
+                        context=message,
+                        error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                        page_id=story_page_id,
+                        identifier=story_id,
+                        data_id=data_id)
+            else:
+                message = "Only width, height, and WidthAndHeight are supported."
+                results.add_error(
+                    context=message,
+                    error_type=ValidationError.AUTO_SIZE_TEXT_BOX,
+                    page_id=story_page_id,
+                    identifier=story_id,
+                    data_id=data_id
+                )
+
+        return FrameRule(States.AUTO_SIZE_TEXT_BOX_CHECK, on_text_frame=on_text_frame, needs_stories=True)
+
     # ========================================================================================
     # State: TEXT_COLUMNS_CHECK
     # PASS Next State Transition: TEXT_WRAP_CHECK
@@ -1262,24 +1534,22 @@ class FrontifyChecker:
     def text_columns_check(self) -> States:
         if not self.stories_exist:
             return States.LINKED_TEXT_FRAME_CHECK
+        self.run_frame_rules([self.text_columns_rule()])
+        return States.TEXT_WRAP_CHECK
 
+    def text_columns_rule(self) -> FrameRule:
         # Just checking columns, not fixed width column settings
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.get_text_frame_obj_list():
-                if text_frame.get_text_column_count() and text_frame.get_text_column_count() != '1':
-                    story = text_frame.get_parent_story_obj()
-                    story_id = story.get_story_id()
-                    story_page_id = story.get_page()  # page Self
-                    data_id = text_frame.get_frame_id()
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.TEXT_COLUMNS,
-                        page_id=story_page_id,
-                        identifier=story_id,
-                        data_id=data_id
-                    )
+        def on_text_frame(results, spread, text_frame, story):
+            if text_frame.get_text_column_count() and text_frame.get_text_column_count() != '1':
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.TEXT_COLUMNS,
+                    page_id=story.get_page(),  # page Self
+                    identifier=story.get_story_id(),
+                    data_id=text_frame.get_frame_id()
+                )
 
-        return States.TEXT_WRAP_CHECK
+        return FrameRule(States.TEXT_COLUMNS_CHECK, on_text_frame=on_text_frame, needs_stories=True)
 
     # ========================================================================================
     # State: TEXT_WRAP_CHECK
@@ -1291,25 +1561,23 @@ class FrontifyChecker:
     def text_wrap_check(self) -> States:
         if not self.stories_exist:
             return States.LINKED_TEXT_FRAME_CHECK
+        self.run_frame_rules([self.text_wrap_rule()])
+        return States.LINKED_TEXT_FRAME_CHECK
 
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.get_text_frame_obj_list():
-                text_wrap_mode = text_frame.get_text_wrap_mode()
-                if text_wrap_mode != 'None':
-                    story = text_frame.get_parent_story_obj()
-                    story_id = story.get_story_id()
-                    story_page_id = story.get_page()  # page Self
-                    data_id = text_frame.get_frame_id()
-                    message = f"Text box wrap is '{text_wrap_mode}' not None."
-                    self.results.add_error(
-                        context=message,
-                        error_type=ValidationError.TEXT_WRAP,
-                        page_id=story_page_id,
-                        identifier=story_id,
-                        data_id=data_id
-                    )
+    def text_wrap_rule(self) -> FrameRule:
+        def on_text_frame(results, spread, text_frame, story):
+            text_wrap_mode = text_frame.get_text_wrap_mode()
+            if text_wrap_mode != 'None':
+                message = f"Text box wrap is '{text_wrap_mode}' not None."
+                results.add_error(
+                    context=message,
+                    error_type=ValidationError.TEXT_WRAP,
+                    page_id=story.get_page(),  # page Self
+                    identifier=story.get_story_id(),
+                    data_id=text_frame.get_frame_id()
+                )
 
-        return States.LINKED_TEXT_FRAME_CHECK
+        return FrameRule(States.TEXT_WRAP_CHECK, on_text_frame=on_text_frame, needs_stories=True)
 
     # ========================================================================================
     # State: LINKED_TEXT_FRAME_CHECK
@@ -1321,25 +1589,22 @@ class FrontifyChecker:
     def linked_text_frame_check(self) -> States:
         if not self.stories_exist:
             return States.OBJECT_STYLE_CHECK
+        self.run_frame_rules([self.linked_text_frame_rule()])
+        return States.OBJECT_STYLE_CHECK
 
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.get_text_frame_obj_list():
-                if text_frame.get_is_linked_text_frame():
-                    story = text_frame.get_parent_story_obj()
-                    # frame_id = text_frame.get_frame_id() TO DO
-                    story_id = story.get_story_id()
-                    story_content = story.get_story_text_content()
-                    story_page_id = story.get_page()  # page Self
-                    data_id = text_frame.get_frame_id()
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.LINKED_TEXT_FRAME,
-                        page_id=story_page_id,
-                        identifier=story_id,
-                        data_id=data_id
-                    )
+    def linked_text_frame_rule(self) -> FrameRule:
+        def on_text_frame(results, spread, text_frame, story):
+            if text_frame.get_is_linked_text_frame():
+                # frame_id = text_frame.get_frame_id() TO DO
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.LINKED_TEXT_FRAME,
+                    page_id=story.get_page(),  # page Self
+                    identifier=story.get_story_id(),
+                    data_id=text_frame.get_frame_id()
+                )
 
-        return States.OBJECT_STYLE_CHECK
+        return FrameRule(States.LINKED_TEXT_FRAME_CHECK, on_text_frame=on_text_frame, needs_stories=True)
 
     # ========================================================================================
     # State: OBJECT_STYLE_CHECK
@@ -1351,50 +1616,43 @@ class FrontifyChecker:
     # ========================================================================================
     def object_style_check(self) -> States:
         # ONLY CHECKS TEXT FRAMES AND IMAGES
+        self.run_frame_rules([self.object_style_rule()])
+        return States.GRID_ALIGNMENT_CHECK
 
+    def object_style_rule(self) -> FrameRule:
         # Check Text Frames
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            for text_frame in spread.get_text_frame_obj_list():
-                if text_frame.get_applied_object_style() not in self.default_object_styles:
-                    story = text_frame.get_parent_story_obj()
-                    story_page_id = story.get_page()  # page Self
-                    data_id = text_frame.get_frame_id()
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.OBJECT_STYLE_TEXT,
-                        page_id=story_page_id,
-                        identifier=None,
-                        data_id=data_id
-                    )
+        def on_text_frame(results, spread, text_frame, story):
+            if text_frame.get_applied_object_style() not in self.default_object_styles:
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.OBJECT_STYLE_TEXT,
+                    page_id=story.get_page(),  # page Self
+                    identifier=None,
+                    data_id=text_frame.get_frame_id()
+                )
 
-        for spread in self.spreads_parser.get_spreads_obj_list():
-            # Get first page's Self from spread
-            pages = spread.get_pages()
-            spread_page_id = pages[0].get("self", '') if pages and len(pages) > 0 else ''
-            for link in spread.get_links_obj_list():
-                rectangle_id = link.get_rectangle_link_id()
-                # Try to find the specific page_id from data_id, fallback to spread's first page
-                page_id = self.find_page_id_from_data_id(rectangle_id) if rectangle_id else spread_page_id
-                if link.get_image_object_style() not in self.default_object_styles:
-                    image_name = link.get_image_name()
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.OBJECT_STYLE_IMAGE,
-                        page_id=page_id,
-                        identifier=image_name,
-                        data_id=rectangle_id
-                    )
-                if link.get_container_object_style() not in self.default_object_styles:
-                    image_name = link.get_image_name()
-                    self.results.add_error(
-                        context=None,
-                        error_type=ValidationError.OBJECT_STYLE_IMAGE,
-                        page_id=page_id,
-                        identifier=image_name,
-                        data_id=rectangle_id
-                    )
+        def on_link(results, spread, link, page_id):
+            rectangle_id = link.get_rectangle_link_id()
+            if link.get_image_object_style() not in self.default_object_styles:
+                image_name = link.get_image_name()
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.OBJECT_STYLE_IMAGE,
+                    page_id=page_id,
+                    identifier=image_name,
+                    data_id=rectangle_id
+                )
+            if link.get_container_object_style() not in self.default_object_styles:
+                image_name = link.get_image_name()
+                results.add_error(
+                    context=None,
+                    error_type=ValidationError.OBJECT_STYLE_IMAGE,
+                    page_id=page_id,
+                    identifier=image_name,
+                    data_id=rectangle_id
+                )
 
-        return States.GRID_ALIGNMENT_CHECK
+        return FrameRule(States.OBJECT_STYLE_CHECK, on_text_frame=on_text_frame, on_link=on_link)
 
     # ========================================================================================
     # State: GRID_ALIGNMENT_CHECK
@@ -1406,29 +1664,32 @@ class FrontifyChecker:
     def grid_alignment_check(self) -> States:
         if not self.stories_exist:
             return States.COMPOSER_CHECK
+        self.run_story_rules([self.grid_alignment_rule()])
+        return States.COMPOSER_CHECK
+
+    def grid_alignment_rule(self) -> StoryRule:
         styles_with_errors = set()  # Only throw 1 error for a paragraph style
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            for par_style in story.get_paragraph_styles():
-                grid_alignment = par_style.get_grid_alignment()
-                normalized_style_id = par_style.get_normalized_style_id()
-                if grid_alignment != 'None' and normalized_style_id not in styles_with_errors:
-                    styles_with_errors.add(normalized_style_id)
-                    data_id = story.get_parent_text_frame_id()
-                    # Format message with inheritance
-                    par_style_grid_align_obj = par_style.get_grid_alignment_obj()
-                    inherited_from = par_style_grid_align_obj.get_inherited_from_value()
-                    inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
 
-                    self.results.add_error(
-                        context=inherited_message,
-                        error_type=ValidationError.GRID_ALIGNMENT,
-                        page_id=page_id,
-                        identifier=normalized_style_id,
-                        data_id=data_id
-                    )
+        def on_paragraph(results, story, par_index, par_style):
+            grid_alignment = par_style.get_grid_alignment()
+            normalized_style_id = par_style.get_normalized_style_id()
+            if grid_alignment != 'None' and normalized_style_id not in styles_with_errors:
+                styles_with_errors.add(normalized_style_id)
+                data_id = story.get_parent_text_frame_id()
+                # Format message with inheritance
+                par_style_grid_align_obj = par_style.get_grid_alignment_obj()
+                inherited_from = par_style_grid_align_obj.get_inherited_from_value()
+                inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
+
+                results.add_error(
+                    context=inherited_message,
+                    error_type=ValidationError.GRID_ALIGNMENT,
+                    page_id=story.get_page(),  # page Self
+                    identifier=normalized_style_id,
+                    data_id=data_id
+                )
 
-        return States.COMPOSER_CHECK
+        return StoryRule(States.GRID_ALIGNMENT_CHECK, on_paragraph=on_paragraph)
 
     # ========================================================================================
     # State: COMPOSER_CHECK
@@ -1440,29 +1701,32 @@ class FrontifyChecker:
     def composer_check(self) -> States:
         if not self.stories_exist:
             return States.OTHER_CHECKS
+        self.run_story_rules([self.composer_rule()])
+        return States.OTHER_CHECKS
+
+    def composer_rule(self) -> StoryRule:
         styles_with_errors = set()  # Only throw 1 error for a paragraph style
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            for par_style in story.get_paragraph_styles():
-                composer = par_style.get_composer()
-                normalized_style_id = par_style.get_normalized_style_id()
-                if composer != 'HL Single' and normalized_style_id not in styles_with_errors:
-                    styles_with_errors.add(normalized_style_id)
-                    data_id = story.get_parent_text_frame_id()
-                    # Format message with inheritance
-                    par_style_composer_obj = par_style.get_composer_obj()
-                    inherited_from = par_style_composer_obj.get_inherited_from_value()
-                    inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
 
-                    self.results.add_warning(
-                        context=inherited_message,
-                        warning_type=ValidationWarning.COMPOSER,
-                        page_id=page_id,
-                        identifier=normalized_style_id,
-                        data_id=data_id
-                    )
+        def on_paragraph(results, story, par_index, par_style):
+            composer = par_style.get_composer()
+            normalized_style_id = par_style.get_normalized_style_id()
+            if composer != 'HL Single' and normalized_style_id not in styles_with_errors:
+                styles_with_errors.add(normalized_style_id)
+                data_id = story.get_parent_text_frame_id()
+                # Format message with inheritance
+                par_style_composer_obj = par_style.get_composer_obj()
+                inherited_from = par_style_composer_obj.get_inherited_from_value()
+                inherited_message = f'Inherited from: {inherited_from}' if inherited_from else ''
+
+                results.add_warning(
+                    context=inherited_message,
+                    warning_type=ValidationWarning.COMPOSER,
+                    page_id=story.get_page(),  # page Self
+                    identifier=normalized_style_id,
+                    data_id=data_id
+                )
 
-        return States.OTHER_CHECKS
+        return StoryRule(States.COMPOSER_CHECK, on_paragraph=on_paragraph)
 
     # ========================================================================================
     # State: OTHER_CHECKS
@@ -1473,33 +1737,34 @@ class FrontifyChecker:
 
         if not self.stories_exist:
             return States.RESULTS
+        self.run_story_rules([self.other_rule()])
+        return States.RESULTS
+
+    def other_rule(self) -> StoryRule:
         styles_with_errors = set()  # Only throw 1 error for a paragraph style
-        for story in self.stories_parser.get_stories_data():
-            page_id = story.get_page()  # page Self
-            for par_style in story.get_paragraph_styles():
-                filltint = par_style.get_filltint()
-                filltintobj = par_style.get_filltint_obj()
-                print(filltintobj)
-                normalized_style_id = par_style.get_normalized_style_id()
-                if filltint not in [None, '-1', '100'] and normalized_style_id not in styles_with_errors:
-                    styles_with_errors.add(normalized_style_id)
-                    data_id = story.get_parent_text_frame_id()
-                    # Format message with inheritance
-                    par_style_filltint_obj = par_style.get_filltint_obj()
-                    inherited_from = par_style_filltint_obj.get_inherited_from_value()
-                    # inherited_message = f'Fill Tint is: {filltint}'
-                    if inherited_from:
-                        inherited_message += f'; Inherited from: {inherited_from}'
 
-                    self.results.add_error(
-                        context=inherited_message,
-                        error_type=ValidationError.FILL_TINT,
-                        page_id=page_id,
-                        identifier=normalized_style_id,
-                        data_id=data_id
-                    )
+        def on_paragraph(results, story, par_index, par_style):
+            filltint = par_style.get_filltint()
+            normalized_style_id = par_style.get_normalized_style_id()
+            if filltint not in [None, '-1', '100'] and normalized_style_id not in styles_with_errors:
+                styles_with_errors.add(normalized_style_id)
+                data_id = story.get_parent_text_frame_id()
+                # Format message with inheritance
+                par_style_filltint_obj = par_style.get_filltint_obj()
+                inherited_from = par_style_filltint_obj.get_inherited_from_value()
+                # inherited_message = f'Fill Tint is: {filltint}'
+                if inherited_from:
+                    inherited_message += f'; Inherited from: {inherited_from}'
+
+                results.add_error(
+                    context=inherited_message,
+                    error_type=ValidationError.FILL_TINT,
+                    page_id=story.get_page(),  # page Self
+                    identifier=normalized_style_id,
+                    data_id=data_id
+                )
 
-        return States.RESULTS
+        return StoryRule(States.OTHER_CHECKS, on_paragraph=on_paragraph)
 
     def results_analytics(self) -> States:
 
@@ -1616,13 +1881,65 @@ class FrontifyChecker:
     def set_source_file_path(self, source_path: str):
         self.source_file_path = source_path
 
+    def set_workspace_folder(self, workspace_folder: str):
+        self.workspace_folder = workspace_folder
+
+    def set_in_archive_mode(self, in_archive_mode: bool):
+        self.in_archive_mode = in_archive_mode
+
+    def set_part_cache(self, part_cache: PartCache):
+        self.part_cache = part_cache
+
+    def set_parse_workers(self, parse_workers: int):
+        self.parse_workers = parse_workers
+
+    def set_check_workers(self, check_workers: int):
+        self.check_workers = check_workers
+
+    def set_checks(self, checks: List[States]):
+        """Only run these check states (not in chain mode), None runs all of them."""
+        if checks is None:
+            self.check_scheduler = CheckScheduler()
+            return
+        registry = [spec for spec in CHECK_REGISTRY if spec.state in checks]
+        if not registry:
+            raise ValueError('No registered checks selected')
+        self.check_scheduler = CheckScheduler(registry)
+
+    def set_check_chain_mode(self, check_chain_mode: bool):
+        self.check_chain_mode = check_chain_mode
+
+    def set_trace_memory(self, trace_memory: bool):
+        """Record the tracemalloc peak of every state (slows the run down)."""
+        self.stage_timings.trace_memory = trace_memory
+
+    def set_progress_listener(self, progress_listener: Callable[[dict], None]):
+        """Listener for stage events and, through the results, finding events."""
+        self.progress_listener = progress_listener
+        self._results.set_progress_listener(progress_listener)
+
+    def set_thread_results(self, recorder: ResultRecorder):
+        self._thread_results.recorder = recorder
+
     def get_template_name(self):
         return self.template_name
 
     def get_unarchived_idml_path(self):
         return self.idml_output_folder
 
+    def close_archives(self):
+        if self.idml_archive.zip_ref:
+            self.idml_archive.zip_ref.close()
+            self.idml_archive = IdmlArchive()
+        if self._idml_spool:
+            self._idml_spool.close()
+            self._idml_spool = None
+        if self.package_archive:
+            self.package_archive.close()
+            self.package_archive = None
+
     def delete_unzipped_root_path(self):
+        self.close_archives()
         try:
             # Check if the path exists and is a directory
             if os.path.isdir(self.unzipped_root_path):
@@ -1641,8 +1958,8 @@ class FrontifyChecker:
             import time
             zip_file_name = "xml_output.zip"
 
-            # Create ZIP in temp directory (outside of unzipped_root_path) to avoid cleanup conflicts
-            temp_dir = tempfile.gettempdir()
+            # Create ZIP in the workspace or temp directory (outside of unzipped_root_path) to avoid cleanup conflicts
+            temp_dir = self.workspace_folder if self.workspace_folder else tempfile.gettempdir()
             zip_file_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{zip_file_name}")
 
             # Ensure the output folder exists
@@ -0,0 +1,102 @@
+import os
+import zlib
+import zipfile
+from typing import IO, List, Optional, Tuple
+from lxml import etree as ET
+
+
+# **********************************************************
+# Class: IdmlArchive
+# Init Locations: FrontifyChecker
+# Methods calls from: SpreadsParser, StoriesParser, StylesParser, FontsParser,
+# PreferencesParser, MasterPageParser
+# Method calls to:
+# Description: Reads IDML parts for the parsers. Parts are read either from
+# the unarchived 'Source XML' folder on disk, or straight from the .idml
+# ZipFile when the checker runs in in-archive mode. Paths are relative to the
+# IDML root (e.g. 'Spreads', 'Resources/Fonts.xml').
+# **********************************************************
+class IdmlArchive:
+    def __init__(self, root: str = '', zip_ref: Optional[zipfile.ZipFile] = None):
+        self.root: str = root
+        self.zip_ref: Optional[zipfile.ZipFile] = zip_ref
+        self.member_names: List[str] = [
+            name for name in zip_ref.namelist() if not name.endswith('/')] if zip_ref else []
+
+    # ---------------- Private Setters------------------
+    def _resolve(self, path: str) -> str:
+        if self.zip_ref:
+            return path.replace('\\', '/').strip('/')
+        return os.path.join(self.root, path) if self.root else path
+
+    # ----------------Getters------------------
+    def is_in_archive(self) -> bool:
+        return self.zip_ref is not None
+
+    def exists(self, path: str) -> bool:
+        """Returns True if the file exists."""
+        resolved_path = self._resolve(path)
+        if self.zip_ref:
+            return resolved_path in self.member_names
+        return os.path.isfile(resolved_path)
+
+    def is_dir(self, path: str) -> bool:
+        """Returns True if the folder exists (zip folders only exist through their members)."""
+        resolved_path = self._resolve(path)
+        if self.zip_ref:
+            prefix = resolved_path + '/'
+            return any(name.startswith(prefix) for name in self.member_names)
+        return os.path.isdir(resolved_path)
+
+    def list_files(self, folder: str, extension: str = '.xml') -> List[str]:
+        """Returns the paths of the files directly inside folder, in archive (or listdir) order."""
+        if self.zip_ref:
+            prefix = self._resolve(folder) + '/'
+            file_names = [name[len(prefix):] for name in self.member_names
+                          if name.startswith(prefix) and '/' not in name[len(prefix):]]
+        else:
+            file_names = os.listdir(self._resolve(folder))
+        return [self.join(folder, file_name) for file_name in file_names
+                if file_name.endswith(extension)]
+
+    def read(self, path: str) -> bytes:
+        """Returns the file's contents."""
+        with self.open(path) as member_file:
+            return member_file.read()
+
+    def get_size(self, path: str) -> int:
+        """Returns the uncompressed size of the file."""
+        if self.zip_ref:
+            return self.zip_ref.getinfo(self._resolve(path)).file_size
+        return os.path.getsize(self._resolve(path))
+
+    def member_key(self, path: str) -> Tuple[int, int]:
+        """Returns (CRC-32, size) of the file. Zip members use the central directory values."""
+        if self.zip_ref:
+            info = self.zip_ref.getinfo(self._resolve(path))
+            return info.CRC, info.file_size
+        crc = 0
+        size = 0
+        with self.open(path) as member_file:
+            for chunk in iter(lambda: member_file.read(1024 * 1024), b''):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+        return crc, size
+
+    def join(self, *parts: str) -> str:
+        if self.zip_ref:
+            return '/'.join(part.strip('/') for part in parts if part)
+        return os.path.join(*parts)
+
+    def open(self, path: str) -> IO[bytes]:
+        """Opens the file for binary reading."""
+        if self.zip_ref:
+            return self.zip_ref.open(self._resolve(path))
+        return open(self._resolve(path), 'rb')
+
+    def parse(self, path: str, parser: ET.XMLParser = None) -> ET._ElementTree:
+        """Parses the XML file. Files on disk are handed to lxml by path."""
+        if self.zip_ref:
+            with self.open(path) as xml_file:
+                return ET.parse(xml_file, parser)
+        return ET.parse(self._resolve(path), parser)
@@ -9,11 +9,13 @@ import os
 # Description: A class to represent and manage image data.
 # **********************************************************
 class Image:
-    def __init__(self, image_path: str):
+    def __init__(self, image_path: str, image_size_bytes: int = None):
         self.image_path = image_path
         self.image_name: str = os.path.basename(image_path)
         self.image_extension: str = os.path.splitext(self.image_name)[1]
-        self.image_size_bytes: int = os.path.getsize(image_path)
+        # Size is passed in when the image is still inside the package ZIP (ZipInfo.file_size)
+        self.image_size_bytes: int = image_size_bytes if image_size_bytes is not None else os.path.getsize(
+            image_path)
         self.image_size_MB: int = self._convert_bytes_to_MB()
         self.parent_link_data_id: str = ''
         print(self.image_name)
@@ -0,0 +1,71 @@
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+
+# **********************************************************
+# Class: PartCache
+# Init Locations: app (one per worker process)
+# Methods calls from: FrontifyChecker, SpreadsParser, StoriesParser
+# Method calls to:
+# Description: Keeps parsed IDML parts (SpreadData, StoryData,
+# StylesParser, FontsParser) between runs, keyed by the member's
+# CRC-32 and size. A revised template only re-parses the members that
+# changed. Parts are stored pickled, so every run gets its own copy to
+# mutate (text frame mapping, page ids, used fonts).
+# **********************************************************
+class PartCache:
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes: int = max_bytes
+        self.total_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------------- Private Setters------------------
+    def _store(self, key: Tuple, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self.total_bytes += len(payload)
+            while self.total_bytes > self.max_bytes:
+                _, evicted_payload = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted_payload)
+
+    # ---------------- External Setters------------------
+    def put(self, key: Tuple, part: Any):
+        # Pickle straight away, before the run starts mutating the part
+        self._store(key, pickle.dumps(part, pickle.HIGHEST_PROTOCOL))
+
+    def get_or_build(self, key: Tuple, build: Callable[[], Any]) -> Any:
+        """Returns a fresh copy of the cached part, or builds and caches it."""
+        part = self.get(key)
+        if part is None:
+            part = build()
+            self.put(key, part)
+        return part
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    # ----------------Getters------------------
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Returns a fresh copy of the cached part, or None."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(payload)
+
+    def get_entry_count(self) -> int:
+        return len(self._entries)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, IO
 import os
 from lxml import etree as ET
 from src.classes.FontFamily import FontFamily
@@ -15,17 +15,19 @@ from fontTools.ttLib import TTFont
 
 
 class SourceFontFamily(FontFamily):
-    def __init__(self, file_name: str, document_links_folder_path: str):
+    def __init__(self, file_name: str, document_links_folder_path: str, font_file: IO[bytes] = None):
         super().__init__()
         self.font_error: bool = False
         self.extension: str = ''
-        self._extract_fonts(file_name, document_links_folder_path)
+        self._extract_fonts(file_name, document_links_folder_path, font_file)
 
     # ---------------- Private Setters------------------
-    def _extract_fonts(self, file_name: str, document_links_folder_path: str):
+    def _extract_fonts(self, file_name: str, document_links_folder_path: str, font_file: IO[bytes] = None):
         self.extension = os.path.splitext(file_name)[1].lower()
 
-        font_path = os.path.join(document_links_folder_path, file_name)
+        # Fonts still inside the package ZIP are handed over as a file object
+        font_path = font_file if font_file else os.path.join(
+            document_links_folder_path, file_name)
 
         try:
             font = TTFont(font_path)
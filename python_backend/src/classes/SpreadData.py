@@ -26,7 +26,36 @@ class SpreadData:
 
     # ---------------- Private Setters------------------
     def _extract_spread_data(self, root: Element):
-        spread = root.find(".//Spread")
+        # Single walk over the spread tree collecting everything the checks need
+        spread = None
+        child_stories: Dict[str, None] = {}  # Ordered set of story ids
+        rectangles: List[Element] = []
+        rectangles_with_link = set()
+        for element in root.iterdescendants():
+            tag = element.tag
+            if not isinstance(tag, str):  # Comments and processing instructions
+                continue
+
+            story_id = element.get("ParentStory")
+            if story_id:
+                child_stories[story_id] = None
+
+            if tag == 'Spread':
+                if spread is None:
+                    spread = element
+            elif tag == 'Rectangle':
+                rectangles.append(element)
+            elif tag == 'TextFrame':
+                self.text_frame_obj_list.append(TextFrame(element))
+            elif tag == 'Link':
+                try:
+                    link_obj = Link(element)
+                except Exception as e:
+                    print(f"Link data error: {e}")
+                self.links_obj_list.append(link_obj)
+                # Rectangles holding a link are not pasted graphics
+                rectangles_with_link.update(
+                    element.iterancestors('Rectangle'))
 
         # Extract Spread Self
         self.spread_self = spread.get("Self") if spread is not None else ''
@@ -53,72 +82,34 @@ class SpreadData:
             # Set Geometric bounds from first page
             self.geometric_bounds = first_page.get("GeometricBounds", '')
 
-        # Extract links and associate them with spread_data
-        extracted_links = self._extract_links_data(root)
-        self.links_obj_list = extracted_links
-
-        # Find Pasted Graphics num
-        self.pasted_graphics_num = self._extract_pasted_graphics_data(
-            root)
-
         # Extract all stories associated with this page
-        for story_element in root.findall(f".//*[@ParentStory]"):
-            story_id = story_element.get("ParentStory")
-            if story_id:
-                self._add_story(story_id)
-
-        # Extract Text Frames
-        self.text_frame_obj_list = self._extract_text_frames(root)
+        self.child_stories = list(child_stories)
 
-    def _extract_pasted_graphics_data(self, root: Element) -> int:
-        pasted_graphics_num = 0
-
-        # Loop through all the <Rectangle> elements.
-        for rectangle_element in root.findall(".//Rectangle"):
+        # Find Pasted Graphics num
+        self.pasted_graphics_num = sum(
+            1 for rectangle_element in rectangles
             # Pasted Graphics do not have a link, while QR codes and such do.
-            if rectangle_element.find('.//Link') is None:
-                # Check for children <PDF>, <EPS>, or <Image>.
-                for graphic_type in ['PDF', 'EPS', 'Image']:
-                    graphic_element = rectangle_element.find(graphic_type)
-
-                    if graphic_element is not None:
-                        # Check the child <Properties> of the graphic element.
-                        properties_element = graphic_element.find('Properties')
-
-                        if properties_element is not None:
-                            # Check the <Content> child of the <Properties> element.
-                            content_element = properties_element.find(
-                                'Contents')
-
-                            if content_element is not None and content_element.text:
-                                # If the <Content> has any text, increment the counter.
-                                pasted_graphics_num += 1
-                                # No need to check other graphic types for this rectangle.
-                                break
-
-        return pasted_graphics_num
-
-    def _extract_links_data(self, root: Element) -> List[Link]:
-        links_obj_list = []
-        for link_element in root.findall(".//Link"):
-            try:
-                link_obj = Link(link_element)
-            except Exception as e:
-                print(f"Link data error: {e}")
-            links_obj_list.append(link_obj)
-
-        return links_obj_list
-
-    def _extract_text_frames(self, root: Element) -> List[TextFrame]:
-        text_frames = []
-        for frame_element in root.findall(".//TextFrame"):
-            text_frame = TextFrame(frame_element)
-            text_frames.append(text_frame)
-        return text_frames
-
-    def _add_story(self, story_id: str):
-        if story_id not in self.child_stories:
-            self.child_stories.append(story_id)
+            if rectangle_element not in rectangles_with_link and self._is_pasted_graphic(rectangle_element))
+
+    def _is_pasted_graphic(self, rectangle_element: Element) -> bool:
+        # Check for children <PDF>, <EPS>, or <Image>.
+        for graphic_type in ['PDF', 'EPS', 'Image']:
+            graphic_element = rectangle_element.find(graphic_type)
+
+            if graphic_element is not None:
+                # Check the child <Properties> of the graphic element.
+                properties_element = graphic_element.find('Properties')
+
+                if properties_element is not None:
+                    # Check the <Content> child of the <Properties> element.
+                    content_element = properties_element.find(
+                        'Contents')
+
+                    if content_element is not None and content_element.text:
+                        # If the <Content> has any text, it's a pasted graphic.
+                        # No need to check other graphic types for this rectangle.
+                        return True
+        return False
 
     # ---------------- External Setters------------------
 
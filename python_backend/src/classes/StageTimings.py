@@ -0,0 +1,83 @@
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+# **********************************************************
+# Class: StageTimings
+# Init Locations: FrontifyChecker (one per run)
+# Methods calls from: FrontifyChecker, CheckScheduler
+# Method calls to:
+# Description: Wall time, CPU time and (with trace_memory) the
+# tracemalloc peak of every stage of a run: the states of the state
+# machine, the parsers inside PARSE_XML and every check. Check stages
+# run on check threads at the same time, so their CPU time is that of
+# their own thread and their memory is only measured for all checks
+# together (the CHECKS stage). The parsers' CPU time does not include
+# parse pool processes.
+# **********************************************************
+class StageTimings:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory: bool = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.peak_memory_bytes: Optional[int] = None
+        self._started_tracing: bool = False
+        self._lock = threading.Lock()
+
+    # ---------------- External Setters------------------
+    def start(self):
+        """Starts tracemalloc for the run if trace_memory and nothing else is tracing already."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, tracemalloc.get_traced_memory()[1])
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def measure(self, stage: str, thread_cpu: bool = False, memory: bool = False) -> Iterator[Dict[str, float]]:
+        """Times the with block as stage and yields its (filled in at the end) timings.
+
+        thread_cpu counts the CPU time of this thread only, for stages that run next to
+        others. memory records the tracemalloc peak of the block, only for stages that
+        run on their own (resets the peak).
+        """
+        cpu_clock = time.thread_time if thread_cpu else time.process_time
+        measure_memory = memory and tracemalloc.is_tracing()
+        if measure_memory:
+            self._update_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        timings: Dict[str, float] = {}
+        wall_start = time.perf_counter()
+        cpu_start = cpu_clock()
+        try:
+            yield timings
+        finally:
+            timings['wall_ms'] = round((time.perf_counter() - wall_start) * 1000, 3)
+            timings['cpu_ms'] = round((cpu_clock() - cpu_start) * 1000, 3)
+            if measure_memory:
+                timings['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+                self._update_peak(timings['peak_memory_bytes'])
+            self.record(stage, timings)
+
+    def record(self, stage: str, timings: Dict[str, float]):
+        with self._lock:
+            self.stages[stage] = dict(timings)
+
+    def _update_peak(self, peak_bytes: int):
+        with self._lock:
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, peak_bytes)
+
+    # ----------------Getters------------------
+    def to_json(self) -> dict:
+        with self._lock:
+            timings = {'stages': {stage: dict(stage_timings) for stage, stage_timings in self.stages.items()}}
+            if self.peak_memory_bytes is not None:
+                timings['peak_memory_bytes'] = self.peak_memory_bytes
+        return timings
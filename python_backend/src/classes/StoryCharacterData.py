@@ -57,7 +57,8 @@ class StoryCharacterData:
             self.add_table()
 
     def _add_used_character_font(self, fonts_parser: 'FontsParser'):
-        if self.applied_font is not None:
+        # No fonts_parser when the story registers its fonts itself (StoryData.register_used_fonts)
+        if self.applied_font is not None and fonts_parser is not None:
             fonts_parser.add_used_font_family(
                 self.applied_font)
 
@@ -0,0 +1,83 @@
+from typing import Callable, Dict, List, Tuple
+from src.classes.States import States
+from src.error_handling.ResultRecorder import ResultRecorder
+
+# In walk order, on_story first
+STORY_CALLBACKS = ('on_story', 'on_paragraph',
+                   'on_character', 'on_paragraph_end')
+
+
+# **********************************************************
+# Class: StoryRule
+# Init Locations: FrontifyChecker (story rule factories)
+# Methods calls from: StoryCheckEngine
+# Method calls to:
+# Description: The story-level part of a check state. Each callback gets
+# the results to add to as its first argument:
+#   on_story(results, story)
+#   on_paragraph(results, story, par_index, par_style)
+#   on_character(results, story, par_style, char_index, char_style)
+#   on_paragraph_end(results, story, par_index, par_style)
+# on_paragraph_end runs after the paragraph's character ranges.
+# **********************************************************
+class StoryRule:
+    def __init__(self, state: States, on_story: Callable = None, on_paragraph: Callable = None,
+                 on_character: Callable = None, on_paragraph_end: Callable = None):
+        self.state: States = state
+        self.on_story: Callable = on_story
+        self.on_paragraph: Callable = on_paragraph
+        self.on_character: Callable = on_character
+        self.on_paragraph_end: Callable = on_paragraph_end
+
+
+# **********************************************************
+# Class: StoryCheckEngine
+# Init Locations: FrontifyChecker
+# Methods calls from: FrontifyChecker
+# Method calls to: StoryRule, ResultRecorder
+# Description: Walks the story model (stories, paragraph ranges,
+# character ranges) once and calls every registered rule on the way.
+# Each rule adds to its own ResultRecorder, so the caller can merge them
+# in chain order. A rule that raises is skipped for the rest of the walk
+# and its exception is returned with its recorder, the other rules
+# finish.
+# **********************************************************
+class StoryCheckEngine:
+    def __init__(self, rules: List[StoryRule]):
+        self.rules: List[StoryRule] = rules
+
+    def run(self, stories: List['StoryData']) -> Dict[States, Tuple[ResultRecorder, Exception]]:
+        recorders: Dict[States, ResultRecorder] = {
+            rule.state: ResultRecorder() for rule in self.rules}
+        errors: Dict[States, Exception] = {}
+        # callback name -> [(state, callback, recorder)], built once instead of per range
+        callbacks: Dict[str, List[Tuple[States, Callable, ResultRecorder]]] = {
+            callback_name: [(rule.state, getattr(rule, callback_name), recorders[rule.state])
+                            for rule in self.rules if getattr(rule, callback_name) is not None]
+            for callback_name in STORY_CALLBACKS}
+
+        def dispatch(callback_name: str, *args):
+            for state, callback, recorder in callbacks[callback_name]:
+                if state in errors:
+                    continue
+                try:
+                    callback(recorder, *args)
+                except Exception as e:
+                    errors[state] = e
+
+        walk_paragraphs = any(callbacks[callback_name]
+                              for callback_name in STORY_CALLBACKS[1:])
+        walk_characters = bool(callbacks['on_character'])
+        for story in stories:
+            dispatch('on_story', story)
+            if not walk_paragraphs:
+                continue
+            for par_index, par_style in enumerate(story.get_paragraph_styles()):
+                dispatch('on_paragraph', story, par_index, par_style)
+                if walk_characters:
+                    for char_index, char_style in enumerate(par_style.get_child_char_styles()):
+                        dispatch('on_character', story,
+                                 par_style, char_index, char_style)
+                dispatch('on_paragraph_end', story, par_index, par_style)
+
+        return {rule.state: (recorders[rule.state], errors.get(rule.state)) for rule in self.rules}
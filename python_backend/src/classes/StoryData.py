@@ -9,20 +9,26 @@ from src.classes.StoryCharacterData import StoryCharacterData
 # Init Locations: StoriesParser
 # Methods calls from: StoriesParser
 # Method calls to: StoryParagraphData, StoryCharacterData, SpreadsParser
-# Description: A class to hold and manage story data.
+# Description: A class to hold and manage story data. Built either from a
+# whole <Story> element, or range by range by the StoriesParser streaming
+# reader (story_element=None, then add_paragraph_style and complete_story).
 # **********************************************************
 class StoryData:
-    def __init__(self, spreads_parser: 'SpreadsParser', styles_parser: 'StylesParser', fonts_parser: 'FontsParser', story_element: Element):
-        self.story_id: str = ''
+    def __init__(self, spreads_parser: 'SpreadsParser', styles_parser: 'StylesParser', fonts_parser: 'FontsParser', story_element: Element = None, story_id: str = ''):
+        self.story_id: str = story_id
         self.paragraph_styles: List[StoryParagraphData] = []
         self.character_styles: List[StoryCharacterData] = []
         self.parent_text_frame_id: str = ''
-        self._extract_story_data(
-            styles_parser, fonts_parser, story_element)
+        if story_element is not None:
+            self._extract_story_data(
+                styles_parser, fonts_parser, story_element)
         self.grouped_paragraph_styles: List[List[StoryParagraphData]
                                             ] = self._extract_grouped_styles()
-        self.page: str = spreads_parser.get_page_by_story_id(self.story_id)
-        self.page_id: str = spreads_parser.get_page_id_by_story_id(self.story_id)
+        self.page: str = ''
+        self.page_id: str = ''
+        # Stories read on their own (StoriesParser) get their page afterwards
+        if spreads_parser is not None:
+            self.set_page(spreads_parser)
 
     # ---------------- Private Setters------------------
 
@@ -73,9 +79,30 @@ class StoryData:
         if isinstance(char_style, StoryCharacterData):
             self.character_styles.append(char_style)
 
+    def complete_story(self):
+        """Called by the streaming reader once every paragraph range was added."""
+        # Same order as _extract_story_data: paragraph order, then each paragraph's character ranges
+        self.character_styles = [char_style for par_style in self.paragraph_styles
+                                 for char_style in par_style.get_child_char_styles()]
+        self.grouped_paragraph_styles = self._extract_grouped_styles()
+
     def add_parent_text_frame_id(self, frame_id: str):
         self.parent_text_frame_id = frame_id
 
+    def set_page(self, spreads_parser: 'SpreadsParser'):
+        self.page = spreads_parser.get_page_by_story_id(self.story_id)
+        self.page_id = spreads_parser.get_page_id_by_story_id(self.story_id)
+
+    def register_used_fonts(self, fonts_parser: 'FontsParser'):
+        """Registers the story fonts in the same order as the StoryParagraphData/StoryCharacterData constructors."""
+        for par_style in self.paragraph_styles:
+            fonts_parser.add_used_font_family(
+                par_style.applied_font_obj.get_property_value(), self.story_id)
+            for char_style in par_style.get_child_char_styles():
+                if char_style.applied_font is not None:
+                    fonts_parser.add_used_font_family(
+                        char_style.applied_font, self.story_id)
+
     # ----------------Getters------------------
     def get_grouped_paragraph_styles(self) -> List[List[StoryParagraphData]]:
         return self.grouped_paragraph_styles
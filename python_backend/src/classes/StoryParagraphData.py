@@ -52,6 +52,9 @@ class StoryParagraphData:
                 self.par_overrides[attr] = value
 
     def _add_used_paragraph_font(self, fonts_parser: 'FontsParser'):
+        # No fonts_parser when the story registers its fonts itself (StoryData.register_used_fonts)
+        if fonts_parser is None:
+            return
         fonts_parser.add_used_font_family(
             self.applied_font_obj.get_property_value())
 
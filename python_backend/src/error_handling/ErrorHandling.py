@@ -1,11 +1,26 @@
 import json
 import os
 from collections import defaultdict
-from typing import List, Dict, Union
+from typing import Any, Iterator, List, Dict, Union
 from src.error_handling.ValidationContext import ValidationContext
 from src.error_handling.Success import Success
 from src.error_handling.ValidationClassifier import ValidationError, ValidationWarning, ValidationInfo, ValidationCategory
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Expected categories in response
+RESPONSE_CATEGORIES = ['par_styles', 'char_styles', 'text_boxes', 'fonts', 'images', 'general']
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode value as UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
 
 class ValidationResult():
     def __init__(self):
@@ -13,6 +28,8 @@ class ValidationResult():
         # Store validations directly by category -> identifier -> {errors/warnings/infos} -> [ValidationContext]
         self.validations: Dict[str, Dict[str, Dict[str, List[ValidationContext]]]] = defaultdict(
             lambda: defaultdict(lambda: {'errors': [], 'warnings': [], 'infos': []}))
+        # (category, identifier, validation_type, page_id, data_id, classifier) -> first validation with that key
+        self._validation_index: Dict[tuple, ValidationContext] = {}
         # Category counts for metadata
         self.category_counts: Dict[str, int] = defaultdict(int)
         # Classifier metadata
@@ -29,6 +46,8 @@ class ValidationResult():
         self.text_box_data = {}
         self.spread_to_pages: Dict[str, List[str]] = {}
         self.pages: Dict[str, str] = {}
+        # Called with a 'finding' event for every new validation (optional)
+        self.progress_listener = None
 
     # -------------------------------Helper Methods-------------------------------
     @staticmethod
@@ -72,23 +91,31 @@ class ValidationResult():
 
         existing_validation = None
         if text_content and len(text_content) > 0 and not is_override:
-            existing_validations = self.validations[category_key][identifier][validation_type]
-            for existing in existing_validations:
-                if (existing.get_page_id() == page_id and
-                    existing.get_data_id() == data_id and
-                    existing.classifier_type == classifier.value):
-                    existing_validation = existing
-                    break
+            existing_validation = self._validation_index.get(
+                (category_key, identifier, validation_type, page_id, data_id, classifier.value))
 
         if existing_validation:
-            # Merge text_content arrays
-            existing_text_content = existing_validation.get_text_content()
-            merged_text_content = list(set(existing_text_content + text_content))  # Remove duplicates
-            existing_validation.text_content = merged_text_content
+            # Merge text_content arrays, duplicates removed
+            existing_validation.merge_text_content(text_content)
         else:
             # Create new validation
             validation = ValidationContext(context, classifier, page_id, identifier, data_id, text_content)
             self.validations[category_key][identifier][validation_type].append(validation)
+            if self.progress_listener is not None:
+                self.progress_listener({
+                    "event": "finding",
+                    "category": category_key,
+                    "type": validation_type,
+                    "validationClassifier": validation.classifier_type,
+                    "context": validation.get_formatted_message(),
+                    "identifier": validation.get_identifier(),
+                    "page_id": validation.get_page_id(),
+                    "data_id": validation.get_data_id()
+                })
+            # Index by the stored (normalized) page_id and data_id, the first validation with a key is merged into
+            self._validation_index.setdefault(
+                (category_key, identifier, validation_type, validation.get_page_id(),
+                 validation.get_data_id(), classifier.value), validation)
 
             # Handle special text_box case for identifier extraction
             # Identifiers for TEXT_BOX category are story_id
@@ -128,6 +155,17 @@ class ValidationResult():
         """Add info validation."""
         self.add_validation('infos', info_type, context, page_id, identifier, data_id, text_content)
 
+    def add_text_box_data(self, data_id: str, story):
+        """Add story content keyed by text frame id, so the frontend can find it. First story wins."""
+        if not data_id or data_id == 'null' or data_id in self.text_box_data:
+            return
+        story_page_id = story.get_page_id()
+        self.text_box_data[data_id] = {
+            "identifier": data_id,
+            "content": story.get_content(),
+            "page_id": story_page_id if story_page_id is not None else ""
+        }
+
     def add_template_name(self, template_name: str):
         self.template_name = template_name
 
@@ -159,6 +197,9 @@ class ValidationResult():
         self._build_spread_to_pages_mapping()
         self._build_pages_mapping()
 
+    def set_progress_listener(self, progress_listener):
+        self.progress_listener = progress_listener
+
     def set_fonts_total_count(self, count):
         self.fonts_total_count = count
 
@@ -285,23 +326,68 @@ class ValidationResult():
 
         return base_item
 
-    def get_formatted_results_json(self) -> dict:
-        """Build response JSON directly from self.validations structure."""
-        # Build reverse lookup: page_id -> spread_id for efficient lookups
+    def _build_page_to_spread(self) -> dict:
+        """Build reverse lookup: page_id -> spread_id for efficient lookups."""
         page_to_spread = {}
         for spread_self, page_selves in self.spread_to_pages.items():
             if spread_self:  # Ensure spread_self is not None
                 for page_self in page_selves:
                     if page_self:  # Ensure page_self is not None
                         page_to_spread[page_self] = spread_self
+        return page_to_spread
+
+    def _build_identifier_json(self, type_dict: dict, category_key: str, page_to_spread: dict) -> dict:
+        """Build the errors/warnings/infos JSON of one identifier."""
+        return {
+            'errors': [
+                self._build_validation_item_json(item, category_key, page_to_spread)
+                for item in type_dict['errors']
+            ],
+            'warnings': [
+                self._build_validation_item_json(item, category_key, page_to_spread)
+                for item in type_dict['warnings']
+            ],
+            'infos': [
+                self._build_validation_item_json(item, category_key, page_to_spread)
+                for item in type_dict['infos']
+            ]
+        }
+
+    def _get_category_total_count(self, category_key: str) -> int:
+        """Get total count for a category."""
+        if category_key == 'par_styles':
+            return self.par_styles_count
+        elif category_key == 'char_styles':
+            return self.char_styles_count
+        elif category_key == 'text_boxes':
+            return self.text_box_total_count
+        elif category_key == 'fonts':
+            return self.fonts_total_count
+        elif category_key == 'images':
+            return self.images_total_count
+        return 0
+
+    def _build_text_box_json(self, text_box: dict) -> dict:
+        """Map page_id to page_name in a text_box_data entry."""
+        page_id = text_box.get("page_id", "")
+        # Ensure page_id is not None for dictionary lookup
+        page_id = page_id if page_id is not None else ""
+        page_name = self.pages.get(page_id, "") if page_id else ""
+        return {
+            "identifier": text_box.get("identifier", ""),
+            "content": text_box.get("content", ""),
+            "page_id": page_id,
+            "page_name": page_name
+        }
+
+    def get_formatted_results_json(self) -> dict:
+        """Build response JSON directly from self.validations structure."""
+        page_to_spread = self._build_page_to_spread()
 
         # Build category sections dynamically from stored validations
         categories_response = {}
 
-        # Expected categories in response
-        expected_categories = ['par_styles', 'char_styles', 'text_boxes', 'fonts', 'images', 'general']
-
-        for category_key in expected_categories:
+        for category_key in RESPONSE_CATEGORIES:
             # Convert stored validations to response format
             category_validations = self.validations.get(category_key, {})
             details = {}
@@ -309,56 +395,20 @@ class ValidationResult():
             for identifier, type_dict in category_validations.items():
                 # Ensure identifier is not None - convert to string if needed
                 safe_identifier = identifier if identifier is not None else 'null'
-                details[safe_identifier] = {
-                    'errors': [
-                        self._build_validation_item_json(item, category_key, page_to_spread)
-                        for item in type_dict['errors']
-                    ],
-                    'warnings': [
-                        self._build_validation_item_json(item, category_key, page_to_spread)
-                        for item in type_dict['warnings']
-                    ],
-                    'infos': [
-                        self._build_validation_item_json(item, category_key, page_to_spread)
-                        for item in type_dict['infos']
-                    ]
-                }
-
-            # Get total count for this category
-            total_count = 0
-            if category_key == 'par_styles':
-                total_count = self.par_styles_count
-            elif category_key == 'char_styles':
-                total_count = self.char_styles_count
-            elif category_key == 'text_boxes':
-                total_count = self.text_box_total_count
-            elif category_key == 'fonts':
-                total_count = self.fonts_total_count
-            elif category_key == 'images':
-                total_count = self.images_total_count
-            elif category_key == 'general':
-                total_count = 0
+                details[safe_identifier] = self._build_identifier_json(
+                    type_dict, category_key, page_to_spread)
 
             categories_response[category_key] = {
                 "details": details,
-                "total_count": total_count
+                "total_count": self._get_category_total_count(category_key)
             }
 
         # Map page_id to page_name in text_box_data
         mapped_text_box_data = {}
         for identifier, text_box in self.text_box_data.items():
-            page_id = text_box.get("page_id", "")
-            # Ensure page_id is not None for dictionary lookup
-            page_id = page_id if page_id is not None else ""
-            page_name = self.pages.get(page_id, "") if page_id else ""
             # Ensure identifier is not None
             safe_identifier = identifier if identifier is not None else 'null'
-            mapped_text_box_data[safe_identifier] = {
-                "identifier": text_box.get("identifier", ""),
-                "content": text_box.get("content", ""),
-                "page_id": page_id,
-                "page_name": page_name
-            }
+            mapped_text_box_data[safe_identifier] = self._build_text_box_json(text_box)
 
         response = {
             "template_name": self.template_name if self.template_name else 'No Name',
@@ -370,3 +420,62 @@ class ValidationResult():
             "pages": self.pages
         }
         return response
+
+    def iter_formatted_results_json(self) -> Iterator[bytes]:
+        """Stream the get_formatted_results_json JSON as UTF-8 chunks.
+
+        One identifier or text box is built and encoded at a time, so memory does not
+        grow with the number of findings. The last chunk is always the closing b'}'.
+        """
+        page_to_spread = self._build_page_to_spread()
+
+        yield b'{"template_name":' + encode_json(self.template_name if self.template_name else 'No Name')
+        yield b',"output_folder":' + encode_json(self.idml_output_folder)
+
+        for category_key in RESPONSE_CATEGORIES:
+            yield b',' + encode_json(category_key) + b':{"details":{'
+            category_validations = self.validations.get(category_key, {})
+            separator = b''
+            for identifier, type_dict in category_validations.items():
+                safe_identifier = identifier if identifier is not None else 'null'
+                yield separator + encode_json(safe_identifier) + b':' + encode_json(
+                    self._build_identifier_json(type_dict, category_key, page_to_spread))
+                separator = b','
+            yield b'},"total_count":' + encode_json(self._get_category_total_count(category_key)) + b'}'
+
+        yield b',"validation_classifiers":' + encode_json(self.validation_classifiers)
+
+        yield b',"text_box_data":{'
+        separator = b''
+        for identifier, text_box in self.text_box_data.items():
+            safe_identifier = identifier if identifier is not None else 'null'
+            yield separator + encode_json(safe_identifier) + b':' + encode_json(
+                self._build_text_box_json(text_box))
+            separator = b','
+        yield b'}'
+
+        yield b',"spread_to_pages":' + encode_json(self.spread_to_pages)
+        yield b',"pages":' + encode_json(self.pages)
+        yield b'}'
+
+    def get_analytics_results_json(self) -> dict:
+        """Build the part of get_formatted_results_json that analytics reads.
+
+        Same category/details/errors/warnings/infos shape, each item only has its
+        validationClassifier and identifier. Lets start_check stream the full JSON
+        without keeping it in memory for analytics.
+        """
+        response = {"template_name": self.template_name if self.template_name else 'No Name'}
+        for category_key in RESPONSE_CATEGORIES:
+            details = {}
+            for identifier, type_dict in self.validations.get(category_key, {}).items():
+                safe_identifier = identifier if identifier is not None else 'null'
+                details[safe_identifier] = {
+                    type_key: [
+                        {"validationClassifier": item.classifier_type, "identifier": item.get_identifier()}
+                        for item in type_dict[type_key]
+                    ]
+                    for type_key in ('errors', 'warnings', 'infos')
+                }
+            response[category_key] = {"details": details}
+        return response
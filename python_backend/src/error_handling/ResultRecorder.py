@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Tuple
+from src.error_handling.ErrorHandling import ValidationResult
+
+
+# **********************************************************
+# Class: ResultRecorder
+# Init Locations: CheckScheduler
+# Methods calls from: FrontifyChecker (check states, through self.results)
+# Method calls to: ValidationResult
+# Description: Stands in for ValidationResult while a check runs on a
+# scheduler thread. The add_* calls are recorded, then replayed into the
+# real ValidationResult in registry order, so the results (merging,
+# text_box_data, classifier metadata) come out exactly as in the chain.
+# **********************************************************
+class ResultRecorder:
+    def __init__(self):
+        self.calls: List[Tuple[str, tuple, Dict[str, Any]]] = []
+
+    # ---------------- External Setters------------------
+    def add_custom_error(self, *args, **kwargs):
+        self.calls.append(('add_custom_error', args, kwargs))
+
+    def add_error(self, *args, **kwargs):
+        self.calls.append(('add_error', args, kwargs))
+
+    def add_warning(self, *args, **kwargs):
+        self.calls.append(('add_warning', args, kwargs))
+
+    def add_info(self, *args, **kwargs):
+        self.calls.append(('add_info', args, kwargs))
+
+    def add_text_box_data(self, *args, **kwargs):
+        self.calls.append(('add_text_box_data', args, kwargs))
+
+    def replay(self, results: ValidationResult):
+        for method_name, args, kwargs in self.calls:
+            getattr(results, method_name)(*args, **kwargs)
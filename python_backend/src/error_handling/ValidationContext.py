@@ -6,7 +6,9 @@ class ValidationContext:
         self.identifier = identifier if identifier is not None else 'null'
         self.help_article = None
         self.data_id = data_id if data_id is not None else 'null'
-        self.text_content = text_content if text_content is not None else []
+        self.text_content = list(text_content) if text_content is not None else []
+        # Set view of text_content for merging, built on the first merge
+        self._text_content_seen = None
 
     def get_identifier(self):
         return self.identifier
@@ -25,3 +27,12 @@ class ValidationContext:
 
     def get_text_content(self):
         return self.text_content
+
+    def merge_text_content(self, text_content: list):
+        """Append the texts not in text_content yet, keeping first-seen order."""
+        if self._text_content_seen is None:
+            self._text_content_seen = set(self.text_content)
+        for text in text_content:
+            if text not in self._text_content_seen:
+                self._text_content_seen.add(text)
+                self.text_content.append(text)
@@ -1,7 +1,6 @@
-from lxml import etree as ET
-from typing import List
-import os
+from typing import Dict, List
 from src.classes.UsedFontFamily import UsedFontFamily
+from src.classes.IdmlArchive import IdmlArchive
 
 
 # **********************************************************
@@ -9,20 +8,30 @@ from src.classes.UsedFontFamily import UsedFontFamily
 # Init Locations: FrontifyChecker
 # Methods calls from: StoryCharacterData, FontsParser
 # Method calls to:
-# Description: Parses Fonts.XML for fonts in the
+# Description: Parses Fonts.XML for fonts in the document. Font families
+# are kept in a name-keyed registry (first family with a name wins), and
+# used families in insertion order along with how often and in which
+# stories they are used.
 # **********************************************************
 class FontsParser:
-    def __init__(self, fonts_xml_path: str):
+    def __init__(self, fonts_xml_path: str, idml_archive: IdmlArchive = None):
         self.font_families_from_xml: List[str] = self._extract_fonts(
-            fonts_xml_path)
-        self.used_font_families: List[UsedFontFamily] = []
+            fonts_xml_path, idml_archive if idml_archive else IdmlArchive())
+        self.font_families_by_name: Dict[str, UsedFontFamily] = {}
+        for font_family in self.font_families_from_xml:
+            self.font_families_by_name.setdefault(
+                font_family.get_font_family(), font_family)
+        # Insertion ordered, in the order the fonts are first used
+        self.used_font_families: Dict[str, UsedFontFamily] = {}
+        self.font_usage_counts: Dict[str, int] = {}
+        self.font_story_ids: Dict[str, List[str]] = {}
 
     # ---------------- Private Setters------------------
-    def _extract_fonts(self, fonts_xml_path: str) -> List[UsedFontFamily]:
-        if not os.path.exists(fonts_xml_path):
+    def _extract_fonts(self, fonts_xml_path: str, idml_archive: IdmlArchive) -> List[UsedFontFamily]:
+        if not idml_archive.exists(fonts_xml_path):
             raise FileNotFoundError(f"{fonts_xml_path} does not exist")
 
-        tree = ET.parse(fonts_xml_path)
+        tree = idml_archive.parse(fonts_xml_path)
         root = tree.getroot()
 
         fonts_families_list: List[UsedFontFamily] = []
@@ -33,25 +42,45 @@ class FontsParser:
         return fonts_families_list
 
     # ---------------- External Setters------------------
-    def add_used_font_family(self, font_family_name: str):
-        """Add a font family object to the list of used font families."""
-        # Search for the font object in self.font_families_from_xml
-        matching_font_obj = next(
-            (font for font in self.font_families_from_xml
-                if font.get_font_family() == font_family_name), None)
+    def add_used_font_family(self, font_family_name: str, story_id: str = ''):
+        """Add a font family object to the used font families and count the use."""
+        matching_font_obj = self.font_families_by_name.get(font_family_name)
+        if matching_font_obj is None:
+            return
 
-        # If found and not already in the list, add to self.used_font_families
-        if matching_font_obj and matching_font_obj not in self.used_font_families:
-            self.used_font_families.append(matching_font_obj)
+        if font_family_name not in self.used_font_families:
+            self.used_font_families[font_family_name] = matching_font_obj
+            self.font_usage_counts[font_family_name] = 0
+            self.font_story_ids[font_family_name] = []
+        self.font_usage_counts[font_family_name] += 1
+
+        # Stories register their fonts one after another, so only the last id needs checking
+        story_ids = self.font_story_ids[font_family_name]
+        if story_id and (not story_ids or story_ids[-1] != story_id):
+            story_ids.append(story_id)
 
     # ----------------Getters------------------
     def get_fonts_families_from_xml(self) -> List[UsedFontFamily]:
         """Returns font_families from_xml list"""
         return self.font_families_from_xml
 
-    def get_used_font_families(self) -> List[str]:
+    def get_font_family_by_name(self, font_family_name: str) -> UsedFontFamily:
+        return self.font_families_by_name.get(font_family_name)
+
+    def get_used_font_families(self) -> List[UsedFontFamily]:
         """Retrieve the list of used font families."""
-        return self.used_font_families
+        return list(self.used_font_families.values())
+
+    def is_font_family_used(self, font_family_name: str) -> bool:
+        return font_family_name in self.used_font_families
+
+    def get_font_usage_count(self, font_family_name: str) -> int:
+        """Number of paragraph and character ranges using the font family."""
+        return self.font_usage_counts.get(font_family_name, 0)
+
+    def get_font_story_ids(self, font_family_name: str) -> List[str]:
+        """Ids of the stories using the font family, in document order."""
+        return self.font_story_ids.get(font_family_name, [])
 
     def get_used_font_families_count(self):
         return len(self.used_font_families)
@@ -59,7 +88,7 @@ class FontsParser:
     # ----------------Debug Prints------------------
     def print_used_font_families(self):
         print("\n".join(str(font_family)
-              for font_family in self.used_font_families))
+              for font_family in self.used_font_families.values()))
 
     def print_font_families_from_xml(self):
         print("\n".join(str(font) for font in self.font_families_from_xml))
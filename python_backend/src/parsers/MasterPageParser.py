@@ -1,8 +1,7 @@
-import os
-from lxml import etree as ET
 from xml.etree.ElementTree import Element
 from typing import List
 from src.classes.Link import Link
+from src.classes.IdmlArchive import IdmlArchive
 
 
 # **********************************************************
@@ -13,14 +12,15 @@ from src.classes.Link import Link
 # Description: Parses master page XML.
 # **********************************************************
 class MasterPageParser:
-    def __init__(self, masterspreads_dir: str):
+    def __init__(self, masterspreads_dir: str, idml_archive: IdmlArchive = None):
         self.unexpected_elements: List[str] = []
         self.links_obj_list: List[Link] = []
-        self._get_elements_from_all_files(masterspreads_dir)
+        self._get_elements_from_all_files(
+            masterspreads_dir, idml_archive if idml_archive else IdmlArchive())
 
     # ---------------- Private Setters------------------
-    def _get_elements_from_file(self, file_path: str) -> List[str]:
-        tree = ET.parse(file_path)
+    def _get_elements_from_file(self, file_path: str, idml_archive: IdmlArchive) -> List[str]:
+        tree = idml_archive.parse(file_path)
         root = tree.getroot()
         master_spread = root.find('MasterSpread')
         elements: List[str] = []
@@ -32,12 +32,10 @@ class MasterPageParser:
                 elements.append(child.tag)
         return elements
 
-    def _get_elements_from_all_files(self, master_spreads_dir: str):
-        for file_name in os.listdir(master_spreads_dir):
-            if file_name.endswith('.xml'):
-                file_path = os.path.join(master_spreads_dir, file_name)
-                self._get_elements_from_file(
-                    file_path)
+    def _get_elements_from_all_files(self, master_spreads_dir: str, idml_archive: IdmlArchive):
+        for file_path in idml_archive.list_files(master_spreads_dir, '.xml'):
+            self._get_elements_from_file(
+                file_path, idml_archive)
 
     def _extract_links_data(self, root: Element) -> List[Link]:
         links_obj_list: List[Link] = []
@@ -1,5 +1,5 @@
-from lxml import etree as ET
 from typing import Dict
+from src.classes.IdmlArchive import IdmlArchive
 
 
 # **********************************************************
@@ -10,13 +10,13 @@ from typing import Dict
 # Description: A parser class to extract document preferences.
 # **********************************************************
 class PreferencesParser:
-    def __init__(self, xml_path: str):
+    def __init__(self, xml_path: str, idml_archive: IdmlArchive = None):
         self.document_bleed: Dict[str,
-                                  str] = self._extract_document_bleed(xml_path)
+                                  str] = self._extract_document_bleed(xml_path, idml_archive if idml_archive else IdmlArchive())
 
     # ---------------- Private Setters------------------
-    def _extract_document_bleed(self, xml_path: str):
-        tree = ET.parse(xml_path)
+    def _extract_document_bleed(self, xml_path: str, idml_archive: IdmlArchive):
+        tree = idml_archive.parse(xml_path)
         root = tree.getroot()
         # Find the DocumentPreference element
         document_preference = root.find(".//DocumentPreference")
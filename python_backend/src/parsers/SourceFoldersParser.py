@@ -1,4 +1,6 @@
 import os
+import io
+import zipfile
 from typing import List
 from fontTools.ttLib import TTFont, TTCollection
 from src.classes.Image import Image
@@ -11,15 +13,56 @@ from src.classes.SourceFontFamily import SourceFontFamily
 # Methods calls from:
 # Method calls to:
 # Description: A class to parse and manage data from the source package.
+# When package_archive is given the folder paths are member prefixes in
+# the package ZIP. Images then only use the ZipInfo records (never
+# decompressed) and fonts are read into memory.
 # **********************************************************
 class SourceFoldersParser:
-    def __init__(self, document_links_folder_path: str, document_fonts_folder_path: str):
-        self.images_obj_list: List[Image] = self._extract_images_data(
-            document_links_folder_path)
-        self.document_fonts: List[SourceFontFamily] = self._extract_document_fonts(
-            document_fonts_folder_path)
+    def __init__(self, document_links_folder_path: str, document_fonts_folder_path: str, package_archive: zipfile.ZipFile = None):
+        if package_archive:
+            self.images_obj_list: List[Image] = self._extract_images_data_from_archive(
+                document_links_folder_path, package_archive)
+            self.document_fonts: List[SourceFontFamily] = self._extract_document_fonts_from_archive(
+                document_fonts_folder_path, package_archive)
+        else:
+            self.images_obj_list: List[Image] = self._extract_images_data(
+                document_links_folder_path)
+            self.document_fonts: List[SourceFontFamily] = self._extract_document_fonts(
+                document_fonts_folder_path)
 
     # ---------------- Private Setters------------------
+    def _list_archive_folder(self, folder_prefix: str, package_archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        # Files directly inside the folder, like os.listdir
+        if not folder_prefix:
+            return []
+        return [info for info in package_archive.infolist()
+                if info.filename.startswith(folder_prefix) and not info.is_dir()
+                and '/' not in info.filename[len(folder_prefix):]]
+
+    def _extract_images_data_from_archive(self, document_links_folder_prefix: str, package_archive: zipfile.ZipFile):
+        images_obj_list = []
+        for info in self._list_archive_folder(document_links_folder_prefix, package_archive):
+            if os.path.basename(info.filename) == '.DS_Store':
+                continue
+
+            image_data = Image(info.filename, info.file_size)
+            images_obj_list.append(image_data)
+        return images_obj_list
+
+    def _extract_document_fonts_from_archive(self, document_fonts_folder_prefix: str, package_archive: zipfile.ZipFile):
+        document_fonts: List[SourceFontFamily] = []
+
+        for info in self._list_archive_folder(document_fonts_folder_prefix, package_archive):
+            file_name = os.path.basename(info.filename)
+            if file_name.endswith('.lst') or file_name == '.DS_Store':
+                continue
+
+            font_file = io.BytesIO(package_archive.read(info))
+            font_family_obj = SourceFontFamily(
+                file_name, document_fonts_folder_prefix, font_file)
+            document_fonts.append(font_family_obj)
+        return document_fonts
+
     def _extract_images_data(self, document_links_folder_path: str):
         images_obj_list = []
         for filename in os.listdir(document_links_folder_path):
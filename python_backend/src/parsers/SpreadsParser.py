@@ -1,7 +1,9 @@
-import os
+from concurrent.futures import Executor
 from typing import List, Dict
 from lxml import etree as ET
 from src.classes.SpreadData import SpreadData
+from src.classes.IdmlArchive import IdmlArchive
+from src.classes.PartCache import PartCache
 
 
 # **********************************************************
@@ -12,28 +14,43 @@ from src.classes.SpreadData import SpreadData
 # Description:
 # **********************************************************
 class SpreadsParser:
-    def __init__(self, spreads_xml_dir: str):
+    def __init__(self, spreads_xml_dir: str, idml_archive: IdmlArchive = None, part_cache: PartCache = None, executor: Executor = None):
         self.spreads_obj_list: List[SpreadData] = self._extract_spreads_data(
-            spreads_xml_dir)
+            spreads_xml_dir, idml_archive if idml_archive else IdmlArchive(), part_cache, executor)
         # Build dictionaries for O(1) lookups
         self.story_id_to_page: Dict[str, str] = {}
         self.story_id_to_page_id: Dict[str, str] = {}
         self._build_story_id_mappings()
 
     # ---------------- Private Setters------------------
-    def _extract_spreads_data(self, spreads_xml_dir: str):
-        spreads_obj_list: List[SpreadData] = []
+    def _extract_spreads_data(self, spreads_xml_dir: str, idml_archive: IdmlArchive, part_cache: PartCache, executor: Executor):
+        file_paths = idml_archive.list_files(spreads_xml_dir, '.xml')
+        spreads_obj_list: List[SpreadData] = [None] * len(file_paths)
+        part_keys = [None] * len(file_paths)
 
-        # Iterate over each file in the directory
-        for filename in os.listdir(spreads_xml_dir):
-            if filename.endswith('.xml'):
-                file_path = os.path.join(spreads_xml_dir, filename)
+        # Only re-parse spreads whose XML changed since a previous run
+        if part_cache:
+            for index, file_path in enumerate(file_paths):
+                part_keys[index] = ('spread',) + \
+                    idml_archive.member_key(file_path)
+                spreads_obj_list[index] = part_cache.get(part_keys[index])
+        pending = [index for index, spread_data in enumerate(
+            spreads_obj_list) if spread_data is None]
+
+        if executor and len(pending) > 1:
+            futures = [executor.submit(read_spread, idml_archive.read(file_paths[index]))
+                       for index in pending]
+            for index, future in zip(pending, futures):
+                spreads_obj_list[index] = future.result()
+        else:
+            for index in pending:
                 parser = ET.XMLParser(huge_tree=True)
-                tree = ET.parse(file_path, parser)
-                root = tree.getroot()
+                tree = idml_archive.parse(file_paths[index], parser)
+                spreads_obj_list[index] = SpreadData(tree.getroot())
 
-                spread_data = SpreadData(root)
-                spreads_obj_list.append(spread_data)
+        if part_cache:
+            for index in pending:
+                part_cache.put(part_keys[index], spreads_obj_list[index])
         return spreads_obj_list
 
     # ---------------- Private Setters------------------
@@ -60,3 +77,13 @@ class SpreadsParser:
     def print_spreads_obj_list(self):
         for spread_data in self.spreads_obj_list:
             print(spread_data)
+
+
+# ---------------------------------------------------
+# Function: read_spread
+# Description: Parse pool task. Parses a spread file sent over as bytes.
+# ---------------------------------------------------
+def read_spread(spread_bytes: bytes) -> SpreadData:
+    parser = ET.XMLParser(huge_tree=True)
+    root = ET.fromstring(spread_bytes, parser)
+    return SpreadData(root)
@@ -1,8 +1,16 @@
-import os
-from typing import List, Dict
-from lxml import etree as ET
+import io
+from concurrent.futures import Executor
+from typing import IO, List, Dict
 from typing import Optional
+from lxml import etree as ET
 from src.classes.StoryData import StoryData
+from src.classes.StoryParagraphData import StoryParagraphData
+from src.classes.StoryCharacterData import StoryCharacterData
+from src.classes.IdmlArchive import IdmlArchive
+from src.classes.PartCache import PartCache
+
+# Story files per task sent to the parse pool, so StylesParser is pickled once per chunk
+STORY_FILES_PER_TASK = 8
 
 
 # **********************************************************
@@ -11,29 +19,62 @@ from src.classes.StoryData import StoryData
 # Methods calls from: FrontifyChecker
 # Method calls to: StoryData
 # Description: A parser class to track and init StoryData objs.
+# Story files are read independently of each other (in a process pool
+# when an executor is given, or from the part cache). Fonts and pages,
+# which need the shared FontsParser / SpreadsParser, are set here
+# afterwards in file order.
 # **********************************************************
 class StoriesParser:
-    def __init__(self, stories_dir: str, styles_parser: 'StylesParser', fonts_parser: 'FontsParser', spreads_parser: 'SpreadsParser'):
+    # styles_key: identifies the Styles.xml the cached stories were resolved against
+    def __init__(self, stories_dir: str, styles_parser: 'StylesParser', fonts_parser: 'FontsParser', spreads_parser: 'SpreadsParser', idml_archive: IdmlArchive = None, part_cache: PartCache = None, styles_key: tuple = (), executor: Executor = None):
         self.story_id = ''
         self.stories_data_list:  List[StoryData] = []
         self.stories_dict: Dict[str, StoryData] = {}
         self._extract_stories_data(
-            stories_dir, styles_parser, fonts_parser, spreads_parser)
+            stories_dir, styles_parser, fonts_parser, spreads_parser, idml_archive if idml_archive else IdmlArchive(), part_cache, styles_key, executor)
 
     # ---------------- Private Setters------------------
-    def _extract_stories_data(self, stories_dir: str, styles_parser: 'StylesParser', fonts_parser: 'FontsParser', spreads_parser: 'SpreadsParser'):
-        for story_file in os.listdir(stories_dir):
-            if story_file.endswith('.xml'):
-                file_path = os.path.join(stories_dir, story_file)
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-
-                for story_element in root.findall("Story"):
-                    story_data = StoryData(
-                        spreads_parser, styles_parser, fonts_parser, story_element)
-                    self.stories_data_list.append(story_data)
-                    # Add to dictionary for O(1) lookups
-                    self.stories_dict[story_data.story_id] = story_data
+    def _extract_stories_data(self, stories_dir: str, styles_parser: 'StylesParser', fonts_parser: 'FontsParser', spreads_parser: 'SpreadsParser', idml_archive: IdmlArchive, part_cache: PartCache, styles_key: tuple, executor: Executor):
+        file_paths = idml_archive.list_files(stories_dir, '.xml')
+        stories_per_file: List[List[StoryData]] = [None] * len(file_paths)
+        part_keys = [None] * len(file_paths)
+
+        # Only re-parse stories whose XML (or Styles.xml) changed since a previous run
+        if part_cache:
+            for index, file_path in enumerate(file_paths):
+                part_keys[index] = ('story',) + \
+                    idml_archive.member_key(file_path) + styles_key
+                stories_per_file[index] = part_cache.get(part_keys[index])
+        pending = [index for index, file_stories in enumerate(
+            stories_per_file) if file_stories is None]
+
+        if executor and len(pending) > 1:
+            chunks = [pending[i:i + STORY_FILES_PER_TASK]
+                      for i in range(0, len(pending), STORY_FILES_PER_TASK)]
+            futures = [executor.submit(read_story_files,
+                                       [idml_archive.read(file_paths[index]) for index in chunk], styles_parser)
+                       for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                for index, file_stories in zip(chunk, future.result()):
+                    stories_per_file[index] = file_stories
+        else:
+            for index in pending:
+                with idml_archive.open(file_paths[index]) as story_file:
+                    stories_per_file[index] = read_stories(
+                        story_file, styles_parser)
+
+        if part_cache:
+            for index in pending:
+                part_cache.put(part_keys[index], stories_per_file[index])
+
+        for file_stories in stories_per_file:
+            for story_data in file_stories:
+                # Fonts are registered in document order, story by story
+                story_data.register_used_fonts(fonts_parser)
+                story_data.set_page(spreads_parser)
+                self.stories_data_list.append(story_data)
+                # Add to dictionary for O(1) lookups
+                self.stories_dict[story_data.story_id] = story_data
 
     # ----------------Getters------------------
     def get_story_by_id(self, story_id: str) -> Optional[StoryData]:
@@ -53,3 +94,71 @@ class StoriesParser:
         for story_data in self.stories_data_list:
             print(story_data)
             print("="*50)
+
+
+# ---------------------------------------------------
+# Function: read_stories
+# Description: Streams a story file with iterparse instead of
+# loading the whole tree. Paragraph ranges are built from their
+# start tag (attributes only), character ranges once their end tag
+# is reached, and processed elements are cleared straight away, so
+# memory depends on the largest paragraph instead of the largest story.
+# Gives the same StoryData as StoryData(story_element) would, minus
+# fonts and pages (see StoriesParser).
+# ---------------------------------------------------
+def read_stories(story_file: IO[bytes], styles_parser: 'StylesParser') -> List[StoryData]:
+    file_stories: List[StoryData] = []
+    story_data: StoryData = None
+    open_paragraphs: List[StoryParagraphData] = []
+    for event, element in ET.iterparse(story_file, events=('start', 'end'),
+                                       tag=('Story', 'ParagraphStyleRange', 'CharacterStyleRange')):
+        tag = element.tag
+        if tag == 'Story':
+            # Only <Story> elements directly under the root, like root.findall("Story")
+            if element.getparent() is None or element.getparent().getparent() is not None:
+                continue
+            if event == 'start':
+                story_data = StoryData(
+                    None, styles_parser, None, story_id=element.get("Self"))
+            else:
+                story_data.complete_story()
+                file_stories.append(story_data)
+                story_data = None
+                _release_element(element)
+        elif story_data is None:
+            continue
+        elif tag == 'ParagraphStyleRange':
+            if event == 'start':
+                par_style = StoryParagraphData(
+                    len(story_data.get_paragraph_styles()), element, styles_parser, None)
+                story_data.add_paragraph_style(par_style)
+                open_paragraphs.append(par_style)
+            else:
+                open_paragraphs.pop()
+                _release_element(element)
+        elif event == 'end':
+            # Only character ranges directly inside a paragraph range belong to it
+            if element.getparent().tag == 'ParagraphStyleRange':
+                char_style = StoryCharacterData(
+                    element, None, styles_parser)
+                open_paragraphs[-1].add_child_char_style(char_style)
+            _release_element(element)
+    return file_stories
+
+
+# ---------------------------------------------------
+# Function: read_story_files
+# Description: Parse pool task. Reads a chunk of story files sent
+# over as bytes and returns their StoryData lists in the same order.
+# ---------------------------------------------------
+def read_story_files(story_files: List[bytes], styles_parser: 'StylesParser') -> List[List[StoryData]]:
+    return [read_stories(io.BytesIO(story_bytes), styles_parser) for story_bytes in story_files]
+
+
+def _release_element(element: ET._Element):
+    # Drop the processed element's children and its already processed siblings
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
@@ -1,5 +1,13 @@
-from typing import Dict
-from lxml import etree as ET
+import logging
+from typing import Dict, Optional, Tuple
+from src.classes.IdmlArchive import IdmlArchive
+
+logger = logging.getLogger(__name__)
+
+# Properties the story objects read through PropertyBase, resolved up front
+RESOLVED_PARAGRAPH_PROPERTIES = ["AppliedFont", "Hyphenation", "GridAlignment",
+                                 "Composer", "KerningMethod", "FillTint"]
+RESOLVED_CHARACTER_PROPERTIES = ["KerningMethod"]
 
 
 # **********************************************************
@@ -8,19 +16,27 @@ from lxml import etree as ET
 # Methods calls from: StoryParagraphData, PropertyBase
 # Method calls to:
 # Description: A parser class to extract paragraph styles from the provided XML path.
+# Also holds the resolved style table: for every style and property, the
+# value after following the BasedOn chain and the style it was inherited from.
 # **********************************************************
 class StylesParser:
-    def __init__(self, xml_path: str):
+    def __init__(self, xml_path: str, idml_archive: IdmlArchive = None):
+        idml_archive = idml_archive if idml_archive else IdmlArchive()
+        root = idml_archive.parse(xml_path).getroot()
         self.paragraph_styles: Dict[str, Dict[str, str]] = self._extract_paragraph_styles(
-            xml_path)
+            root)
         self.character_styles: Dict[str, Dict[str, str]] = self._extract_character_styles(
-            xml_path)
+            root)
+        # (style_id, property_name) -> (value, inherited_from)
+        self.resolved_paragraph_properties: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {
+        }
+        self.resolved_character_properties: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {
+        }
+        self._build_resolved_properties()
 
     # ---------------- Private Setters------------------
-    def _extract_paragraph_styles(self, xml_path: str) -> Dict[str, Dict[str, str]]:
+    def _extract_paragraph_styles(self, root) -> Dict[str, Dict[str, str]]:
         styles: Dict[str, Dict[str, str]] = {}
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
         for par_style in root.findall(".//ParagraphStyle"):
             style_id = par_style.get("Self")
             properties = par_style.find("Properties")
@@ -36,10 +52,8 @@ class StylesParser:
             styles[style_id] = style_properties
         return styles
 
-    def _extract_character_styles(self, xml_path: str) -> Dict[str, Dict[str, str]]:
+    def _extract_character_styles(self, root) -> Dict[str, Dict[str, str]]:
         styles: Dict[str, Dict[str, str]] = {}
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
         for char_style in root.findall(".//CharacterStyle"):
             style_id = char_style.get("Self")
             properties = char_style.find("Properties")
@@ -51,6 +65,68 @@ class StylesParser:
             styles[style_id] = style_properties
         return styles
 
+    def _build_resolved_properties(self):
+        for style_id in self.paragraph_styles:
+            for property_name in RESOLVED_PARAGRAPH_PROPERTIES:
+                self._resolve(style_id, property_name, self.paragraph_styles,
+                              self.resolved_paragraph_properties, "ParagraphStyle/")
+        for style_id in self.character_styles:
+            for property_name in RESOLVED_CHARACTER_PROPERTIES:
+                self._resolve(style_id, property_name, self.character_styles,
+                              self.resolved_character_properties, "CharacterStyle/")
+
+    def _normalize_value(self, value: str) -> str:
+        if value and value.startswith("$ID/"):
+            return value.replace("$ID/", "")
+
+        return value
+
+    def _resolve(self, style_id: str, property_name: str, styles: Dict[str, Dict[str, str]],
+                 resolved: Dict[Tuple[str, str], Tuple[Optional[str], str]], base_prefix: str) -> Tuple[Optional[str], str]:
+        """Resolves a property through the BasedOn chain, memoized in resolved.
+        A style without its own value takes its base's value, and the base's
+        inherited_from (or the base itself if the base set the value directly)."""
+        key = (style_id, property_name)
+        if key in resolved:
+            return resolved[key]
+
+        chain = []
+        result = (None, '')
+        current_style_id = style_id
+        while True:
+            current_key = (current_style_id, property_name)
+            if current_key in resolved:
+                resolved_value, resolved_from = resolved[current_key]
+                result = (resolved_value, resolved_from or current_style_id)
+                break
+            style_properties = styles.get(current_style_id, {})
+            value = self._normalize_value(style_properties.get(property_name))
+            base_style = style_properties.get("BasedOn")
+            if value or not base_style:
+                result = (value, '')
+                chain.append(current_key)
+                break
+            # Normalize the style_id
+            if base_style.startswith("$ID/"):
+                base_style = base_prefix + base_style
+            chain.append(current_key)
+            if any(chained_style_id == base_style for chained_style_id, _ in chain):
+                # BasedOn cycle, stop where it loops
+                logger.warning(f"StylesParser: BasedOn cycle at {base_style}")
+                result = (value, base_style)
+                break
+            current_style_id = base_style
+
+        # Fill in the chain from the deepest style back up
+        value, inherited_from = result
+        for index in range(len(chain) - 1, -1, -1):
+            chain_key = chain[index]
+            if chain_key not in resolved:
+                resolved[chain_key] = (value, inherited_from)
+            # The style above inherits from this one unless this one inherited further
+            inherited_from = inherited_from or chain_key[0]
+        return resolved[key]
+
     # ----------------Getters------------------
     def get_all_properties(self, style_id: str) -> Dict[str, str]:
         return self.paragraph_styles.get(style_id, {})
@@ -61,6 +137,16 @@ class StylesParser:
     def find_char_property(self, key: str):
         return self.character_styles.get(key, None)
 
+    def get_resolved_property(self, style_id: str, property_name: str) -> Tuple[Optional[str], str]:
+        """Returns (value, inherited_from) of a paragraph style property."""
+        return self._resolve(style_id, property_name, self.paragraph_styles,
+                             self.resolved_paragraph_properties, "ParagraphStyle/")
+
+    def get_resolved_char_property(self, style_id: str, property_name: str) -> Tuple[Optional[str], str]:
+        """Returns (value, inherited_from) of a character style property."""
+        return self._resolve(style_id, property_name, self.character_styles,
+                             self.resolved_character_properties, "CharacterStyle/")
+
     # ----------------Debug Prints------------------
     def print_par_style_names(self):
         for style_name in self.paragraph_styles.keys():
@@ -0,0 +1,223 @@
+-- Analytics schema, described in SUPABASE_SCHEMA.md.
+-- Safe to run again on an existing database (Supabase SQL editor or psql -f),
+-- it only adds what is missing and replaces the functions and triggers.
+
+-- ---------------- Tables ----------------
+
+-- Create runs table
+CREATE TABLE IF NOT EXISTS runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    template_name TEXT NOT NULL,
+    source_type TEXT NOT NULL CHECK (source_type IN ('react-frontend', 'extension', 'api')),
+    duration_ms INTEGER NOT NULL,
+    file_size_bytes BIGINT NOT NULL,
+    total_errors INTEGER NOT NULL DEFAULT 0,
+    total_warnings INTEGER NOT NULL DEFAULT 0,
+    total_infos INTEGER NOT NULL DEFAULT 0,
+    stage_timings JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create validations table
+CREATE TABLE IF NOT EXISTS validations (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    run_id UUID NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    validation_type TEXT NOT NULL,
+    severity TEXT NOT NULL CHECK (severity IN ('error', 'warning', 'info')),
+    category TEXT NOT NULL CHECK (category IN ('par_styles', 'char_styles', 'text_boxes', 'fonts', 'images', 'general')),
+    identifier TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Added after the first version of the table
+ALTER TABLE runs ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+
+-- Create indexes for better query performance
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);
+-- Keyset pagination of GET /analytics/runs (newest first, by timestamp then id)
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp_id ON runs(timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_template_name ON runs(template_name);
+CREATE INDEX IF NOT EXISTS idx_runs_source_type ON runs(source_type);
+CREATE INDEX IF NOT EXISTS idx_validations_run_id ON validations(run_id);
+CREATE INDEX IF NOT EXISTS idx_validations_validation_type ON validations(validation_type);
+CREATE INDEX IF NOT EXISTS idx_validations_severity ON validations(severity);
+CREATE INDEX IF NOT EXISTS idx_validations_category ON validations(category);
+CREATE INDEX IF NOT EXISTS idx_validations_template_name ON validations(run_id) INCLUDE (validation_type, severity);
+CREATE INDEX IF NOT EXISTS idx_validations_created_at ON validations(created_at) INCLUDE (validation_type, severity);
+
+-- ---------------- Daily rollups ----------------
+
+CREATE TABLE IF NOT EXISTS daily_run_rollups (
+    day DATE NOT NULL,
+    source_type TEXT NOT NULL,
+    runs BIGINT NOT NULL DEFAULT 0,
+    total_errors BIGINT NOT NULL DEFAULT 0,
+    total_warnings BIGINT NOT NULL DEFAULT 0,
+    total_infos BIGINT NOT NULL DEFAULT 0,
+    duration_ms_sum BIGINT NOT NULL DEFAULT 0,
+    file_size_bytes_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, source_type)
+);
+
+CREATE TABLE IF NOT EXISTS daily_validation_rollups (
+    day DATE NOT NULL,
+    validation_type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, validation_type, severity)
+);
+
+-- One rollup update per insert statement (a batch of runs or validations), not per row
+CREATE OR REPLACE FUNCTION rollup_inserted_runs() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO daily_run_rollups AS r
+        (day, source_type, runs, total_errors, total_warnings, total_infos, duration_ms_sum, file_size_bytes_sum)
+    SELECT
+        (timestamp AT TIME ZONE 'UTC')::date, source_type, COUNT(*),
+        SUM(total_errors), SUM(total_warnings), SUM(total_infos), SUM(duration_ms), SUM(file_size_bytes)
+    FROM inserted_runs
+    GROUP BY 1, 2
+    ON CONFLICT (day, source_type) DO UPDATE SET
+        runs = r.runs + EXCLUDED.runs,
+        total_errors = r.total_errors + EXCLUDED.total_errors,
+        total_warnings = r.total_warnings + EXCLUDED.total_warnings,
+        total_infos = r.total_infos + EXCLUDED.total_infos,
+        duration_ms_sum = r.duration_ms_sum + EXCLUDED.duration_ms_sum,
+        file_size_bytes_sum = r.file_size_bytes_sum + EXCLUDED.file_size_bytes_sum;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rollup_inserted_validations() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- On the day of their run, like the run itself (the runs of a batch are inserted first)
+    INSERT INTO daily_validation_rollups AS r (day, validation_type, severity, count)
+    SELECT (runs.timestamp AT TIME ZONE 'UTC')::date, v.validation_type, v.severity, COUNT(*)
+    FROM inserted_validations v
+    JOIN runs ON runs.id = v.run_id
+    GROUP BY 1, 2, 3
+    ON CONFLICT (day, validation_type, severity) DO UPDATE SET
+        count = r.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS runs_rollup ON runs;
+CREATE TRIGGER runs_rollup AFTER INSERT ON runs
+    REFERENCING NEW TABLE AS inserted_runs
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_inserted_runs();
+
+DROP TRIGGER IF EXISTS validations_rollup ON validations;
+CREATE TRIGGER validations_rollup AFTER INSERT ON validations
+    REFERENCING NEW TABLE AS inserted_validations
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_inserted_validations();
+
+-- Rebuild the rollups from the raw tables, all days or from from_day on
+CREATE OR REPLACE FUNCTION rebuild_analytics_rollups(from_day DATE DEFAULT NULL) RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Inserts running meanwhile wait, so they are neither lost nor counted twice
+    LOCK TABLE runs, validations IN SHARE MODE;
+
+    DELETE FROM daily_run_rollups WHERE from_day IS NULL OR day >= from_day;
+    INSERT INTO daily_run_rollups
+        (day, source_type, runs, total_errors, total_warnings, total_infos, duration_ms_sum, file_size_bytes_sum)
+    SELECT
+        (timestamp AT TIME ZONE 'UTC')::date, source_type, COUNT(*),
+        SUM(total_errors), SUM(total_warnings), SUM(total_infos), SUM(duration_ms), SUM(file_size_bytes)
+    FROM runs
+    WHERE from_day IS NULL OR timestamp >= from_day::timestamp AT TIME ZONE 'UTC'
+    GROUP BY 1, 2;
+
+    DELETE FROM daily_validation_rollups WHERE from_day IS NULL OR day >= from_day;
+    INSERT INTO daily_validation_rollups (day, validation_type, severity, count)
+    SELECT (runs.timestamp AT TIME ZONE 'UTC')::date, v.validation_type, v.severity, COUNT(*)
+    FROM validations v
+    JOIN runs ON runs.id = v.run_id
+    WHERE from_day IS NULL OR runs.timestamp >= from_day::timestamp AT TIME ZONE 'UTC'
+    GROUP BY 1, 2, 3;
+END;
+$$;
+
+-- ---------------- Summary ----------------
+
+-- The earlier version took a start_date instead of days
+DROP FUNCTION IF EXISTS analytics_summary(TIMESTAMPTZ, INTEGER);
+
+CREATE OR REPLACE FUNCTION analytics_summary(days INTEGER, recent_limit INTEGER DEFAULT 50)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    WITH window_start AS (
+        -- The last `days` UTC days, today included
+        SELECT (now() AT TIME ZONE 'UTC')::date - (days - 1) AS start_day
+    ),
+    window_runs AS (
+        SELECT * FROM daily_run_rollups WHERE day >= (SELECT start_day FROM window_start)
+    )
+    SELECT json_build_object(
+        'summary', (
+            SELECT json_build_object(
+                'total_runs', COALESCE(SUM(runs), 0),
+                'total_errors', COALESCE(SUM(total_errors), 0),
+                'total_warnings', COALESCE(SUM(total_warnings), 0),
+                'total_infos', COALESCE(SUM(total_infos), 0),
+                'avg_duration_ms', COALESCE(SUM(duration_ms_sum)::float / NULLIF(SUM(runs), 0), 0),
+                'avg_file_size_bytes', COALESCE(SUM(file_size_bytes_sum)::float / NULLIF(SUM(runs), 0), 0)
+            )
+            FROM window_runs
+        ),
+        'source_types', (
+            SELECT COALESCE(json_agg(s), '[]'::json)
+            FROM (
+                SELECT
+                    source_type,
+                    SUM(runs) AS count,
+                    SUM(total_errors) AS total_errors,
+                    SUM(total_warnings) AS total_warnings,
+                    SUM(total_infos) AS total_infos
+                FROM window_runs
+                GROUP BY source_type
+            ) s
+        ),
+        'validations', (
+            SELECT COALESCE(json_agg(v ORDER BY v.count DESC), '[]'::json)
+            FROM (
+                SELECT validation_type AS type, severity, SUM(count) AS count
+                FROM daily_validation_rollups
+                WHERE day >= (SELECT start_day FROM window_start)
+                GROUP BY validation_type, severity
+            ) v
+        ),
+        'runs_over_time', (
+            SELECT COALESCE(json_agg(d ORDER BY d.date), '[]'::json)
+            FROM (
+                SELECT
+                    to_char(day, 'YYYY-MM-DD') AS date,
+                    SUM(runs) AS runs,
+                    SUM(total_errors) AS errors,
+                    SUM(total_warnings) AS warnings,
+                    SUM(total_infos) AS infos
+                FROM window_runs
+                GROUP BY day
+            ) d
+        ),
+        'recent_runs', (
+            SELECT COALESCE(json_agg(r ORDER BY r.timestamp DESC), '[]'::json)
+            FROM (
+                SELECT *
+                FROM runs
+                WHERE timestamp >= (SELECT start_day FROM window_start)::timestamp AT TIME ZONE 'UTC'
+                ORDER BY timestamp DESC
+                LIMIT recent_limit
+            ) r
+        )
+    );
+$$;
@@ -0,0 +1,95 @@
+import os
+from app.analytics import AnalyticsPipeline, build_analytics_record
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.rows = None
+
+    def upsert(self, rows, ignore_duplicates=False):
+        self.rows = rows
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def execute(self):
+        if self.client.unreachable:
+            raise ConnectionError('Supabase unreachable')
+        self.client.requests.append(self.name)
+        table = self.client.tables.setdefault(self.name, {})
+        for row in self.rows:
+            if self.ignore_duplicates:
+                table.setdefault(row['id'], row)
+            else:
+                table[row['id']] = row
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.unreachable = False
+        self.requests = []
+        self.tables = {}
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+RESULTS_JSON = {
+    'template_name': 'template',
+    'fonts': {'details': {'Arial': {
+        'errors': [{'validationClassifier': 'FONT_NOT_INCLUDED', 'identifier': 'Arial'}],
+        'warnings': [], 'infos': []}}},
+}
+
+
+def new_record():
+    return build_analytics_record('template', 'api', 10, 100, RESULTS_JSON)
+
+
+def test_record_links_validations_to_run():
+    record = new_record()
+
+    assert record['run']['total_errors'] == 1
+    assert [validation['run_id'] for validation in record['validations']] == [record['run']['id']]
+    # Rolled up on the day of the run
+    assert [validation['created_at'] for validation in record['validations']] == [record['run']['timestamp']]
+
+
+def test_runs_are_sent_in_one_batch(tmp_path):
+    supabase = FakeSupabase()
+    pipeline = AnalyticsPipeline(str(tmp_path / 'spool.sqlite3'), client_factory=lambda: supabase)
+    for _ in range(3):
+        pipeline._queue.put(new_record())
+
+    pipeline.flush()
+
+    assert supabase.requests == ['runs', 'validations']
+    assert len(supabase.tables['runs']) == 3
+    assert len(supabase.tables['validations']) == 3
+
+
+def test_unsent_runs_are_spooled_and_resent(tmp_path):
+    supabase = FakeSupabase()
+    supabase.unreachable = True
+    pipeline = AnalyticsPipeline(str(tmp_path / 'spool.sqlite3'), retry_interval_seconds=0,
+                                 client_factory=lambda: supabase)
+    pipeline._queue.put(new_record())
+
+    pipeline.flush()
+
+    assert pipeline._get_spool().count() == 1
+    supabase.unreachable = False
+    pipeline.flush()
+    assert pipeline._get_spool().count() == 0
+    assert len(supabase.tables['runs']) == 1
+
+
+def test_no_spool_without_credentials(tmp_path):
+    pipeline = AnalyticsPipeline(str(tmp_path / 'spool.sqlite3'), client_factory=lambda: None)
+    pipeline._queue.put(new_record())
+
+    pipeline.flush()
+    pipeline.spool_queued()
+
+    assert not os.path.exists(str(tmp_path / 'spool.sqlite3'))
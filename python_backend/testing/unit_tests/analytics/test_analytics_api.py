@@ -0,0 +1,119 @@
+import json
+import base64
+import uuid
+import pytest
+from app import analytics_api
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeSupabase:
+    """Returns what the analytics_summary function returns for two api runs and one extension run."""
+
+    def __init__(self):
+        self.rpc_calls = []
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        return self
+
+    def execute(self):
+        return FakeResponse({
+            'summary': {'total_runs': 3, 'total_errors': 4, 'total_warnings': 2, 'total_infos': 0,
+                        'avg_duration_ms': 1500.6, 'avg_file_size_bytes': 2048.2},
+            'source_types': [
+                {'source_type': 'api', 'count': 2, 'total_errors': 3, 'total_warnings': 2, 'total_infos': 0},
+                {'source_type': 'extension', 'count': 1, 'total_errors': 1, 'total_warnings': 0, 'total_infos': 0}],
+            'validations': [{'type': 'FONT_NOT_INCLUDED', 'severity': 'error', 'count': 4}],
+            'runs_over_time': [{'date': '2026-10-16', 'runs': 3, 'errors': 4, 'warnings': 2, 'infos': 0}],
+            'recent_runs': [{'id': 'run-1'}],
+        })
+
+
+def test_summary_is_aggregated_by_the_database_and_cached(monkeypatch):
+    supabase = FakeSupabase()
+    monkeypatch.setattr(analytics_api, 'get_shared_supabase_client', lambda: supabase)
+    monkeypatch.setattr(analytics_api, '_summary_cache', {})
+
+    summary = analytics_api.get_analytics_summary(days=7)
+
+    assert summary['summary'] == {
+        'total_runs': 3, 'total_errors': 4, 'total_warnings': 2, 'total_infos': 0,
+        'avg_duration_ms': 1500, 'avg_file_size_bytes': 2048, 'days': 7}
+    assert summary['source_types']['api'] == {'count': 2, 'total_errors': 3, 'total_warnings': 2, 'total_infos': 0}
+    assert summary['all_validations'] == [{'type': 'FONT_NOT_INCLUDED', 'severity': 'error', 'count': 4}]
+    assert summary['recent_runs'] == [{'id': 'run-1'}]
+
+    assert analytics_api.get_analytics_summary(days=7) is summary
+    analytics_api.get_analytics_summary(days=30)
+    assert supabase.rpc_calls == [('analytics_summary', {'days': 7, 'recent_limit': analytics_api.RECENT_RUNS_LIMIT}),
+                                  ('analytics_summary', {'days': 30, 'recent_limit': analytics_api.RECENT_RUNS_LIMIT})]
+
+
+class FakeRunsQuery:
+    """The runs table query builder, over runs sorted newest first."""
+
+    def __init__(self, runs):
+        self.runs = runs
+        self.filters = []
+        self.page_size = None
+
+    def table(self, name):
+        return self
+
+    def select(self, columns, count=None):
+        return self
+
+    def or_(self, filters):
+        self.filters.append(filters)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, page_size):
+        self.page_size = page_size
+        return self
+
+    def execute(self):
+        runs = self.runs
+        if self.filters:
+            # timestamp.lt."<timestamp>",and(timestamp.eq."<timestamp>",id.lt."<id>")
+            timestamp, run_id = self.filters[-1].split('"')[1], self.filters[-1].split('"')[5]
+            runs = [run for run in runs if (run['timestamp'], run['id']) < (timestamp, run_id)]
+        return FakeResponse(runs[:self.page_size])
+
+
+def test_runs_are_paged_by_cursor(monkeypatch):
+    runs = [{'id': str(uuid.UUID(int=index)), 'timestamp': '2026-10-16T10:00:00+00:00' if index < 3 else
+             f'2026-10-15T10:00:0{index}+00:00'} for index in range(6)]
+    runs.sort(key=lambda run: (run['timestamp'], run['id']), reverse=True)
+    monkeypatch.setattr(analytics_api, 'get_shared_supabase_client', lambda: FakeRunsQuery(runs))
+
+    pages = [analytics_api.get_runs(limit=4)]
+    while pages[-1]['next_cursor']:
+        pages.append(analytics_api.get_runs(limit=4, cursor=pages[-1]['next_cursor']))
+
+    assert [len(page['runs']) for page in pages] == [4, 2]
+    assert [run for page in pages for run in page['runs']] == runs
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        analytics_api.get_runs(cursor='not-a-cursor')
+
+
+@pytest.mark.parametrize('cursor_values', [
+    ['2026-10-16T10:00:00+00:00', '00000000-0000-0000-0000-000000000001"),id.gt.("'],
+    ['2026-10-16T10:00:00+00:00",id.gt."0', '00000000-0000-0000-0000-000000000001'],
+    ['2026-10-16T10:00:00+00:00'],
+    [1, 2],
+])
+def test_cursor_values_are_validated(cursor_values):
+    # Anything but a timestamp and a run UUID never reaches the PostgREST filter
+    cursor = base64.urlsafe_b64encode(json.dumps(cursor_values).encode()).decode()
+    with pytest.raises(ValueError):
+        analytics_api.get_runs(cursor=cursor)
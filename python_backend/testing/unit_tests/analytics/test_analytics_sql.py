@@ -0,0 +1,216 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import analytics_api
+
+psycopg2 = pytest.importorskip('psycopg2')
+from psycopg2.extras import execute_values  # noqa: E402
+
+ANALYTICS_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'supabase', 'analytics.sql')
+# The tables are created in a schema of their own, so an existing database can be used
+TEST_SCHEMA = 'analytics_test'
+TODAY = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture(scope='module')
+def postgres_url():
+    """ANALYTICS_TEST_DATABASE_URL, else a temporary Postgres started by testing.postgresql."""
+    database_url = os.getenv('ANALYTICS_TEST_DATABASE_URL')
+    if database_url:
+        yield database_url
+        return
+    testing_postgresql = pytest.importorskip('testing.postgresql')
+    try:
+        postgresql = testing_postgresql.Postgresql()
+    except RuntimeError as e:
+        # initdb / postgres not installed, or running as root
+        pytest.skip(f'Postgres is not available: {e}')
+    try:
+        yield postgresql.url()
+    finally:
+        postgresql.stop()
+
+
+@pytest.fixture
+def database(postgres_url):
+    """Connection to a fresh copy of supabase/analytics.sql."""
+    connection = psycopg2.connect(postgres_url)
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {TEST_SCHEMA}')
+        cursor.execute(f'SET search_path TO {TEST_SCHEMA}, public')
+        with open(ANALYTICS_SQL) as sql_file:
+            cursor.execute(sql_file.read())
+    yield connection
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA {TEST_SCHEMA} CASCADE')
+    connection.close()
+
+
+def run_row(timestamp, source_type='api', errors=0, warnings=0, infos=0, duration_ms=1000, file_size_bytes=100):
+    return {'id': str(uuid.uuid4()), 'timestamp': timestamp.isoformat(), 'template_name': 'template',
+            'source_type': source_type, 'duration_ms': duration_ms, 'file_size_bytes': file_size_bytes,
+            'total_errors': errors, 'total_warnings': warnings, 'total_infos': infos}
+
+
+def validation_row(run, validation_type, severity, created_at=None):
+    # The backend records validations at the time of their run
+    return {'id': str(uuid.uuid4()), 'run_id': run['id'], 'validation_type': validation_type,
+            'severity': severity, 'category': 'general', 'created_at': created_at or run['timestamp']}
+
+
+def insert_rows(database, table, rows):
+    """One INSERT ... ON CONFLICT DO NOTHING per batch, like the backend's upserts with ignore_duplicates."""
+    columns = list(rows[0])
+    with database.cursor() as cursor:
+        execute_values(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING",
+                       [tuple(row[column] for column in columns) for row in rows])
+
+
+def insert_runs(database, runs, validations=()):
+    insert_rows(database, 'runs', runs)
+    if validations:
+        insert_rows(database, 'validations', validations)
+
+
+class PostgresRpc:
+    """The Supabase client's rpc(), calling the function in the test database."""
+
+    def __init__(self, database):
+        self.database = database
+        self.call = None
+
+    def rpc(self, name, params):
+        self.call = (name, params)
+        return self
+
+    def execute(self):
+        name, params = self.call
+        with self.database.cursor() as cursor:
+            cursor.execute(f"SELECT {name}({', '.join(f'{key} => %({key})s' for key in params)})", params)
+            return type('Response', (), {'data': cursor.fetchone()[0]})
+
+
+@pytest.fixture
+def summary_runs(database):
+    """Three runs today, one two days ago (right after midnight) and one 40 days ago."""
+    today_api = [run_row(TODAY + timedelta(hours=1), errors=2, warnings=1, duration_ms=1000, file_size_bytes=100),
+                 run_row(TODAY + timedelta(hours=2), errors=1, warnings=1, duration_ms=2000, file_size_bytes=300)]
+    today_extension = run_row(TODAY + timedelta(hours=3), 'extension', errors=1, infos=2, duration_ms=3000)
+    two_days_ago = run_row(TODAY - timedelta(days=2) + timedelta(seconds=5), errors=1, duration_ms=2000)
+    long_ago = run_row(TODAY - timedelta(days=40), errors=5, duration_ms=9000)
+    runs = today_api + [today_extension, two_days_ago, long_ago]
+    validations = [validation_row(run, 'FONT_NOT_INCLUDED', 'error') for run in runs for _ in range(run['total_errors'])]
+    validations += [validation_row(run, 'HYPHENATION', 'warning') for run in runs for _ in range(run['total_warnings'])]
+    insert_runs(database, runs, validations)
+    return runs
+
+
+def summary(database, days):
+    with database.cursor() as cursor:
+        cursor.execute('SELECT analytics_summary(%s, 50)', (days,))
+        return cursor.fetchone()[0]
+
+
+def test_summary_totals_and_source_types(database, summary_runs):
+    result = summary(database, 30)
+
+    assert result['summary'] == {'total_runs': 4, 'total_errors': 5, 'total_warnings': 2, 'total_infos': 2,
+                                 'avg_duration_ms': 2000, 'avg_file_size_bytes': 150}
+    assert sorted(result['source_types'], key=lambda source_type: source_type['source_type']) == [
+        {'source_type': 'api', 'count': 3, 'total_errors': 4, 'total_warnings': 2, 'total_infos': 0},
+        {'source_type': 'extension', 'count': 1, 'total_errors': 1, 'total_warnings': 0, 'total_infos': 2}]
+    assert result['validations'] == [{'type': 'FONT_NOT_INCLUDED', 'severity': 'error', 'count': 5},
+                                     {'type': 'HYPHENATION', 'severity': 'warning', 'count': 2}]
+    # Newest first, the run of 40 days ago is outside the window
+    assert [run['id'] for run in result['recent_runs']] == [
+        run['id'] for run in sorted(summary_runs[:4], key=lambda run: run['timestamp'], reverse=True)]
+
+
+def test_summary_days_are_whole_utc_days(database, summary_runs):
+    assert summary(database, 30)['runs_over_time'] == [
+        {'date': (TODAY - timedelta(days=2)).strftime('%Y-%m-%d'), 'runs': 1, 'errors': 1, 'warnings': 0, 'infos': 0},
+        {'date': TODAY.strftime('%Y-%m-%d'), 'runs': 3, 'errors': 4, 'warnings': 2, 'infos': 2}]
+    # days=3 starts at midnight two days ago, days=2 yesterday
+    assert summary(database, 3)['summary']['total_runs'] == 4
+    assert summary(database, 2)['summary']['total_runs'] == 3
+    assert len(summary(database, 2)['recent_runs']) == 3
+    assert summary(database, 1)['summary']['total_runs'] == 3
+
+
+def test_summary_endpoint_data_from_postgres(database, summary_runs, monkeypatch):
+    monkeypatch.setattr(analytics_api, 'get_shared_supabase_client', lambda: PostgresRpc(database))
+    monkeypatch.setattr(analytics_api, '_summary_cache', {})
+
+    result = analytics_api.get_analytics_summary(days=30)
+
+    assert result['summary']['total_runs'] == 4
+    assert result['summary']['days'] == 30
+    assert result['source_types']['extension'] == {'count': 1, 'total_errors': 1, 'total_warnings': 0, 'total_infos': 2}
+    assert [day['runs'] for day in result['runs_over_time']] == [1, 3]
+
+
+def rollups(database):
+    with database.cursor() as cursor:
+        cursor.execute('SELECT day, source_type, runs, total_errors, total_warnings, total_infos, duration_ms_sum, '
+                       'file_size_bytes_sum FROM daily_run_rollups ORDER BY day, source_type')
+        run_rollups = cursor.fetchall()
+        cursor.execute('SELECT day, validation_type, severity, count FROM daily_validation_rollups '
+                       'ORDER BY day, validation_type, severity')
+        return run_rollups, cursor.fetchall()
+
+
+def test_batch_sent_again_is_counted_once(database):
+    runs = [run_row(TODAY + timedelta(hours=1), errors=1, warnings=1), run_row(TODAY + timedelta(hours=2), errors=1)]
+    validations = [validation_row(runs[0], 'FONT_NOT_INCLUDED', 'error'), validation_row(runs[0], 'HYPHENATION', 'warning'),
+                   validation_row(runs[1], 'FONT_NOT_INCLUDED', 'error')]
+    insert_runs(database, runs, validations)
+    counted = rollups(database)
+
+    # A batch resent from the spool after a timeout that had reached the database
+    insert_runs(database, runs, validations)
+    insert_runs(database, runs[1:], validations[2:])
+
+    assert rollups(database) == counted
+    run_rollups, validation_rollups = counted
+    assert [(row[1], row[2], row[3]) for row in run_rollups] == [('api', 2, 2)]
+    assert [(row[1], row[3]) for row in validation_rollups] == [('FONT_NOT_INCLUDED', 2), ('HYPHENATION', 1)]
+
+
+def test_validations_are_rolled_up_on_their_runs_day(database):
+    run = run_row(TODAY - timedelta(days=3) + timedelta(hours=23), errors=1)
+    # Inserted days later, e.g. by hand with created_at defaulting to NOW()
+    insert_runs(database, [run], [validation_row(run, 'FONT_NOT_INCLUDED', 'error', created_at=TODAY.isoformat())])
+
+    run_rollups, validation_rollups = rollups(database)
+    run_day = (TODAY - timedelta(days=3)).date()
+    assert [row[0] for row in run_rollups] == [run_day]
+    assert validation_rollups == [(run_day, 'FONT_NOT_INCLUDED', 'error', 1)]
+
+
+def test_rebuild_reproduces_the_trigger_rollups(database, summary_runs):
+    # One more batch, so some days are summed over several inserts
+    extra_run = run_row(TODAY + timedelta(hours=4), 'extension', errors=1, warnings=2)
+    insert_runs(database, [extra_run], [validation_row(extra_run, 'FONT_NOT_INCLUDED', 'error')])
+    counted = rollups(database)
+
+    with database.cursor() as cursor:
+        cursor.execute('DELETE FROM daily_run_rollups')
+        cursor.execute('DELETE FROM daily_validation_rollups')
+        cursor.execute('SELECT rebuild_analytics_rollups()')
+    assert rollups(database) == counted
+
+    from_day = (TODAY - timedelta(days=2)).date()
+    with database.cursor() as cursor:
+        cursor.execute('UPDATE daily_run_rollups SET runs = runs + 100')
+        cursor.execute('UPDATE daily_validation_rollups SET count = count + 100')
+        cursor.execute('SELECT rebuild_analytics_rollups(%s)', (from_day,))
+    run_rollups, validation_rollups = rollups(database)
+    # Days from from_day on are rebuilt, earlier days are left as they are
+    assert [row for row in run_rollups if row[0] >= from_day] == [row for row in counted[0] if row[0] >= from_day]
+    assert [row for row in validation_rollups if row[0] >= from_day] == [row for row in counted[1] if row[0] >= from_day]
+    assert [row[2] for row in run_rollups if row[0] < from_day] == [row[2] + 100 for row in counted[0] if row[0] < from_day]
+    assert [row[3] for row in validation_rollups if row[0] < from_day] == [
+        row[3] + 100 for row in counted[1] if row[0] < from_day]
@@ -0,0 +1,62 @@
+import io
+import json
+import os
+import zipfile
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+from app.batch import BatchRunner, collect_batch_packages
+from app.workspace import Workspace
+
+
+@pytest.fixture
+def testcase_zips(fail_data_packages):
+    """The packages the batches are made of."""
+    return fail_data_packages[:3]
+
+
+def upload(file_path, file_name=None):
+    with open(file_path, 'rb') as package_file:
+        return FileStorage(io.BytesIO(package_file.read()), filename=file_name or os.path.basename(file_path))
+
+
+def test_zip_of_zips_is_unpacked(tmp_path, testcase_zips):
+    zip_of_zips = io.BytesIO()
+    with zipfile.ZipFile(zip_of_zips, 'w') as zip_ref:
+        for testcase_zip in testcase_zips:
+            zip_ref.write(testcase_zip, os.path.join('templates', os.path.basename(testcase_zip)))
+    zip_of_zips.seek(0)
+    uploads = [FileStorage(zip_of_zips, filename='templates.zip'), upload(testcase_zips[0])]
+
+    packages = collect_batch_packages(uploads, Workspace(str(tmp_path)), 10)
+
+    assert [package.file_name for package in packages] == [secure_filename(os.path.basename(f)) for f in testcase_zips + testcase_zips[:1]]
+    assert len(set(package.path for package in packages)) == len(packages)
+    assert packages[0].sha256 == packages[-1].sha256
+    with pytest.raises(ValueError):
+        collect_batch_packages([upload(f) for f in testcase_zips], Workspace(str(tmp_path)), 2)
+
+
+def test_batch_runner_checks_every_package(tmp_path, testcase_zips):
+    packages = collect_batch_packages([upload(f) for f in testcase_zips], Workspace(str(tmp_path)), 10)
+
+    outcomes = list(BatchRunner(max_workers=2).run(packages, 'api', 1))
+
+    assert sorted(package.file_name for package, _, _, _ in outcomes) == sorted(secure_filename(os.path.basename(f)) for f in testcase_zips)
+    for package, results_json, counts, error in outcomes:
+        assert error is None
+        results = json.loads(results_json)
+        assert results['template_name'] == package.file_name
+        assert counts['total_errors'] == sum(len(details['errors']) for key, category in results.items()
+                                             if isinstance(category, dict) and 'details' in category
+                                             for details in category['details'].values())
+
+
+def test_batch_runner_stops_at_time_limit(tmp_path, testcase_zips):
+    packages = collect_batch_packages([upload(f) for f in testcase_zips], Workspace(str(tmp_path)), 10)
+
+    outcomes = list(BatchRunner(max_workers=1).run(packages, 'api', 1, time_limit_seconds=0))
+
+    # Every template is still answered for, the unchecked ones as failed
+    assert [package.file_name for package, _, _, _ in outcomes] == [package.file_name for package in packages]
+    assert all(results_json is None and 'time limit' in error for _, results_json, _, error in outcomes)
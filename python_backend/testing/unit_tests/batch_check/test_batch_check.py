@@ -0,0 +1,37 @@
+import json
+import os
+from batch_check import main, EXIT_OK, EXIT_FINDINGS
+
+
+def read_lines(output_path):
+    with open(output_path, 'rb') as output:
+        return [json.loads(line) for line in output]
+
+
+def test_lines_match_checker_results(tmp_path, fail_data_packages, run_checker):
+    output_path = str(tmp_path / 'audit.jsonl')
+    # The packages are found by searching their directory
+    fail_data_dir = os.path.dirname(fail_data_packages[0])
+
+    assert main([fail_data_dir, '--jobs', '2', '--fail-on', 'never', '--output', output_path]) == EXIT_OK
+
+    lines = read_lines(output_path)
+    assert [line['path'] for line in lines] == fail_data_packages
+    for line in lines:
+        checker = run_checker(line['path'], in_archive_mode=True)
+        expected_json = checker.results.get_formatted_results_json()
+        assert line['status'] == 'done'
+        assert line['results'] == expected_json
+        assert line['counts']['errors'] == len(checker.results.get_errors())
+
+
+def test_fail_on_and_checks(tmp_path, pass_data_package, fail_data_packages):
+    output_path = str(tmp_path / 'audit.jsonl')
+
+    assert main([pass_data_package, '--jobs', '1', '--output', output_path]) == EXIT_OK
+    assert main([*fail_data_packages, '--jobs', '1', '--output', output_path]) == EXIT_FINDINGS
+    # Only the bleed check runs, its findings are warnings
+    assert main([*fail_data_packages, '--jobs', '1', '--checks', 'document_bleed_check',
+                 '--output', output_path]) == EXIT_OK
+    assert main([*fail_data_packages, '--jobs', '1', '--checks', 'document_bleed_check',
+                 '--fail-on', 'warning', '--output', output_path]) == EXIT_FINDINGS
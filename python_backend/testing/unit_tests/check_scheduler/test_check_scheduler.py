@@ -0,0 +1,103 @@
+import pytest
+from src.classes.FrontifyChecker import FrontifyChecker
+from src.classes.CheckRegistry import CheckScheduler, CheckSpec, CHECK_REGISTRY
+from src.classes.States import States
+from src.classes.FrameCheckEngine import FrameCheckEngine
+
+
+def results_json(checker):
+    results_json = checker.results.get_formatted_results_json()
+    # Unique per run
+    results_json.pop('output_folder')
+    return results_json
+
+
+def test_scheduled_checks_match_chain(end_to_end_package, run_checker):
+    chain = run_checker(end_to_end_package, check_chain_mode=True)
+    scheduled = run_checker(end_to_end_package, check_chain_mode=False, check_workers=4)
+
+    # Same validations in the same order, not just the same counts
+    assert results_json(scheduled) == results_json(chain)
+
+
+def test_registry_covers_chain():
+    checker = FrontifyChecker()
+    check_states = [state for state in checker.states
+                    if States.PARSE_XML.value < state.value < States.RESULTS.value]
+
+    assert sorted(spec.state.value for spec in CHECK_REGISTRY) == sorted(
+        state.value for state in check_states)
+    for spec in CHECK_REGISTRY:
+        assert getattr(checker, spec.method_name) == checker.states[spec.state]
+
+
+def test_conflicting_checks_run_in_later_wave():
+    scheduler = CheckScheduler([
+        CheckSpec(States.PAR_CHECK, 'par_style_check', ('stories',)),
+        CheckSpec(States.HYPHENATION_CHECK, 'hyphenation_check', ('stories',), ('stories',)),
+        CheckSpec(States.DOCUMENT_BLEED_CHECK, 'document_bleed_check', ('preferences',)),
+        CheckSpec(States.COMPOSER_CHECK, 'composer_check', ('stories',)),
+    ])
+
+    assert scheduler.get_waves() == [
+        [States.PAR_CHECK, States.DOCUMENT_BLEED_CHECK],
+        [States.HYPHENATION_CHECK],
+        [States.COMPOSER_CHECK],
+    ]
+
+
+def test_fused_pass_runs_as_one_unit():
+    scheduler = CheckScheduler([
+        CheckSpec(States.MASTERPAGE_CHECK, 'masterpage_check', ('masterspreads',)),
+        CheckSpec(States.PAR_CHECK, 'par_style_check', ('stories',), fused_pass='stories'),
+        CheckSpec(States.DOCUMENT_BLEED_CHECK, 'document_bleed_check', ('preferences',)),
+        CheckSpec(States.COMPOSER_CHECK, 'composer_check', ('stories',), fused_pass='stories'),
+    ])
+
+    assert [[spec.state for spec in unit] for unit in scheduler.units] == [
+        [States.MASTERPAGE_CHECK],
+        [States.PAR_CHECK, States.COMPOSER_CHECK],
+        [States.DOCUMENT_BLEED_CHECK],
+    ]
+
+
+def test_conflicting_checks_cannot_fuse():
+    with pytest.raises(ValueError):
+        CheckScheduler([
+            CheckSpec(States.PAR_CHECK, 'par_style_check', ('stories',), fused_pass='stories'),
+            CheckSpec(States.COMPOSER_CHECK, 'composer_check', ('stories',), ('stories',), fused_pass='stories'),
+        ])
+
+
+def test_frame_pass_resolves_page_once_per_link(end_to_end_package):
+    checker = FrontifyChecker()
+    checker.set_source_file_path(end_to_end_package)
+    checker.unzip_package_state()
+    checker.unzip_idml_state()
+    checker.parse_xml()
+    checker.delete_unzipped_root_path()
+
+    page_lookups = []
+    engine = FrameCheckEngine([checker.frame_rules[state]() for state in checker.frame_rules])
+    engine.run(checker.spreads_parser.get_spreads_obj_list(),
+               lambda data_id: page_lookups.append(data_id) or checker.find_page_id_from_data_id(data_id))
+
+    link_ids = [link.get_rectangle_link_id() for spread in checker.spreads_parser.get_spreads_obj_list()
+                for link in spread.get_links_obj_list() if link.get_rectangle_link_id()]
+    assert page_lookups == link_ids
+
+
+@pytest.mark.parametrize('check_chain_mode', [True, False])
+def test_progress_events_cover_every_stage(check_chain_mode, fail_data_packages, run_checker):
+    events = []
+    checker = run_checker(fail_data_packages[0], progress_listener=events.append,
+                          check_chain_mode=check_chain_mode, check_workers=4)
+
+    started = [event['stage'] for event in events if event['event'] == 'stage_started']
+    finished = [event['stage'] for event in events if event['event'] == 'stage_finished']
+    assert sorted(started) == sorted(finished)
+    assert set(spec.state.name for spec in CHECK_REGISTRY) <= set(finished)
+    assert all(event['duration_ms'] >= 0 for event in events if event['event'] == 'stage_finished')
+    findings = [event for event in events if event['event'] == 'finding']
+    validations = checker.results.get_errors() + checker.results.get_warnings() + checker.results.get_infos()
+    assert len(findings) == len(validations)
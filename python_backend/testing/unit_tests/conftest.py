@@ -0,0 +1,65 @@
+import os
+from collections import Counter
+import pytest
+from src.classes.FrontifyChecker import FrontifyChecker
+
+# Packages of the end to end tests, which the unit tests also run the checker on
+END_TO_END_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'end_to_end_tests')
+FAIL_DATA_DIR = os.path.join(END_TO_END_DIR, 'fail_data')
+PASS_DATA_DIR = os.path.join(END_TO_END_DIR, 'pass_data')
+
+
+def list_packages(*data_dirs):
+    return [os.path.join(data_dir, f) for data_dir in data_dirs for f in sorted(os.listdir(data_dir)) if f.endswith('.zip')]
+
+
+FAIL_DATA_PACKAGES = list_packages(FAIL_DATA_DIR)
+PASS_DATA_PACKAGES = list_packages(PASS_DATA_DIR)
+
+
+@pytest.fixture
+def fail_data_packages():
+    return list(FAIL_DATA_PACKAGES)
+
+
+@pytest.fixture
+def pass_data_packages():
+    return list(PASS_DATA_PACKAGES)
+
+
+@pytest.fixture(params=FAIL_DATA_PACKAGES + PASS_DATA_PACKAGES, ids=os.path.basename)
+def end_to_end_package(request):
+    """Every end to end test package, fail and pass data."""
+    return request.param
+
+
+@pytest.fixture(params=PASS_DATA_PACKAGES, ids=os.path.basename)
+def pass_data_package(request):
+    return request.param
+
+
+@pytest.fixture
+def run_checker():
+    """run_checker(source_file_path, **setters) runs a FrontifyChecker with set_<name>(value) for every setter."""
+    def run(source_file_path, **setters):
+        checker = FrontifyChecker()
+        checker.set_source_file_path(source_file_path)
+        for setter_name, value in setters.items():
+            getattr(checker, f'set_{setter_name}')(value)
+        try:
+            checker.run_state_machine()
+        finally:
+            # Also when the run fails, so no extraction folder is left in src/data
+            checker.delete_unzipped_root_path()
+        return checker
+    return run
+
+
+@pytest.fixture
+def assert_same_findings():
+    """assert_same_findings(checker, expected) compares the error, warning and info types of two runs."""
+    def compare(checker, expected):
+        assert Counter(checker.get_error_types()) == Counter(expected.get_error_types())
+        assert Counter(checker.get_warning_types()) == Counter(expected.get_warning_types())
+        assert Counter(checker.get_info_types()) == Counter(expected.get_info_types())
+    return compare
@@ -0,0 +1,25 @@
+import os
+from src.classes.FrontifyChecker import FrontifyChecker
+
+
+def test_in_archive_mode_matches_extraction(end_to_end_package, run_checker, assert_same_findings):
+    extracted = run_checker(end_to_end_package, in_archive_mode=False)
+    in_archive = run_checker(end_to_end_package, in_archive_mode=True)
+
+    assert_same_findings(in_archive, extracted)
+
+
+def test_in_archive_mode_writes_nothing_to_disk(pass_data_package):
+    checker = FrontifyChecker()
+    checker.set_source_file_path(pass_data_package)
+    checker.set_in_archive_mode(True)
+    checker.unzip_package_state()
+    checker.unzip_idml_state()
+    checker.parse_xml()
+
+    # The .idml, Links and Document Fonts are all read from the ZIP
+    written_files = [os.path.join(root, f) for root, _, files in os.walk(checker.unzipped_root_path) for f in files]
+    checker.delete_unzipped_root_path()
+
+    assert checker.idml_archive.is_in_archive() is False  # closed by cleanup
+    assert not written_files
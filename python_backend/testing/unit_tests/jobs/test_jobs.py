@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import time
+from app.jobs import JobStore, JOB_QUEUED, JOB_DONE, JOB_FAILED, run_job
+
+
+def queue_job(job_store, source_file_path):
+    package_name = os.path.basename(source_file_path)
+    job_id = job_store.create('api', package_name)
+    shutil.copy(source_file_path, job_store.package_path(job_id, package_name))
+    return job_id
+
+
+def test_job_results_match_checker(tmp_path, fail_data_packages, run_checker):
+    testcase_zip = fail_data_packages[0]
+    job_store = JobStore(str(tmp_path))
+    job_id = queue_job(job_store, testcase_zip)
+    assert job_store.get(job_id)['status'] == JOB_QUEUED
+    assert job_store.count_pending() == 1
+
+    run_job(job_store.jobs_folder, job_store.max_age_seconds, job_id)
+
+    assert job_store.get(job_id)['status'] == JOB_DONE
+    assert job_store.count_pending() == 0
+    assert not os.path.exists(job_store.package_folder(job_id))
+    with open(job_store.results_path(job_id), 'rb') as results_file:
+        results_json = json.load(results_file)
+
+    checker = run_checker(testcase_zip, in_archive_mode=True)
+    expected_json = checker.results.get_formatted_results_json()
+    # Unique per run
+    for job_json in (results_json, expected_json):
+        job_json.pop('output_folder')
+    assert results_json.pop('analytics')['cache_hit'] is False
+    assert results_json == expected_json
+
+
+def test_failed_job_is_recorded_and_purged(tmp_path):
+    job_store = JobStore(str(tmp_path), max_age_seconds=-1)
+    job_id = job_store.create('api', 'missing.zip')
+
+    run_job(job_store.jobs_folder, job_store.max_age_seconds, job_id)
+
+    job = job_store.get(job_id)
+    assert job['status'] == JOB_FAILED
+    assert job['error']
+    job_store.purge_expired()
+    assert job_store.get(job_id) is None
+
+
+def test_orphaned_jobs_time_out(tmp_path):
+    job_store = JobStore(str(tmp_path), timeout_seconds=60, queued_timeout_seconds=600)
+    running_id = job_store.create('api', 'running.zip')
+    queued_id = job_store.create('api', 'queued.zip')
+    waiting_id = job_store.create('api', 'waiting.zip')
+    job_store.mark_running(running_id)
+    # Accepted by a worker that exited before finishing them; waiting_id is only queued behind others
+    with job_store._connect() as connection:
+        connection.execute('UPDATE jobs SET started_at = ? WHERE id = ?', (time.time() - 120, running_id))
+        connection.execute('UPDATE jobs SET created_at = ? WHERE id = ?', (time.time() - 1200, queued_id))
+        connection.execute('UPDATE jobs SET created_at = ? WHERE id = ?', (time.time() - 120, waiting_id))
+
+    assert job_store.count_pending() == 1
+    job_store.purge_expired()
+
+    for job_id in (running_id, queued_id):
+        job = job_store.get(job_id)
+        assert job['status'] == JOB_FAILED
+        assert job['error']
+    assert job_store.get(waiting_id)['status'] == JOB_QUEUED
+
+    # A pool process picking up a timed out job leaves it failed
+    run_job(job_store.jobs_folder, job_store.max_age_seconds, queued_id)
+    assert job_store.get(queued_id)['status'] == JOB_FAILED
+    assert job_store.count_pending() == 1
+
+
+def test_timed_out_job_stays_failed(tmp_path):
+    job_store = JobStore(str(tmp_path))
+    job_id = job_store.create('api', 'template.zip')
+    assert job_store.mark_running(job_id)
+    assert job_store.mark_failed(job_id, 'Job did not finish within 3600 seconds')
+
+    # The pool process finishes it afterwards
+    assert not job_store.mark_running(job_id)
+    assert not job_store.mark_done(job_id)
+    assert not job_store.mark_failed(job_id, 'later error')
+    job = job_store.get(job_id)
+    assert (job['status'], job['error']) == (JOB_FAILED, 'Job did not finish within 3600 seconds')
@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, Response
+from prometheus_client import REGISTRY
+from app import metrics
+from app.metrics import init_metrics, init_pool_process, metrics_response, observe_check, package_size_class
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_streamed_request_is_timed_until_sent():
+    app = Flask(__name__)
+    init_metrics(app)
+    in_progress = []
+
+    @app.route('/stream/<name>')
+    def stream(name):
+        def generate():
+            in_progress.append(sample('http_requests_in_progress', route='/stream/<name>'))
+            yield b'{}'
+        return Response(generate(), mimetype='application/json')
+
+    @app.route('/metrics')
+    def metrics():
+        return metrics_response()
+
+    before = sample('http_request_duration_seconds_count', route='/stream/<name>', method='GET', status='200')
+    response = app.test_client().get('/stream/template')
+    assert response.data == b'{}'
+    # The server closes the response once the body is sent
+    response.close()
+
+    assert in_progress == [1]
+    assert sample('http_requests_in_progress', route='/stream/<name>') == 0
+    assert sample('http_request_duration_seconds_count',
+                  route='/stream/<name>', method='GET', status='200') == before + 1
+    assert b'worker_resident_memory_bytes' in app.test_client().get('/metrics').data
+
+
+def test_check_stages_sizes_and_caches_are_recorded(pass_data_packages, run_checker):
+    testcase_zip = pass_data_packages[0]
+    checker = run_checker(testcase_zip)
+    file_size_bytes = os.path.getsize(testcase_zip)
+    size_class = package_size_class(file_size_bytes)
+
+    before = {
+        'checks': sample('check_duration_seconds_count', size_class=size_class, cache_hit='false'),
+        'parse': sample('check_stage_duration_seconds_count', stage='PARSE_XML'),
+        'misses': sample('result_cache_requests_total', result='miss'),
+        'uncompressed': sample('check_package_uncompressed_bytes_count'),
+    }
+    observe_check(checker, False, 1200, file_size_bytes, True)
+
+    assert sample('check_duration_seconds_count', size_class=size_class, cache_hit='false') == before['checks'] + 1
+    assert sample('check_stage_duration_seconds_count', stage='PARSE_XML') == before['parse'] + 1
+    assert sample('result_cache_requests_total', result='miss') == before['misses'] + 1
+    assert sample('check_package_uncompressed_bytes_count') == before['uncompressed'] + 1
+
+
+def test_package_size_classes():
+    assert package_size_class(0) == '0-1MB'
+    assert package_size_class(20 * 1024 * 1024) == '10-50MB'
+    assert package_size_class(300 * 1024 * 1024) == '100MB+'
+
+
+
+def pool_process_pid(_):
+    return os.getpid()
+
+
+def test_exited_pool_processes_are_marked_dead(tmp_path, monkeypatch):
+    dead_pids_path = tmp_path / 'dead_pids'
+
+    def mark_pool_process_dead(pid):
+        with dead_pids_path.open('a') as dead_pids_file:
+            dead_pids_file.write(f"{pid}\n")
+
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    monkeypatch.setattr(metrics, '_mark_pool_process_dead', mark_pool_process_dead)
+
+    with ProcessPoolExecutor(max_workers=1, initializer=init_pool_process) as executor:
+        pool_pids = set(executor.map(pool_process_pid, range(2)))
+
+    assert [int(pid) for pid in dead_pids_path.read_text().split()] == list(pool_pids)
@@ -0,0 +1,18 @@
+import src.classes.FrontifyChecker as frontify_checker_module
+
+
+def story_ids(checker):
+    if not checker.stories_parser:
+        return []
+    return [(story.get_story_id(), story.get_page_id()) for story in checker.stories_parser.get_stories_data()]
+
+
+def test_parallel_parse_matches_serial(end_to_end_package, run_checker, assert_same_findings, monkeypatch):
+    # Test packages are small, force the pool anyway
+    monkeypatch.setattr(frontify_checker_module, 'PARALLEL_PARSE_MIN_BYTES', 0)
+    serial = run_checker(end_to_end_package, parse_workers=1)
+    parallel = run_checker(end_to_end_package, parse_workers=2)
+
+    assert_same_findings(parallel, serial)
+    assert story_ids(parallel) == story_ids(serial)
+    assert parallel.spreads_parser.story_id_to_page_id == serial.spreads_parser.story_id_to_page_id
@@ -0,0 +1,28 @@
+from src.classes.PartCache import PartCache
+
+
+def used_font_families(checker):
+    return [font.get_font_family() for font in checker.fonts_parser.get_used_font_families()]
+
+
+def story_page_ids(checker):
+    if not checker.stories_parser:
+        return []
+    return [story.get_page_id() for story in checker.stories_parser.get_stories_data()]
+
+
+def test_part_cache_matches_uncached(end_to_end_package, run_checker, assert_same_findings):
+    part_cache = PartCache()
+    uncached = run_checker(end_to_end_package, in_archive_mode=True)
+    first = run_checker(end_to_end_package, in_archive_mode=True, part_cache=part_cache)
+    misses = part_cache.misses
+    second = run_checker(end_to_end_package, in_archive_mode=True, part_cache=part_cache)
+
+    # Second run is served from the cache
+    assert part_cache.misses == misses
+    assert part_cache.hits > 0
+
+    for checker in (first, second):
+        assert_same_findings(checker, uncached)
+        assert used_font_families(checker) == used_font_families(uncached)
+        assert story_page_ids(checker) == story_page_ids(uncached)
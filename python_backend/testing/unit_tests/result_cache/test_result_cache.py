@@ -0,0 +1,86 @@
+import io
+import json
+import os
+import shutil
+import time
+from app import result_cache as result_cache_module
+from app.jobs import check_package
+from app.result_cache import ResultCache, build_cache_key, new_package_hasher
+
+
+def package_key(package_bytes):
+    hasher = new_package_hasher()
+    hasher.update(package_bytes)
+    return build_cache_key(hasher.hexdigest())
+
+
+def test_identical_bytes_hit(tmp_path):
+    ResultCache(str(tmp_path)).set(package_key(b'package'), {'template_name': 'template.zip'})
+
+    # Another worker, only the disk entry is shared
+    assert ResultCache(str(tmp_path)).get(package_key(b'package')) == {'template_name': 'template.zip'}
+    assert ResultCache(str(tmp_path)).get(package_key(b'other package')) is None
+
+
+def test_checker_version_bump_misses(tmp_path, monkeypatch):
+    result_cache = ResultCache(str(tmp_path))
+    result_cache.set(package_key(b'package'), {'template_name': 'template.zip'})
+
+    monkeypatch.setattr(result_cache_module, 'CHECKER_VERSION', str(int(result_cache_module.CHECKER_VERSION) + 1))
+
+    assert result_cache.get(package_key(b'package')) is None
+
+
+def test_uncommitted_entries_are_not_served(tmp_path):
+    result_cache = ResultCache(str(tmp_path))
+    discarded = result_cache.open_entry('discarded')
+    discarded.write(b'{"template_name":')
+    discarded.discard()
+    unfinished = result_cache.open_entry('unfinished')
+    unfinished.write(b'{"template_name":')
+
+    assert result_cache.get('discarded') is None
+    assert result_cache.get('unfinished') is None
+    assert [f for f in os.listdir(str(tmp_path)) if not f.endswith('.tmp')] == []
+
+
+def test_old_entries_are_evicted(tmp_path):
+    result_cache = ResultCache(str(tmp_path), max_age_seconds=60)
+    result_cache.set('old', {'template_name': 'old.zip'})
+    os.utime(os.path.join(str(tmp_path), 'old.json'), (0, 0))
+
+    # Expired on disk, in another worker as well as in this one's memory
+    assert ResultCache(str(tmp_path), max_age_seconds=60).get('old') is None
+    result_cache.set('new', {'template_name': 'new.zip'})
+    assert os.listdir(str(tmp_path)) == ['new.json']
+
+
+def test_least_recently_used_entries_are_evicted_past_max_disk_bytes(tmp_path):
+    entry_bytes = len(json.dumps({'template_name': 'a.zip'}))
+    result_cache = ResultCache(str(tmp_path), max_disk_bytes=2 * entry_bytes)
+    for index, key in enumerate(['a', 'b']):
+        result_cache.set(key, {'template_name': f'{key}.zip'})
+        last_used = time.time() - 100 + index
+        os.utime(os.path.join(str(tmp_path), f'{key}.json'), (last_used, last_used))
+    result_cache.set('c', {'template_name': 'c.zip'})
+
+    assert sorted(os.listdir(str(tmp_path))) == ['b.json', 'c.json']
+
+
+def test_hit_is_named_after_the_current_upload(tmp_path, fail_data_packages):
+    with open(fail_data_packages[0], 'rb') as package_file:
+        package_bytes = package_file.read()
+    result_cache_settings = {'cache_folder': str(tmp_path / 'cache')}
+    package_sha256 = package_key(package_bytes).rsplit('-v', 1)[0]
+
+    template_names = []
+    for package_name in ('first.zip', 'renamed.zip'):
+        package_folder = tmp_path / package_name.split('.')[0]
+        package_folder.mkdir()
+        shutil.copy(fail_data_packages[0], str(package_folder / package_name))
+        results_file = io.BytesIO()
+        check_package(str(package_folder / package_name), results_file, 'api', package_sha256, result_cache_settings)
+        results = json.loads(results_file.getvalue())
+        template_names.append((results['template_name'], results['analytics']['cache_hit']))
+
+    assert template_names == [('first.zip', False), ('renamed.zip', True)]
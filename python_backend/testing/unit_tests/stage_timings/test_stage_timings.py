@@ -0,0 +1,41 @@
+import os
+import tracemalloc
+from src.classes.FrontifyChecker import FrontifyChecker
+from src.classes.CheckRegistry import CHECK_REGISTRY
+from src.classes.StageTimings import StageTimings
+
+# The timings are taken of the same packages as the end to end tests
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PASS_DATA_DIR = os.path.join(BASE_DIR, '..', '..', 'end_to_end_tests', 'pass_data')
+
+
+def test_every_state_parser_and_check_is_timed():
+    testcase_zip = next(os.path.join(PASS_DATA_DIR, f) for f in sorted(os.listdir(PASS_DATA_DIR)) if f.endswith('.zip'))
+    checker = FrontifyChecker()
+    checker.set_trace_memory(True)
+    checker.set_source_file_path(testcase_zip)
+    checker.set_check_workers(4)
+    checker.run_state_machine()
+    checker.delete_unzipped_root_path()
+
+    timings = checker.stage_timings.to_json()
+    stages = timings['stages']
+    assert {'UNZIP_PACKAGE', 'UNZIP_IDML', 'PARSE_XML', 'PARSE_XML.spreads', 'PARSE_XML.fonts',
+            'CHECKS', 'RESULTS'} <= set(stages)
+    assert {spec.state.name for spec in CHECK_REGISTRY} <= set(stages)
+    assert all(stage['wall_ms'] >= 0 and stage['cpu_ms'] >= 0 for stage in stages.values())
+    assert stages['PARSE_XML']['peak_memory_bytes'] > 0
+    assert timings['peak_memory_bytes'] >= stages['PARSE_XML']['peak_memory_bytes']
+    # Tracing is only on while the checker runs
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_is_not_traced_by_default():
+    stage_timings = StageTimings()
+    stage_timings.start()
+    with stage_timings.measure('UNZIP_PACKAGE', memory=True):
+        pass
+    stage_timings.stop()
+
+    assert 'peak_memory_bytes' not in stage_timings.to_json()['stages']['UNZIP_PACKAGE']
+    assert 'peak_memory_bytes' not in stage_timings.to_json()
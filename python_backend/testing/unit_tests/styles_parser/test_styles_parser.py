@@ -0,0 +1,47 @@
+import os
+import logging
+import pytest
+from src.parsers.StylesParser import StylesParser
+
+STYLES_XML = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Styles.xml')
+NO_PARAGRAPH_STYLE = 'ParagraphStyle/$ID/[No paragraph style]'
+
+
+@pytest.fixture
+def styles_parser():
+    return StylesParser(STYLES_XML)
+
+
+def test_own_values_are_not_inherited(styles_parser):
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body', 'AppliedFont') == ('Arial', '')
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body', 'Hyphenation') == ('false', '')
+    assert styles_parser.get_resolved_property(NO_PARAGRAPH_STYLE, 'AppliedFont') == ('Minion Pro', '')
+
+
+def test_values_are_inherited_through_the_based_on_chain(styles_parser):
+    # Body Indent Small -> Body Indent -> Body -> [No paragraph style]
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body Indent Small', 'FillTint') == (
+        '50', 'ParagraphStyle/Body Indent')
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body Indent Small', 'AppliedFont') == (
+        'Arial', 'ParagraphStyle/Body')
+    # $ID/ base styles are found under the style type prefix
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body Indent Small', 'Composer') == (
+        'HL Composer', NO_PARAGRAPH_STYLE)
+    assert styles_parser.get_resolved_char_property('CharacterStyle/Emphasis', 'KerningMethod') == (
+        'Metrics', 'CharacterStyle/$ID/[No character style]')
+
+
+def test_unset_values_resolve_to_none(styles_parser):
+    # Inherited from the last style of the chain, like an unset value in InDesign
+    assert styles_parser.get_resolved_property('ParagraphStyle/Body Indent', 'GridAlignment') == (
+        None, NO_PARAGRAPH_STYLE)
+    assert styles_parser.get_resolved_property('ParagraphStyle/Missing', 'AppliedFont') == (None, '')
+
+
+def test_based_on_cycle_is_resolved_once(caplog):
+    with caplog.at_level(logging.WARNING, logger='src.parsers.StylesParser'):
+        styles_parser = StylesParser(STYLES_XML)
+
+    assert styles_parser.get_resolved_property('ParagraphStyle/Loop A', 'AppliedFont')[0] is None
+    assert styles_parser.get_resolved_property('ParagraphStyle/Loop B', 'AppliedFont')[0] is None
+    assert any('BasedOn cycle' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,76 @@
+import json
+from src.error_handling.ErrorHandling import ValidationResult
+from src.error_handling.ValidationClassifier import ValidationError, ValidationWarning
+
+
+def test_text_content_merges_in_first_seen_order():
+    results = ValidationResult()
+    for text in ['b', 'a', 'b', 'c', 'a']:
+        results.add_warning(None, ValidationWarning.HYPHENATION, page_id='p1',
+                            identifier='Style', data_id='u1', text_content=[text])
+
+    warnings = results.get_warnings()
+    assert len(warnings) == 1
+    assert warnings[0].get_text_content() == ['b', 'a', 'c']
+
+
+def test_text_content_merges_only_matching_validations():
+    results = ValidationResult()
+    results.add_error(None, ValidationError.KERNING, page_id='p1',
+                      identifier='Style', data_id='u1', text_content=['a'])
+    results.add_error(None, ValidationError.KERNING, page_id='p2',
+                      identifier='Style', data_id='u1', text_content=['b'])
+    results.add_error(None, ValidationError.KERNING, page_id='p1',
+                      identifier='Style', data_id='u2', text_content=['c'])
+    results.add_error(None, ValidationError.KERNING, page_id='p1',
+                      identifier='Style', data_id='u1', text_content=['d'])
+
+    assert [error.get_text_content() for error in results.get_errors()] == [['a', 'd'], ['b'], ['c']]
+
+
+def test_overrides_are_not_merged():
+    results = ValidationResult()
+    for text in ['a', 'b']:
+        results.add_warning(None, ValidationWarning.OVERRIDE, page_id='p1',
+                            identifier='u1', data_id='u1', text_content=[text])
+
+    assert [warning.get_text_content() for warning in results.get_warnings()] == [['a'], ['b']]
+
+
+
+def _results_with_findings():
+    results = ValidationResult()
+    results.template_name = 'Template'
+    results.pages = {'p1': '1'}
+    results.spread_to_pages = {'s1': ['p1']}
+    results.add_error(None, ValidationError.KERNING, page_id='p1',
+                      identifier='Style', data_id='u1', text_content=['a'])
+    results.add_warning(None, ValidationWarning.OVERRIDE, page_id='p1',
+                        identifier='u1', data_id='u1', text_content=['b'])
+    results.text_box_data['u1'] = {'identifier': 'u1', 'content': 'b', 'page_id': 'p1'}
+    return results
+
+
+def test_streamed_results_match_results_json():
+    results = _results_with_findings()
+
+    chunks = list(results.iter_formatted_results_json())
+    assert chunks[-1] == b'}'
+    assert json.loads(b''.join(chunks)) == results.get_formatted_results_json()
+    assert json.loads(b''.join(ValidationResult().iter_formatted_results_json())) == \
+        ValidationResult().get_formatted_results_json()
+
+
+def test_analytics_results_keep_classifiers_and_identifiers():
+    results = _results_with_findings()
+
+    full_json = results.get_formatted_results_json()
+    analytics_json = results.get_analytics_results_json()
+    for category_key, category in analytics_json.items():
+        if category_key == 'template_name':
+            continue
+        for identifier, type_dict in category['details'].items():
+            for type_key, items in type_dict.items():
+                assert items == [
+                    {'validationClassifier': item['validationClassifier'], 'identifier': item['identifier']}
+                    for item in full_json[category_key]['details'][identifier][type_key]]
@@ -0,0 +1,25 @@
+import os
+from app.workspace import Workspace, WorkspaceJanitor
+
+
+def test_workspaces_are_isolated(tmp_path):
+    first = Workspace(str(tmp_path))
+    second = Workspace(str(tmp_path))
+    for workspace in (first, second):
+        with open(workspace.file_path('template.zip'), 'wb') as upload:
+            upload.write(workspace.path.encode())
+
+    first.cleanup()
+
+    assert not os.path.exists(first.path)
+    with open(second.file_path('template.zip'), 'rb') as upload:
+        assert upload.read() == second.path.encode()
+
+
+def test_janitor_only_removes_old_workspaces(tmp_path):
+    old_workspace = Workspace(str(tmp_path))
+    new_workspace = Workspace(str(tmp_path))
+    os.utime(old_workspace.path, (0, 0))
+
+    assert WorkspaceJanitor(str(tmp_path), max_age_seconds=60).sweep() == 1
+    assert os.listdir(str(tmp_path)) == [os.path.basename(new_workspace.path)]